@@ -1,10 +1,11 @@
 import os
 import re
-import shutil
+import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import pyperclip  # Ensure to install via `pip install pyperclip`
 import json  # Import json module
+import p4vhelper_core as core  # Workspace clearing engine shared with P4Vhelper Pro
 
 # Define the config file path
 config_file = "config.txt"
@@ -117,44 +118,55 @@ def clear_workspace():
     if not response:
         return
 
-    try:
-        # Define paths for UE4 and UE5 UserContent
-        source1 = os.path.join(workspace, "UE4-UserContent")
-        source2 = os.path.join(workspace, "UE5-UserContent")
-
-        # Function to delete only second-level directories
-        def clear_second_level_directories(path):
-            if os.path.exists(path):
-                for first_level_dir in os.listdir(path):
-                    first_level_path = os.path.join(path, first_level_dir)
-                    if os.path.isdir(first_level_path):
-                        for second_level_dir in os.listdir(first_level_path):
-                            second_level_path = os.path.join(first_level_path, second_level_dir)
-                            if os.path.isdir(second_level_path):
-                                # Delete contents within the second-level directory
-                                for root, dirs, files in os.walk(second_level_path, topdown=False):
-                                    for name in files:
-                                        file_path = os.path.join(root, name)
-                                        try:
-                                            os.chmod(file_path, 0o777)  # Make file writable
-                                            os.remove(file_path)
-                                        except Exception as e:
-                                            output_label.config(text=f"Error deleting file {file_path}: {e}", fg="red")
-                                    for name in dirs:
-                                        dir_path = os.path.join(root, name)
-                                        try:
-                                            shutil.rmtree(dir_path)
-                                        except Exception as e:
-                                            output_label.config(text=f"Error deleting directory {dir_path}: {e}", fg="red")
-
-        # Clear contents in both UE4 and UE5 content directories
-        clear_second_level_directories(source1)
-        clear_second_level_directories(source2)
-
-        output_label.config(text=f"P4V workspace cleared in: {workspace}", fg="green")
+    # Delete on worker threads so the window stays responsive; the worker
+    # only fills in `state`, which poll_clear shows from the main loop
+    state = {'files': 0, 'bytes': 0, 'deleter': None, 'result': None, 'error': None, 'last_error': None}
+
+    def on_progress(files, size):
+        state['files'], state['bytes'] = files, size
+
+    def on_log(message, color="white"):
+        if color == "red":
+            state['last_error'] = message
+
+    def deleter_ready(deleter):
+        state['deleter'] = deleter
+
+    def cancel_clear():
+        if state['deleter']:
+            state['deleter'].cancel()
+        clear_button.config(state='disabled')
+
+    def work():
+        try:
+            state['result'] = core.clear_user_content(workspace, on_log, on_progress, deleter_ready)
+        except Exception as e:
+            state['error'] = e
+
+    def poll_clear():
+        if thread.is_alive():
+            output_label.config(text=f"Clearing workspace... {state['files']} files deleted "
+                                     f"({core.format_megabytes(state['bytes'])})", fg="orange")
+            root.after(100, poll_clear)
+            return
+
+        clear_button.config(text="Clear Workspace", command=clear_workspace, state='normal')
+        result = state['result']
+        if state['error']:
+            output_label.config(text=f"Error clearing workspace: {state['error']}", fg="red")
+        elif result['cancelled']:
+            output_label.config(text=f"Workspace clear cancelled after {result['files']} files.", fg="orange")
+        elif result['failures']:
+            output_label.config(text=f"{result['failures']} items could not be deleted. Last error: "
+                                     f"{state['last_error']}", fg="red")
+        else:
+            output_label.config(text=f"P4V workspace cleared in: {workspace} ({result['files']} files, "
+                                     f"{result['elapsed']:.1f}s)", fg="green")
 
-    except Exception as e:
-        output_label.config(text=f"Error clearing workspace: {e}", fg="red")
+    clear_button.config(text="Cancel Clear", command=cancel_clear)
+    thread = threading.Thread(target=work, daemon=True)
+    thread.start()
+    poll_clear()
 
 def get_horde_info():
     # Gather input values
@@ -289,7 +301,8 @@ button_frame.grid(row=9, column=0, columnspan=3, pady=20)
 
 tk.Button(button_frame, text="Generate", command=create_folder, bg="green", fg="white").grid(row=0, column=0, padx=10)
 tk.Button(button_frame, text="Clear", command=clear_fields, bg="red", fg="white").grid(row=0, column=1, padx=10)
-tk.Button(button_frame, text="Clear Workspace", command=clear_workspace, bg="orange", fg="white").grid(row=0, column=2, padx=10)
+clear_button = tk.Button(button_frame, text="Clear Workspace", command=clear_workspace, bg="orange", fg="white")
+clear_button.grid(row=0, column=2, padx=10)
 
 # Remove Horde Info Button
 # tk.Button(button_frame, text="Horde Info", command=get_horde_info, bg="blue", fg="white").grid(row=0, column=3, padx=10)
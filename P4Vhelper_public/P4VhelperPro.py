@@ -1,26 +1,42 @@
 # System and standard library imports
-import win32gui
-import win32con
-import win32api
-import win32com.client
-import ctypes
-import os, sys, re, shutil, json, math
+import os, sys, re, json, math
 import time, datetime, subprocess
 from itertools import cycle
-from ctypes import windll
-import urllib.request
-import webbrowser
+from collections import deque
+from array import array
 
 # Tkinter imports
 import tkinter as tk
+import tkinter.font as tkfont
 from tkinter import filedialog, messagebox, simpledialog, ttk, dialog
 
-# Third-party imports
-import pyperclip
-from P4 import P4, P4Exception
-import configparser
 import threading
 
+# P4 engine shared with the command line (p4vhelper_cli.py)
+import p4vhelper_core as core
+from p4vhelper_core import (LazyModule, p4python, p4_pool, p4_cache, format_p4_error,
+                            hidden_startupinfo, init_p4, save_p4_config,
+                            fetch_p4_info, fetch_client_spec, fetch_login_errors,
+                            run_startup_probes)
+
+
+# Windows-only modules (window icon, admin rights)
+win32gui = LazyModule('win32gui')
+win32con = LazyModule('win32con')
+win32api = LazyModule('win32api')
+ctypes = LazyModule('ctypes')
+
+# Only needed by the P4 CLI installer
+urllib_request = LazyModule('urllib.request')
+webbrowser = LazyModule('webbrowser')
+
+# Only needed once the Actions Log is mirrored to its file
+logging = LazyModule('logging')
+logging_handlers = LazyModule('logging.handlers')
+
+# Third-party imports
+pyperclip = LazyModule('pyperclip')
+
 # Define global variables
 global workspace_var, ue_version_var, distribution_method_var, app_name_var, sf_case_var, root, output_label
 
@@ -28,8 +44,7 @@ global workspace_var, ue_version_var, distribution_method_var, app_name_var, sf_
 root = None
 output_label = None
 output_text = None
-loading_thread = None
-stop_loading = False
+loading_animation_id = None
 selected_path = None
 workspace_var = None
 ue_version_var = None
@@ -38,48 +53,22 @@ app_name_var = None
 sf_case_var = None
 dark_mode = False
 config_file = "config.txt"
+startup_started_at = None
 
 
 
-def check_p4_installed():
-    """Check if P4 command-line client is installed"""
-    try:
-        # First try PATH
-        result = subprocess.run(['p4', '-V'], 
-                              capture_output=True, 
-                              text=True,
-                              startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
-        return result.returncode == 0
-    except FileNotFoundError:
-        try:
-            # Try common installation paths
-            p4_paths = [
-                r"C:\Program Files\Perforce\p4.exe",
-                r"C:\Program Files (x86)\Perforce\p4.exe"
-            ]
-            for path in p4_paths:
-                if os.path.exists(path):
-                    # Add to PATH
-                    os.environ['PATH'] = os.path.dirname(path) + os.pathsep + os.environ['PATH']
-                    return True
-            return False
-        except:
-            return False
-
 def download_p4_installer(progress_callback=None):
     """Download P4 installer from Perforce website"""
     url = "https://cdist2.perforce.com/perforce/r24.2/bin.ntx64/helix-p4-x64.exe"
     local_path = os.path.join(os.environ['TEMP'], "helix-p4-x64.exe")
     
     try:
-        import urllib.request
-        
         def report_progress(count, block_size, total_size):
             if progress_callback:
                 percentage = int(count * block_size * 100 / total_size)
                 progress_callback(min(percentage, 100))
         
-        urllib.request.urlretrieve(url, local_path, reporthook=report_progress)
+        urllib_request.urlretrieve(url, local_path, reporthook=report_progress)
         return local_path
     except Exception as e:
         raise Exception(f"Failed to download P4 installer: {str(e)}")
@@ -124,7 +113,7 @@ def install_p4(installer_path, progress_window):
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
-            startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW)
+            startupinfo=hidden_startupinfo()
         )
         
         # Monitor installation progress
@@ -147,7 +136,7 @@ def install_p4(installer_path, progress_window):
                         ['p4', '-V'],
                         capture_output=True,
                         text=True,
-                        startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW)
+                        startupinfo=hidden_startupinfo()
                     )
                     if check_result.returncode == 0:
                         progress_window.update_progress(100)
@@ -230,47 +219,143 @@ def cleanup_temp_files():
     
 #Improving the execution of the .exe file
 def run_p4_command(command):
-    """Run a P4 command without showing command window."""
+    """Run a P4 command on a pooled connection and return its text output."""
     try:
-        # Add CREATE_NO_WINDOW flag on Windows
-        startupinfo = None
-        if sys.platform == "win32":
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = subprocess.SW_HIDE
-
-        result = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            check=True,
-            startupinfo=startupinfo  # This hides the window
-        )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        messagebox.showerror("P4 Error", f"Error executing P4 command: {e.stderr}")
+        args = command[1:] if command and command[0] == 'p4' else command
+        result = p4_pool.run(*args, tagged=False)
+        return "\n".join(str(line) for line in result).strip()
+    except p4python.P4Exception as e:
+        messagebox.showerror("P4 Error", f"Error executing P4 command: {format_p4_error(e)}")
         return None 
     
-def save_p4_config(port, user):
-    """Save P4 configuration to file"""
-    config = configparser.ConfigParser()
-    config['P4'] = {
-        'port': port,
-        'user': user
-    }
-    with open('p4config.ini', 'w') as configfile:
-        config.write(configfile)
-    
 # validation for numeric input
 def validate_numeric_input(P):
     if P == "": # Allow empty field
         return True
     return P.isdigit()
 
+# validation for decimal input (e.g. a size in GB)
+def validate_decimal_input(P):
+    return re.fullmatch(r'\d*\.?\d*', P) is not None
+
+# One main-loop clock for every spinner and progress animation
+
+SPINNER_CHARS = ["⣾", "⣽", "⣻", "⢿", "⡿", "⣟", "⣯", "⣷"]
+
+
+class AnimationClock:
+    """Single Tk timer that drives all spinners and progress animations.
+
+    An animation registers callback(frame) with add(); it is called every
+    `every` ticks until it is removed, returns False, or its widget is
+    destroyed. Animations whose widget is not visible are skipped, the
+    clock slows down while none is visible and stops when none is
+    registered. add() and remove() can be called from worker threads.
+    """
+    INTERVAL = 50  # ms per tick (20 fps)
+    IDLE_INTERVAL = 500  # ms between visibility checks while nothing is visible
+
+    def __init__(self):
+        self.root = None
+        self.animations = {}  # id -> (callback, every, widget)
+        self.next_id = 0
+        self.frame = 0
+        self.after_id = None
+        self.lock = threading.Lock()
+
+    def attach(self, root):
+        self.root = root
+
+    def add(self, callback, every=1, widget=None):
+        """Register an animation and return its id for remove()"""
+        with self.lock:
+            self.next_id += 1
+            animation_id = self.next_id
+        self.call_on_main_loop(self.register, animation_id, callback, every, widget)
+        return animation_id
+
+    def remove(self, animation_id):
+        if animation_id is not None:
+            self.call_on_main_loop(self.animations.pop, animation_id, None)
+
+    def call_on_main_loop(self, function, *args):
+        if threading.current_thread() is threading.main_thread():
+            function(*args)
+        else:
+            self.root.after(0, function, *args)
+
+    def register(self, animation_id, callback, every, widget):
+        self.animations[animation_id] = (callback, every, widget)
+        if self.after_id is None:
+            self.after_id = self.root.after(self.INTERVAL, self.tick)
+
+    def tick(self):
+        self.after_id = None
+        self.frame += 1
+        visible = False
+        for animation_id, (callback, every, widget) in list(self.animations.items()):
+            try:
+                if widget is not None and not widget.winfo_exists():
+                    self.animations.pop(animation_id, None)
+                    continue
+                if widget is not None and not widget.winfo_viewable():
+                    continue
+                visible = True
+                if self.frame % every == 0 and callback(self.frame) is False:
+                    self.animations.pop(animation_id, None)
+            except tk.TclError:
+                self.animations.pop(animation_id, None)
+
+        if self.animations:
+            interval = self.INTERVAL if visible else self.IDLE_INTERVAL
+            self.after_id = self.root.after(interval, self.tick)
+
+
+animation_clock = AnimationClock()
+
+
 # Window with loading bar for get revision
     
+def on_main_thread(func, *args, **kwargs):
+    """Call func on the Tk main loop and return its result, from any thread.
+
+    Worker threads use this to create or destroy windows; the worker waits
+    while the main loop makes the call. Exceptions are raised in the caller.
+    """
+    if threading.current_thread() is threading.main_thread():
+        return func(*args, **kwargs)
+    done = threading.Event()
+    outcome = {}
+
+    def call():
+        try:
+            outcome['result'] = func(*args, **kwargs)
+        except Exception as e:
+            outcome['error'] = e
+        finally:
+            done.set()
+
+    root.after(0, call)
+    done.wait()
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+
 class ProgressWindow:
-    def __init__(self, parent, title="Operation Progress", determinate=True):
+    """Modal progress window with a progress bar, status text and optional Cancel button.
+
+    Only create it on the main thread; worker threads use
+    ProgressWindow.open(). update_progress, update_status and close can be
+    called from any thread.
+    """
+
+    @classmethod
+    def open(cls, title="Operation Progress", **options):
+        """Create a progress window over root on the main thread, from any thread"""
+        return on_main_thread(cls, root, title, **options)
+
+    def __init__(self, parent, title="Operation Progress", determinate=True, on_cancel=None):
         self.window = tk.Toplevel(parent)
         self.window.title(title)
         
@@ -335,6 +420,15 @@ class ProgressWindow:
                                    justify='left')
         self.status_label.grid(row=2, column=0, padx=20, pady=(0,10), sticky='w')
         
+        # Optional Cancel button for operations that can stop part way
+        if on_cancel:
+            def cancel():
+                self.cancel_button.config(state='disabled')
+                self.update_status("Cancelling...")
+                on_cancel()
+            self.cancel_button = tk.Button(self.window, text="Cancel", command=cancel, width=10)
+            self.cancel_button.grid(row=3, column=0, pady=(0,10))
+        
         # Configure style for dark theme
         self.window.configure(bg="#2E2E2E")
         self.status_label.configure(bg="#2E2E2E", fg="white")
@@ -355,37 +449,72 @@ class ProgressWindow:
         self.spinner_chars = ["◐", "◓", "◑", "◒"]
         self.spinner_index = 0
         
-        # Start spinner animation
-        self.animate_spinner()
+        # Progress updates from worker threads, drawn by render_frame on the main loop.
+        # deque appends and pops are atomic, so producers never take a lock.
+        self.pending_updates = deque(maxlen=256)
+        self.last_frame_at = 0
         
-        if not determinate:
-            self.progress_bar.start(10)
+        # Spinner (every 250 ms) and progress renderer run on the shared animation clock
+        self.spinner_id = animation_clock.add(self.animate_spinner, every=5, widget=self.window)
+        self.animation_id = animation_clock.add(self.render_frame, widget=self.window)
     
-    def animate_spinner(self):
+    def animate_spinner(self, frame=None):
         """Animate the spinner next to the percentage"""
         if not self.animation_active:
-            return
+            return False
             
         self.spinner_index = (self.spinner_index + 1) % len(self.spinner_chars)
         self.spinner_label.config(text=self.spinner_chars[self.spinner_index])
-        self.spinner_id = self.window.after(250, self.animate_spinner)
     
     def update_progress(self, percentage, status_text=None):
-        """Update progress bar and optionally the status text"""
-        self.target_progress = percentage
-        if not self.animation_id:  # Start animation if not already running
-            self.animate_progress()
-            
-        self.percentage_var.set(f"{percentage:.1f}%")
+        """Update progress bar and optionally the status text.
+
+        Safe to call from worker threads and as often as you like: the
+        update is only queued, and render_frame shows the latest one.
+        """
+        self.pending_updates.append((percentage, status_text))
+        self.render_now_if_main_thread()
+    
+    def update_status(self, text):
+        """Update only the status text"""
+        self.pending_updates.append((None, text))
+        self.render_now_if_main_thread()
+    
+    def render_now_if_main_thread(self):
+        """Render right away when called from a main-thread callback that blocks the main loop"""
+        if threading.current_thread() is not threading.main_thread():
+            return
+        if time.perf_counter() - self.last_frame_at >= AnimationClock.INTERVAL / 1000:
+            self.render_frame()
+            self.window.update_idletasks()
+    
+    def render_frame(self, frame=None):
+        """Drain queued updates and draw one frame on the main loop"""
+        if not self.animation_active:
+            return False
+        self.last_frame_at = time.perf_counter()
+            
+        # Only the latest percentage and status are worth drawing
+        percentage = status_text = None
+        while self.pending_updates:
+            queued_percentage, queued_status = self.pending_updates.popleft()
+            if queued_percentage is not None:
+                percentage = queued_percentage
+            if queued_status:
+                status_text = queued_status
+        if percentage is not None:
+            self.target_progress = percentage
+            self.percentage_var.set(f"{percentage:.1f}%")
         if status_text:
             self.status_var.set(status_text)
-        self.window.update()
+
+        if self.progress_bar['mode'] == 'indeterminate':
+            self.progress_bar.step(5)  # Same pace as Progressbar.start(10), one redraw per frame
+        else:
+            self.animate_progress()
     
     def animate_progress(self):
-        """Animate the progress bar with a smooth forward motion"""
-        if not self.animation_active:
-            return
-            
+        """Move the progress bar one step with a smooth forward motion"""
         # Calculate the difference between current and target progress
         diff = self.target_progress - self.current_progress
         
@@ -401,28 +530,22 @@ class ProgressWindow:
                 display_progress = self.current_progress
                 
             self.progress_var.set(display_progress)
-        else:
+        elif self.progress_var.get() != self.target_progress:
             self.progress_var.set(self.target_progress)
-            
-        self.window.update()
-        self.animation_id = self.window.after(50, self.animate_progress)
-    
-    def update_status(self, text):
-        """Update only the status text"""
-        self.status_var.set(text)
-        self.window.update()
     
     def close(self):
-        """Close the progress window"""
+        """Close the progress window; from a worker thread it is closed on the main loop"""
+        if threading.current_thread() is not threading.main_thread():
+            root.after(0, self.close)
+            return
+        if not self.animation_active:
+            return  # Already closed
         self.animation_active = False
-        if self.animation_id:
-            self.window.after_cancel(self.animation_id)
-        if self.spinner_id:
-            self.window.after_cancel(self.spinner_id)
-        if self.progress_bar['mode'] == 'indeterminate':
-            self.progress_bar.stop()
-        self.window.grab_release()
-        self.window.destroy()
+        animation_clock.remove(self.animation_id)
+        animation_clock.remove(self.spinner_id)
+        if self.window.winfo_exists():
+            self.window.grab_release()
+            self.window.destroy()
 
 
 def show_p4_installation_dialog():
@@ -472,6 +595,7 @@ def show_p4_installation_dialog():
                 except:
                     pass
                 # Start the application
+                root.deiconify()
                 initialize_with_details()
             else:
                 # None or any other value indicates failure
@@ -521,118 +645,51 @@ def show_p4_installation_dialog():
                 widget.configure(bg="#444444", fg="white")
 
 
+def finish_startup(results, timings):
+    """Show the outcome of the startup probes (runs on the main thread)"""
+    if results['install'] is not True:
+        root.withdraw()  # Hide main window
+        show_p4_installation_dialog()
+        return
+
+    info = results['info']
+    if isinstance(info, subprocess.TimeoutExpired):
+        add_to_log("❌ Connection attempt timed out", "red")
+        add_to_log("⚠️ Hint: Check that your VPN is on", "yellow")
+        show_p4_error_window("Connection attempt timed out")
+    elif isinstance(info, p4python.P4Exception):
+        add_to_log("❌ Unable to connect to P4 server", "red")
+        add_to_log("⚠️ Hint: Check that your VPN is on", "yellow")
+        show_p4_error_window(format_p4_error(info))
+    elif isinstance(info, Exception):
+        add_to_log(f"❌ Error checking P4 connection: {str(info)}", "red")
+        add_to_log("⚠️ Hint: Check that your VPN is on", "yellow")
+        show_p4_error_window(str(info))
+    else:
+        # Everything display_p4_info needs is already cached
+        display_p4_info()
+
+    breakdown = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items())
+    if startup_started_at is not None:
+        breakdown += f", ready after {(time.perf_counter() - startup_started_at) * 1000:.0f} ms"
+    add_to_log(f"Startup timing: {breakdown}", "white")
+
+
 def initialize_with_details():
-    """Initialize application with threaded P4 connection check and details"""
-    # Show initial loading screen
-    loading_frame = tk.Frame(root, bg="#2E2E2E", highlightbackground="white", highlightthickness=2)
-    loading_frame.place(relx=0.5, rely=0.5, anchor="center")
-    
-    loading_text = tk.Label(
-        loading_frame,
-        text="Initializing P4 connection...",
-        font=("Arial", 10),
-        bg="#2E2E2E",
-        fg="white"
-    )
-    loading_text.pack(pady=10, padx=20)
-    
-    spinner_label = tk.Label(
-        loading_frame,
-        text="⣾",
-        font=("Arial", 12),
-        bg="#2E2E2E",
-        fg="white"
-    )
-    spinner_label.pack(pady=(0,10))
-    
-    # Variable to control animation
-    animation_running = True
-    thread_running = True  # New flag to control thread
-    
-    def update_spinner(index=0):
-        if animation_running and loading_frame.winfo_exists():
-            spinner_chars = ["⣾", "⣽", "⣻", "⢿", "⡿", "⣟", "⣯", "⣷"]
-            spinner_label.config(text=spinner_chars[index])
-            next_index = (index + 1) % len(spinner_chars)
-            if animation_running:  # Check again before scheduling next update
-                root.after(100, update_spinner, next_index)
-    
-    # Start spinner animation
-    update_spinner()
-    
-    def cleanup():
-        nonlocal animation_running
-        animation_running = False
-        if loading_frame.winfo_exists():
-            loading_frame.destroy()
-    
-    def check_connection():
-        nonlocal thread_running
+    """Probe P4 in the background and fill in connection details when ready.
+
+    The window stays fully usable while the probes run.
+    """
+    add_to_log("Connecting to P4 server...", "white")
+
+    def probe():
+        results, timings = run_startup_probes()
         try:
-            if not thread_running:  # Check if we should stop
-                cleanup()
-                return
-                
-            # Quick connection test
-            test_result = subprocess.run(['p4', 'info'],
-                                      capture_output=True,
-                                      text=True,
-                                      timeout=5,
-                                      startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
-            
-            if not thread_running:  # Check again after long operation
-                cleanup()
-                return
-                
-            if test_result.returncode != 0:
-                # Connection failed
-                root.after(0, lambda: [
-                    cleanup(),
-                    add_to_log("❌ Unable to connect to P4 server", "red"),
-                    add_to_log("⚠️ Hint: Check that your VPN is on", "yellow"),
-                    show_p4_error_window(test_result.stderr if test_result.stderr else "Connection failed")
-                ])
-                return
-            
-            # If connection test passed, show details
-            if thread_running:  # Final check before showing details
-                root.after(0, lambda: [
-                    cleanup(),
-                    display_p4_info()
-                ])
-            
-        except subprocess.TimeoutExpired:
-            if thread_running:
-                root.after(0, lambda: [
-                    cleanup(),
-                    add_to_log("❌ Connection attempt timed out", "red"),
-                    add_to_log("⚠️ Hint: Check that your VPN is on", "yellow"),
-                    show_p4_error_window("Connection attempt timed out")
-                ])
-        except Exception as e:
-            if thread_running:
-                root.after(0, lambda: [
-                    cleanup(),
-                    add_to_log(f"❌ Error checking P4 connection: {str(e)}", "red"),
-                    add_to_log("⚠️ Hint: Check that your VPN is on", "yellow"),
-                    show_p4_error_window(str(e))
-                ])
-        finally:
-            thread_running = False
-    
-    # Modify window close handler
-    def on_closing():
-        nonlocal thread_running
-        thread_running = False  # Signal thread to stop
-        cleanup()  # Clean up UI
-        save_window_position()
-        root.destroy()
-    
-    # Update window close protocol
-    root.protocol("WM_DELETE_WINDOW", on_closing)
-    
-    # Start the connection check in a separate thread
-    thread = threading.Thread(target=check_connection)
+            root.after(0, lambda: finish_startup(results, timings))
+        except (RuntimeError, tk.TclError):
+            pass  # Window was closed while probing
+
+    thread = threading.Thread(target=probe)
     thread.daemon = True
     thread.start()
 
@@ -641,105 +698,60 @@ def initialize_with_details():
 
 # Function to improve the way the log is displayed when loading things.
 
-def update_last_line(text_widget, new_text, tag=None):
-    """Update the last line of the text widget in-place"""
-    try:
-        last_line_start = text_widget.index("end-2c linestart")
-        last_line_end = text_widget.index("end-1c")
-        text_widget.delete(last_line_start, last_line_end)
-        text_widget.insert(last_line_start, new_text, tag if tag else None)
-    except Exception:
-        pass  # Fail silently if there's an issue
-
-def loading_animation(action_text="Processing"):
-    """Shows a loading animation in the log with custom action text"""
-    spinner = cycle(['⣾', '⣽', '⣻', '⢿', '⡿', '⣟', '⣯', '⣷'])
-    global stop_loading
-    
-    # Add initial loading message
-    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+def set_loading_line(text):
+    """Show text on the unterminated last line of the log, or clear it with ''.
+
+    New log lines are always inserted above this line, see LogSink.flush.
+    """
     output_text.configure(state='normal')
-    output_text.insert(tk.END, f"[{timestamp}] {action_text} ", "color_white")
-    output_text.configure(state='disabled')
-    
-    while not stop_loading:
-        output_text.configure(state='normal')
-        # Update just the spinner character
-        update_last_line(output_text, f"[{timestamp}] {action_text} {next(spinner)}", "color_white")
+    output_text.delete("end-1c linestart", "end-1c")
+    if text:
+        output_text.insert("end-1c", text, "color_white")
         output_text.see(tk.END)
-        output_text.configure(state='disabled')
-        time.sleep(0.1)
-    
-    # Clear the loading message line when done
-    output_text.configure(state='normal')
-    last_line_start = output_text.index("end-2c linestart")
-    last_line_end = output_text.index("end-1c")
-    output_text.delete(last_line_start, last_line_end)
     output_text.configure(state='disabled')
 
-def start_loading_animation(action_text):
-    """Start the loading animation in a new thread"""
-    global loading_thread, stop_loading
-    stop_loading = False
-    loading_thread = threading.Thread(target=loading_animation, args=(action_text,))
-    loading_thread.daemon = True
-    loading_thread.start()
+def start_loading_animation(action_text="Processing"):
+    """Show a spinner with custom action text in the log until stop_loading_animation"""
+    global loading_animation_id
+    stop_loading_animation()
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    spinner = cycle(SPINNER_CHARS)
+
+    def draw(frame):
+        set_loading_line(f"[{timestamp}] {action_text} {next(spinner)}")
+
+    # 10 spinner steps per second
+    loading_animation_id = animation_clock.add(draw, every=2, widget=output_text)
 
 def stop_loading_animation():
-    """Stop the loading animation"""
-    global stop_loading
-    stop_loading = True
+    """Stop the loading animation and clear its line"""
+    global loading_animation_id
+    if loading_animation_id is not None:
+        animation_clock.remove(loading_animation_id)
+        animation_clock.call_on_main_loop(set_loading_line, "")
+        loading_animation_id = None
     
     
 # Functions used for the p4 conection (P4V Conection button)
 
-def init_p4():
-    """Initialize P4 connection and return P4 object"""
-    p4 = P4()
-    
-    # Try to get saved credentials from config
-    config = configparser.ConfigParser()
-    if os.path.exists('p4config.ini'):
-        config.read('p4config.ini')
-        if 'P4' in config:
-            p4.port = config['P4'].get('port', '')
-            p4.user = config['P4'].get('user', '')
-    
-    return p4
-
-
 def get_p4_info():
     """Get P4 connection info and workspace path"""
     try:
-        # Create new P4 instance
-        p4 = P4()
-        
-        # Try to get saved credentials from config
-        config = configparser.ConfigParser()
-        if os.path.exists('p4config.ini'):
-            config.read('p4config.ini')
-            if 'P4' in config:
-                p4.port = config['P4'].get('port', '')
-                p4.user = config['P4'].get('user', '')
+        # Saved credentials prefill the login prompts
+        p4 = init_p4()
         
         # Check login status first
-        login_test = subprocess.run(['p4', 'login', '-s'],
-                                  capture_output=True,
-                                  text=True,
-                                  startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
+        login_error_text = "\n".join(fetch_login_errors())
         
-        if "invalid or unset" in login_test.stderr or "ticket expired" in login_test.stderr:
+        if "invalid or unset" in login_error_text or "ticket expired" in login_error_text:
             # First check if it's a connection issue
-            connection_test = subprocess.run(['p4', 'info'],
-                                          capture_output=True,
-                                          text=True,
-                                          startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
-            
-            if connection_test.returncode != 0:
+            try:
+                fetch_p4_info(timeout=5)
+            except (p4python.P4Exception, subprocess.TimeoutExpired) as e:
                 # Connection error - likely VPN issue
                 add_to_log("❌ Unable to connect to P4 server", "red")
                 add_to_log("⚠️ Hint: Check that your VPN is on", "yellow")
-                show_p4_error_window(connection_test.stderr if connection_test.stderr else "Connection failed")
+                show_p4_error_window(format_p4_error(e) if isinstance(e, p4python.P4Exception) else "Connection attempt timed out")
                 return False
             
             add_to_log("Not connected to P4. Please provide connection details.", "white")
@@ -786,7 +798,7 @@ def get_p4_info():
                                               stdout=subprocess.PIPE,
                                               stderr=subprocess.PIPE,
                                               text=True,
-                                              startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
+                                              startupinfo=hidden_startupinfo())
                 
                 # Send password to stdin
                 stdout, stderr = login_process.communicate(input=p4_passwd + '\n')
@@ -799,37 +811,16 @@ def get_p4_info():
                 save_p4_config(p4_port, p4_user)
                 
                 # Get workspace info using p4 info command
-                info_result = subprocess.run(['p4', 'info'],
-                                          capture_output=True,
-                                          text=True,
-                                          startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
+                info = fetch_p4_info()
                 
-                if info_result.returncode == 0:
-                    # Parse info output
-                    info_lines = info_result.stdout.splitlines()
-                    client_name = None
-                    for line in info_lines:
-                        if line.startswith('Client name:'):
-                            client_name = line.split(':', 1)[1].strip()
-                            break
-                    
-                    if client_name:
-                        # Get client workspace info
-                        client_result = subprocess.run(['p4', 'client', '-o', client_name],
-                                                    capture_output=True,
-                                                    text=True,
-                                                    startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
-                        
-                        if client_result.returncode == 0:
-                            # Parse client output for Root
-                            client_lines = client_result.stdout.splitlines()
-                            for line in client_lines:
-                                if line.startswith('Root:'):
-                                    workspace_path = line.split(':', 1)[1].strip()
-                                    workspace_var.set(workspace_path)
-                                    add_to_log(f"Workspace path set to: {workspace_path}", "green")
-                                    save_workspace(workspace_path)
-                                    break
+                if info.client:
+                    # Get client workspace info
+                    client_spec = fetch_client_spec(info.client)
+                    workspace_path = client_spec.get('Root', '').strip()
+                    if workspace_path:
+                        workspace_var.set(workspace_path)
+                        add_to_log(f"Workspace path set to: {workspace_path}", "green")
+                        save_workspace(workspace_path)
                 
                 add_to_log("Successfully connected to P4", "green")
                 return True
@@ -841,25 +832,15 @@ def get_p4_info():
         else:
             # Already logged in, just display info
             try:
-                info_result = subprocess.run(['p4', 'info'],
-                                          capture_output=True,
-                                          text=True,
-                                          startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
+                info = fetch_p4_info()
+                add_to_log("Successfully connected to P4", "green")
                 
-                if info_result.returncode == 0:
-                    add_to_log("Successfully connected to P4", "green")
-                    
-                    # Parse info output
-                    info_lines = info_result.stdout.splitlines()
-                    for line in info_lines:
-                        if line.startswith('Client root:'):
-                            workspace_path = line.split(':', 1)[1].strip()
-                            workspace_var.set(workspace_path)
-                            add_to_log(f"Workspace path set to: {workspace_path}", "green")
-                            save_workspace(workspace_path)
-                            break
-                    
-                    return True
+                if info.client_root:
+                    workspace_var.set(info.client_root)
+                    add_to_log(f"Workspace path set to: {info.client_root}", "green")
+                    save_workspace(info.client_root)
+                
+                return True
                 
             except Exception as e:
                 add_to_log(f"Error accessing P4: {str(e)}", "red")
@@ -867,10 +848,10 @@ def get_p4_info():
                 show_p4_error_window(str(e))
                 return False
                 
-    except subprocess.CalledProcessError as e:
+    except p4python.P4Exception as e:
         add_to_log("❌ Unable to connect to P4 server", "red")
         add_to_log("⚠️ Hint: Check that your VPN is on", "yellow")
-        show_p4_error_window(e.stderr if e.stderr else "Connection failed")
+        show_p4_error_window(format_p4_error(e))
         return False
     except Exception as e:
         add_to_log(f"❌ Error: {str(e)}", "red")
@@ -907,13 +888,14 @@ def p4_connection_button_click():
     )
     spinner_label.pack()
     
-    # Variable to control animation
-    animation_running = True
+    # Spinner animation on the shared clock (10 steps per second)
+    spinner = cycle(SPINNER_CHARS)
+    spinner_id = animation_clock.add(lambda frame: spinner_label.config(text=next(spinner)),
+                                     every=2, widget=spinner_label)
     
     def cleanup():
         """Clean up loading indicator and re-enable button"""
-        nonlocal animation_running
-        animation_running = False
+        animation_clock.remove(spinner_id)
         if loading_frame.winfo_exists():
             loading_frame.destroy()
         
@@ -922,17 +904,6 @@ def p4_connection_button_click():
             if widget.cget('text') == "P4 Connection":
                 widget.config(state='normal')
     
-    # Spinner animation function
-    def update_spinner(index=0):
-        if animation_running and loading_frame.winfo_exists():
-            spinner_chars = ["⣾", "⣽", "⣻", "⢿", "⡿", "⣟", "⣯", "⣷"]
-            spinner_label.config(text=spinner_chars[index])
-            next_index = (index + 1) % len(spinner_chars)
-            root.after(100, update_spinner, next_index)
-    
-    # Start spinner animation
-    update_spinner()
-    
     def handle_connection_error(error_msg):
         """Handle connection error on main thread"""
         cleanup()
@@ -948,16 +919,14 @@ def p4_connection_button_click():
     
     def run_p4_check():
         try:
-            # Quick connection test first
-            test_result = subprocess.run(['p4', 'info'],
-                                      capture_output=True,
-                                      text=True,
-                                      timeout=5,
-                                      startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
-            
-            if test_result.returncode != 0:
+            # Quick connection test first. The user asked for a fresh check, so
+            # refresh the cached metadata that display_p4_info() will reuse.
+            p4_cache.invalidate()
+            try:
+                fetch_p4_info(timeout=5)
+            except p4python.P4Exception as e:
                 # Connection failed - schedule error display on main thread
-                error_msg = test_result.stderr if test_result.stderr else "Connection failed"
+                error_msg = format_p4_error(e)
                 root.after(0, lambda: handle_connection_error(error_msg))
                 return
             
@@ -978,14 +947,9 @@ def p4_connection_button_click():
 def check_p4_connection():
     """Quick check for P4 connectivity"""
     try:
-        result = subprocess.run(['p4', 'info'],
-                            capture_output=True,
-                            text=True,
-                            check=True,
-                            timeout=5,  # Add timeout to prevent long waits
-                            startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
-        return result.returncode == 0
-    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        fetch_p4_info(timeout=5)  # Add timeout to prevent long waits
+        return True
+    except (p4python.P4Exception, OSError, subprocess.TimeoutExpired) as e:
         return False
 
 def show_p4_error_window(error_message=None):
@@ -1054,58 +1018,27 @@ def display_p4_info():
     try:
         # First ensure we're connected using the existing logic
         if get_p4_info():
-            # Create startupinfo to hide windows
-            startupinfo = None
-            if sys.platform == "win32":
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-
             # Get and display P4 info
-            result = subprocess.run(['p4', 'info'],
-                                  capture_output=True,
-                                  text=True,
-                                  check=True,
-                                  startupinfo=startupinfo)
+            info = fetch_p4_info()
+            
+            add_to_log("════════════════════════", "white")
+            add_to_log("P4 Connection Details:", "white")
+            add_to_log(f"Server: {info.server_address or 'Not found'}", "green")
+            add_to_log(f"User: {info.user or 'Not found'}", "green")
+            add_to_log(f"Client: {info.client or 'Not found'}", "green")
+            add_to_log(f"Workspace root: {info.client_root or 'Not found'}", "green")
             
-            if result.returncode == 0:
-                info_dict = {}
-                for line in result.stdout.splitlines():
-                    if line.strip():
-                        key, value = line.split(':', 1)
-                        info_dict[key.strip()] = value.strip()
+            # Get and display workspace mappings
+            try:
+                client_spec = fetch_client_spec()
+                add_to_log("Workspace Mappings:", "white")
+                for mapping in client_spec.get('View', []):
+                    add_to_log(f"└─ {mapping.strip()}", "green")
+            except Exception:
+                # Skip workspace mappings if there's an error
+                pass
                 
-                add_to_log("════════════════════════", "white")
-                add_to_log("P4 Connection Details:", "white")
-                add_to_log(f"Server: {info_dict.get('Server address', 'Not found')}", "green")
-                add_to_log(f"User: {info_dict.get('User name', 'Not found')}", "green")
-                add_to_log(f"Client: {info_dict.get('Client name', 'Not found')}", "green")
-                add_to_log(f"Workspace root: {info_dict.get('Client root', 'Not found')}", "green")
-                
-                # Get and display workspace mappings
-                try:
-                    client_result = subprocess.run(['p4', 'client', '-o'],
-                                                capture_output=True,
-                                                text=True,
-                                                check=True,
-                                                startupinfo=startupinfo)
-                    
-                    if client_result.returncode == 0:
-                        add_to_log("Workspace Mappings:", "white")
-                        in_view_section = False
-                        for line in client_result.stdout.splitlines():
-                            if line.startswith('View:'):
-                                in_view_section = True
-                                continue
-                            if in_view_section and line.strip() and not line.startswith('\t'):
-                                break
-                            if in_view_section and line.strip():
-                                add_to_log(f"└─ {line.strip()}", "green")
-                except Exception:
-                    # Skip workspace mappings if there's an error
-                    pass
-                    
-                add_to_log("════════════════════════", "white")
+            add_to_log("════════════════════════", "white")
                 
     except Exception as e:
         error_msg = str(e)
@@ -1129,130 +1062,251 @@ def p4_sync(path):
     return run_p4_command(['p4', 'sync', f'{path}...'])
 
 
-def add_to_log(message, color="black"):
-    """Add message to log with timestamp and color"""
-    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-    output_text.configure(state='normal')
-    output_text.insert(tk.END, f"[{timestamp}] {message}\n", f"color_{color}")
-    output_text.see(tk.END)  # Auto-scroll to the end
-    output_text.configure(state='disabled')
-    
+class LogSink:
+    """Thread-safe, batched writer for the Actions Log.
+
+    write() only appends to a deque, so worker threads never touch Tk.
+    flush() runs on the main loop once per frame: everything queued since
+    the last frame goes in with a single insert, the widget is trimmed to
+    the newest max_lines lines, and the same messages are mirrored as JSON
+    lines to a rotating log file.
+    """
+    FLUSH_INTERVAL = 50  # ms between flushes
+
+    def __init__(self, max_lines=5000, log_path="p4vhelper.log", max_bytes=1024 * 1024, backup_count=3):
+        self.max_lines = max_lines
+        self.log_path = log_path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.pending = deque()
+        self.widget = None
+        self.file_logger = None
+
+    def write(self, message, color="white"):
+        self.pending.append((datetime.datetime.now(), message, color))
+
+    def attach(self, widget):
+        """Start flushing into the Text widget"""
+        self.widget = widget
+        self.widget.after(self.FLUSH_INTERVAL, self.flush)
+
+    def drain(self):
+        batch = []
+        while self.pending:
+            batch.append(self.pending.popleft())
+        return batch
+
+    def flush(self):
+        batch = self.drain()
+        if batch:
+            chunks = []
+            for when, message, color in batch:
+                chunks += [f"[{when.strftime('%H:%M:%S')}] {message}\n", f"color_{color}"]
+            self.widget.configure(state='normal')
+            # Insert above the loading animation line, if one is showing
+            self.widget.insert("end-1c linestart", *chunks)
+            excess = int(self.widget.index("end-1c").split('.')[0]) - 1 - self.max_lines
+            if excess > 0:
+                self.widget.delete("1.0", f"{excess + 1}.0")
+            self.widget.see(tk.END)  # Auto-scroll to the end
+            self.widget.configure(state='disabled')
+            self.write_file(batch)
+        self.widget.after(self.FLUSH_INTERVAL, self.flush)
+
+    def write_file(self, batch):
+        """Mirror messages to the rotating log file; the UI log keeps working if this fails"""
+        try:
+            if self.file_logger is None:
+                self.file_logger = self.open_file_logger()
+            for when, message, color in batch:
+                self.file_logger.info(json.dumps({'time': when.isoformat(timespec='milliseconds'),
+                                                  'level': core.COLOR_LEVELS.get(color, 'info'),
+                                                  'message': message}, ensure_ascii=False))
+        except Exception:
+            pass
 
+    def open_file_logger(self):
+        logger = logging.getLogger("p4vhelper.actions")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        handler = logging_handlers.RotatingFileHandler(self.log_path, maxBytes=self.max_bytes,
+                                                       backupCount=self.backup_count, encoding='utf-8')
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        return logger
+
+    def close(self):
+        """Write whatever is still queued to the log file on exit"""
+        self.write_file(self.drain())
+
+
+log_sink = LogSink()
+
+
+def add_to_log(message, color="black"):
+    """Add message to log with timestamp and color (safe from any thread)"""
+    log_sink.write(message, color)
+    
+
+# File list that only draws the rows in view
+
+class VirtualFileList:
+    """Scrollable list of reconciled files that only draws the visible rows.
+
+    Rows are kept in a compact store (an array of action codes next to a
+    list of paths) and the rows passing the filter in an array of indexes,
+    so a 60k-file preview opens and filters as fast as a small one.
+    """
+    ACTIONS = ('add', 'edit', 'delete')
+    COLORS = {'add': "#4CAF50", 'edit': "#E0A030", 'delete': "#E05050"}
+    ACTION_WIDTH = 8  # Characters before the path
+
+    def __init__(self, parent, dark=False):
+        self.codes = array('B')
+        self.paths = []
+        self.view = array('I')  # Indexes of the rows that pass the filter
+        self.action_filter = None
+        self.text_filter = ""
+        self.top = 0  # First visible row of the view
+        self.x_offset = 0
+        self.widest = 0  # Longest path, in characters
+
+        self.font = tkfont.nametofont("TkFixedFont")
+        self.row_height = self.font.metrics('linespace') + 2
+        self.char_width = self.font.measure("0")
+        self.foreground = "white" if dark else "black"
+
+        self.frame = ttk.Frame(parent)
+        self.canvas = tk.Canvas(self.frame, height=240, highlightthickness=0,
+                                bg="#1E1E1E" if dark else "white")
+        self.scrollbar_y = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar_x = ttk.Scrollbar(self.frame, orient=tk.HORIZONTAL, command=self.xview)
+        self.scrollbar_y.pack(side=tk.RIGHT, fill=tk.Y)
+        self.scrollbar_x.pack(side=tk.BOTTOM, fill=tk.X)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.canvas.bind("<Configure>", lambda event: self.redraw())
+        self.canvas.bind("<MouseWheel>", lambda event: self.yview('scroll', -event.delta // 40, 'units'))
+        self.canvas.bind("<Button-4>", lambda event: self.yview('scroll', -3, 'units'))
+        self.canvas.bind("<Button-5>", lambda event: self.yview('scroll', 3, 'units'))
+
+    def __len__(self):
+        return len(self.paths)
+
+    def visible_rows(self):
+        return max(self.canvas.winfo_height() // self.row_height, 1)
+
+    def content_width(self):
+        return (self.widest + self.ACTION_WIDTH) * self.char_width + 8
+
+    def matches(self, index):
+        return ((self.action_filter is None or self.codes[index] == self.action_filter)
+                and self.text_filter in self.paths[index].lower())
+
+    def append(self, records):
+        """Add ReconcileRecords to the end of the list"""
+        start = len(self.paths)
+        for record in records:
+            path = record.depot_file or record.client_file
+            self.codes.append(self.ACTIONS.index(record.action))
+            self.paths.append(path)
+            self.widest = max(self.widest, len(path))
+        self.view.extend(index for index in range(start, len(self.paths)) if self.matches(index))
+        self.redraw()
+
+    def set_filter(self, action=None, text=""):
+        """Show only rows with this action (None for all) whose path contains text"""
+        self.action_filter = None if action is None else self.ACTIONS.index(action)
+        self.text_filter = text.lower()
+        self.view = array('I', (index for index in range(len(self.paths)) if self.matches(index)))
+        self.top = 0
+        self.redraw()
+
+    def yview(self, *args):
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * len(self.view))
+        elif args[0] == 'scroll':
+            self.top += int(args[1]) * (self.visible_rows() if args[2] == 'pages' else 1)
+        self.redraw()
+
+    def xview(self, *args):
+        if args[0] == 'moveto':
+            self.x_offset = int(float(args[1]) * self.content_width())
+        elif args[0] == 'scroll':
+            self.x_offset += int(args[1]) * (self.canvas.winfo_width() if args[2] == 'pages' else self.char_width * 4)
+        self.redraw()
+
+    def redraw(self):
+        rows = self.visible_rows()
+        self.top = max(0, min(self.top, len(self.view) - rows))
+        width = self.content_width()
+        view_width = max(self.canvas.winfo_width(), 1)
+        self.x_offset = max(0, min(self.x_offset, width - view_width))
+
+        self.canvas.delete('row')
+        path_x = 4 + self.ACTION_WIDTH * self.char_width - self.x_offset
+        for row, index in enumerate(self.view[self.top:self.top + rows + 1]):
+            y = row * self.row_height + 2
+            action = self.ACTIONS[self.codes[index]]
+            self.canvas.create_text(4 - self.x_offset, y, anchor=tk.NW, font=self.font, tags='row',
+                                    text=action.upper(), fill=self.COLORS[action])
+            self.canvas.create_text(path_x, y, anchor=tk.NW, font=self.font, tags='row',
+                                    text=self.paths[index], fill=self.foreground)
+
+        total = max(len(self.view), 1)
+        self.scrollbar_y.set(self.top / total, min((self.top + rows) / total, 1))
+        self.scrollbar_x.set(self.x_offset / width, min((self.x_offset + view_width) / width, 1))
 
-def get_depot_info(depot_path):
-    """Get information about files to be synced using p4 files"""
-    try:
-        command = ['p4', 'files', f'{depot_path}...']
-        
-        # Create startupinfo to hide windows
-        startupinfo = None
-        if sys.platform == "win32":
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = subprocess.SW_HIDE
-        
-        result = subprocess.run(command, 
-                              capture_output=True, 
-                              text=True, 
-                              check=True,
-                              startupinfo=startupinfo)
-        
-        # Count the number of files by counting non-empty lines
-        files = [line for line in result.stdout.split('\n') if line.strip()]
-        total_files = len(files)
-        
-        if total_files > 0:
-            add_to_log(f"Found {total_files} files to sync", "white")
-            return total_files, None  # We don't need size for now
-        else:
-            add_to_log("No files found in depot path", "red")
-            return None, None
-            
-    except subprocess.CalledProcessError as e:
-        if "no such file" in str(e.stderr).lower():
-            add_to_log("❌ Path not found in depot", "red")
-        else:
-            add_to_log(f"❌ Error getting depot info: {str(e.stderr)}", "red")
-        return None, None
-    except Exception as e:
-        add_to_log(f"❌ Error: {str(e)}", "red")
-        return None, None
 
 # Get revision code
 
-def perform_p4_sync(depot_path):
-    """Perform simple p4 sync with progress tracking and UI features"""
+def perform_p4_sync(depot_path, force=False):
+    """Perform p4 sync with progress tracking and UI features.
+
+    Syncs only out-of-date files. With force (Repair Sync) the local files
+    are verified against the server first and only missing or mismatched
+    ones are transferred.
+    """
     progress_window = None
     try:
-        # Disable the Get Revision button during sync
-        for widget in p4_actions_frame.winfo_children():
-            if widget.cget('text') == "Get Revision":
+        # Disable the sync buttons during sync
+        for widget in p4_actions_frame.winfo_children() + p4_additional_actions_frame.winfo_children():
+            if widget.cget('text') in ("Get Revision", "Repair Sync"):
                 widget.config(state='disabled')
 
         # Create progress window (start with indeterminate for file counting)
-        progress_window = ProgressWindow(root, "Sync Progress", determinate=False)
-        progress_window.update_status("Counting files...")
-        progress_window.progress_bar.start(10)  # Start the indeterminate animation
+        progress_window = ProgressWindow.open("Sync Progress", determinate=False)
+        progress_window.update_status("Verifying local files..." if force else "Checking for out-of-date files...")
 
         # Get file count for progress tracking
-        total_files, _ = get_depot_info(depot_path)
+        total_files, total_bytes = core.plan_sync(depot_path, force, add_to_log,
+                                                  lambda percentage, status: progress_window.update_status(status))
 
         # If no files are found, stop and close the progress window
         if total_files is None:
             progress_window.update_status("No files found in depot path.")
             time.sleep(1)  # Allow time for the user to see the message
-            if progress_window and progress_window.window.winfo_exists():
-                progress_window.close()
             return
 
-        # Close the indeterminate progress window and create a determinate one
-        if progress_window and progress_window.window.winfo_exists():
-            progress_window.close()
-
-        # Create new determinate progress window
-        progress_window = ProgressWindow(root, "Sync Progress", determinate=True)
-        add_to_log(f"Starting sync of {total_files} files", "white")
-        progress_window.update_progress(0, f"Preparing to sync {total_files} files...")
-
-        # Sync command with #head
-        command = ['p4', 'sync', '-f', f'{depot_path}...#head']
-        add_to_log(f"Executing command: {' '.join(command)}", "white")
+        # Close the indeterminate progress window
+        progress_window.close()
 
-        process = subprocess.Popen(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            universal_newlines=True,
-            startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW)
-        )
-
-        files_processed = 0
-        all_output = []
-
-        while True:
-            line = process.stdout.readline()
-            if not line and process.poll() is not None:
-                break
-            if line:
-                all_output.append(line.strip())
-                files_processed += 1
-                percentage = min((files_processed / max(total_files, 1)) * 100, 100)
-                progress_window.update_progress(percentage, f"Syncing: {line.strip()}")
-
-        # Process remaining errors
-        error_output = process.stderr.read().strip()
-        if error_output:
-            add_to_log(f"⚠️ Sync encountered errors:\n{error_output}", "red")
-
-        # Ensure we show 100% at completion
-        if process.returncode == 0:
-            progress_window.update_progress(100, "Sync completed")
-            local_path = os.path.join(workspace_var.get(), depot_path.split('//depot/')[-1])
-            actual_files = sum([len(files) for _, _, files in os.walk(local_path)])
-            add_to_log(f"✅ Sync completed - {actual_files} files in workspace", "green")
-            
+        if total_files == 0:
+            # Workspace already up to date, just open the folder
+            result = {'ok': True, 'local_path': os.path.join(workspace_var.get(), depot_path.split('//depot/')[-1])}
+        else:
+            # Create new determinate progress window
+            progress_window = ProgressWindow.open("Sync Progress", determinate=True)
+            add_to_log(f"Starting {'repair ' if force else ''}sync of {total_files} files "
+                       f"({core.format_megabytes(total_bytes)})", "white")
+            progress_window.update_progress(0, f"Preparing to sync {total_files} files...")
+
+            result = core.sync_depot_path(depot_path, total_files, workspace_var.get(),
+                                          add_to_log, progress_window.update_progress,
+                                          total_bytes=total_bytes)
+
+        if result['ok']:
+            local_path = result['local_path']
             try:
                 if os.path.exists(local_path):
                     os.startfile(local_path)
@@ -1261,28 +1315,31 @@ def perform_p4_sync(depot_path):
                     add_to_log(f"⚠️ Folder not found: {local_path}", "red")
             except Exception as e:
                 add_to_log(f"❌ Error opening folder: {str(e)}", "red")
-        else:
-            progress_window.update_progress(100, "Sync failed")
-            add_to_log("❌ Sync failed with errors", "red")
+            if os.path.exists(local_path):
+                update_workspace_cache(workspace_var.get(), local_path)
 
     except Exception as e:
         add_to_log(f"❌ Error executing P4 sync: {str(e)}", "red")
     finally:
         # Ensure progress window is closed
-        if progress_window and progress_window.window.winfo_exists():
+        if progress_window:
             progress_window.close()
 
-        # Re-enable the Get Revision button
-        for widget in p4_actions_frame.winfo_children():
-            if widget.cget('text') == "Get Revision":
+        # Re-enable the sync buttons
+        for widget in p4_actions_frame.winfo_children() + p4_additional_actions_frame.winfo_children():
+            if widget.cget('text') in ("Get Revision", "Repair Sync"):
                 widget.config(state='normal')
 
         add_to_log("════════════════════════", "white")
 
 
 
-def get_revision():
-    """Get latest revision for specific content"""
+def get_revision(force=False):
+    """Get latest revision for specific content.
+
+    force (Repair Sync) also checks the files already in the workspace and
+    re-transfers the ones that are missing or don't match the server.
+    """
     # Get and validate all required fields
     workspace = workspace_var.get().strip()
     ue_version = ue_version_var.get().strip()
@@ -1295,21 +1352,18 @@ def get_revision():
         return
 
     # Validate UE version format
-    if not re.match(r'^\d+\.\d+$', ue_version):
+    if not core.is_valid_ue_version(ue_version):
         add_to_log("Error: UE Version must be in the format 'X.Y' (e.g., 4.27 or 5.3).", "red")
         return
 
-    # Determine UE content type based on version
-    ue_content = "UE5-UserContent" if float(ue_version) >= 5.0 else "UE4-UserContent"
-    
     # Construct depot path
-    depot_path = f"//depot/{ue_content}/{ue_version}/{distribution_method}/{app_name}"
+    depot_path = core.depot_app_path(ue_version, distribution_method, app_name)
     
-    add_to_log("Starting sync operation...", "white")
+    add_to_log("Starting repair sync (verifying local files)..." if force else "Starting sync operation...", "white")
     add_to_log(f"Syncing from depot path: {depot_path}", "white")
     
     # Create and start a thread for the sync operation
-    sync_thread = threading.Thread(target=perform_p4_sync, args=(depot_path,))
+    sync_thread = threading.Thread(target=perform_p4_sync, args=(depot_path, force))
     sync_thread.daemon = True  # Thread will close when main program closes
     sync_thread.start()
     
@@ -1325,69 +1379,33 @@ def perform_reconcile_submit(local_path):
             if widget.cget('text') == "Reconcile & Submit":
                 widget.config(state='disabled')
         
-        # Check for files to reconcile
-        command = ['p4', 'reconcile', '-f', '-m', f'{local_path}...']
-        add_to_log(f"Checking for files to reconcile in: {local_path}", "white")
-        
-        result = subprocess.run(command, 
-                              capture_output=True, 
-                              text=True, 
-                              check=False,
-                              startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
-        
-        # If no files to reconcile
-        if not result.stdout.strip():
-            add_to_log(f"⚠️ No files to reconcile in {local_path}", "yellow")
-            
-            # Create custom messagebox
-            no_files_window = tk.Toplevel(root)
-            no_files_window.title("No Files to Reconcile")
-            no_files_window.geometry("400x150")
-            no_files_window.transient(root)
-            no_files_window.grab_set()
-            
-            # Center the window relative to main window
-            no_files_window.geometry(f"+{root.winfo_x() + 100}+{root.winfo_y() + 100}")
-            
-            # Add message
-            message_label = tk.Label(no_files_window, 
-                                   text=f"No files to reconcile in:\n{local_path}", 
-                                   wraplength=350,
-                                   justify='center')
-            message_label.pack(pady=20)
-            
-            # Add OK button
-            ok_button = tk.Button(no_files_window, 
-                                text="OK", 
-                                command=no_files_window.destroy,
-                                width=10)
-            ok_button.pack(pady=10)
-            
-            # Apply theme to match main window
-            if dark_mode:
-                no_files_window.configure(bg="#2E2E2E")
-                message_label.configure(bg="#2E2E2E", fg="white")
-                ok_button.configure(bg="#444444", fg="white")
-            
+        # Reconcile straight into a new changelist, described with the
+        # default reason until another one is picked
+        sf_case = sf_case_var.get().strip()
+        default_reason = "New Submission"
+        changelist_number = core.create_changelist(core.reconcile_description(default_reason, sf_case),
+                                                   add_to_log)
+        if changelist_number is None:
             return
-            
-        # Parse reconcile output to categorize changes
-        changes = {
-            'add': [],
-            'edit': [],
-            'delete': []
-        }
-        
-        for line in result.stdout.splitlines():
-            line_lower = line.lower()
-            if 'add' in line_lower:
-                changes['add'].append(line.strip())
-            elif 'edit' in line_lower:
-                changes['edit'].append(line.strip())
-            elif 'delete' in line_lower:
-                changes['delete'].append(line.strip())
-        
-        # If files found, show reconcile reason dialog with file preview
+
+        # Reconcile in the background so the preview fills in, and the reason
+        # can be picked, while the scan is still running
+        arrived = deque()
+        scan = {'changes': None}
+        scan_done = threading.Event()
+
+        def scan_files():
+            try:
+                scan['changes'] = core.reconcile_files(local_path, add_to_log, changelist=changelist_number,
+                                                       on_record=arrived.append)
+            except Exception as e:
+                add_to_log(f"❌ Error: {str(e)}", "red")
+            finally:
+                scan_done.set()
+
+        threading.Thread(target=scan_files, daemon=True).start()
+
+        # Show reconcile reason dialog with a file preview that fills as files are found
         reason_window = tk.Toplevel(root)
         reason_window.title("Reconcile Preview & Reason")
         reason_window.geometry("600x500")
@@ -1397,32 +1415,63 @@ def perform_reconcile_submit(local_path):
         # Create frame for file preview
         preview_frame = ttk.LabelFrame(reason_window, text="Files to be Reconciled")
         preview_frame.pack(pady=10, padx=10, fill=tk.BOTH, expand=True)
-        
-        # Create text widget with scrollbar for file preview
-        preview_text = tk.Text(preview_frame, height=15, width=70, wrap=tk.NONE)
-        scrollbar_y = ttk.Scrollbar(preview_frame, orient=tk.VERTICAL, command=preview_text.yview)
-        scrollbar_x = ttk.Scrollbar(preview_frame, orient=tk.HORIZONTAL, command=preview_text.xview)
-        preview_text.configure(yscrollcommand=scrollbar_y.set, xscrollcommand=scrollbar_x.set)
-        
-        # Pack scrollbars and text widget
-        scrollbar_y.pack(side=tk.RIGHT, fill=tk.Y)
-        scrollbar_x.pack(side=tk.BOTTOM, fill=tk.X)
-        preview_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        # Insert categorized changes into preview
-        for change_type, files in changes.items():
-            if files:
-                preview_text.insert(tk.END, f"\n{change_type.upper()} ({len(files)} files):\n")
-                for file in files:
-                    preview_text.insert(tk.END, f"{file}\n")
-        
-        preview_text.configure(state='disabled')  # Make text read-only
+
+        # Running counts per action while the scan goes on
+        counts_label = ttk.Label(preview_frame, text="Scanning for changes...")
+        counts_label.pack(side=tk.TOP, anchor=tk.W, padx=5, pady=(0, 5))
+
+        # Filter by action and path
+        filter_frame = ttk.Frame(preview_frame)
+        filter_frame.pack(side=tk.TOP, fill=tk.X, padx=5, pady=(0, 5))
+        action_filter_var = tk.StringVar(value="All")
+        path_filter_var = tk.StringVar()
+        filter_label = ttk.Label(filter_frame, text="Show:")
+        filter_label.pack(side=tk.LEFT)
+        ttk.Combobox(filter_frame, textvariable=action_filter_var, state='readonly', width=8,
+                     values=["All", *VirtualFileList.ACTIONS]).pack(side=tk.LEFT, padx=5)
+        path_label = ttk.Label(filter_frame, text="Path contains:")
+        path_label.pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Entry(filter_frame, textvariable=path_filter_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+
+        # Only the rows in view are drawn, so huge previews open at once
+        file_list = VirtualFileList(preview_frame, dark=dark_mode)
+        file_list.frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+
+        def apply_filter(*args):
+            action = action_filter_var.get()
+            file_list.set_filter(None if action == "All" else action, path_filter_var.get())
+
+        action_filter_var.trace_add('write', apply_filter)
+        path_filter_var.trace_add('write', apply_filter)
+
+        counts = {'add': 0, 'edit': 0, 'delete': 0}
+
+        def show_arrivals(frame):
+            """Move the files found since the last frame into the preview"""
+            batch = []
+            while arrived:
+                batch.append(arrived.popleft())
+            if batch:
+                for record in batch:
+                    counts[record.action] += 1
+                file_list.append(batch)
+            summary = ", ".join(f"{count} {action}" for action, count in counts.items())
+            if arrived or not scan_done.is_set():
+                counts_label.configure(text=f"Scanning for changes... {summary}")
+                return True
+            if scan['changes'] is None or not any(counts.values()):
+                reason_window.destroy()  # Nothing to submit, the worker reports why
+                return False
+            counts_label.configure(text=f"Scan complete: {summary}")
+            return False
+
+        animation_clock.add(show_arrivals, every=4, widget=file_list.canvas)
         
         # Create frame for reason selection
         reason_frame = ttk.LabelFrame(reason_window, text="Select Reconcile Reason")
         reason_frame.pack(pady=10, padx=10, fill=tk.X)
         
-        selected_reason = tk.StringVar(value="New Submission")
+        selected_reason = tk.StringVar(value=default_reason)
         
         def set_reason_and_close():
             reason_window.result = selected_reason.get()
@@ -1442,9 +1491,12 @@ def perform_reconcile_submit(local_path):
         # Apply theme
         if dark_mode:
             reason_window.configure(bg="#2E2E2E")
-            preview_text.configure(bg="#1E1E1E", fg="white")
             reason_frame.configure(style='Dark.TLabelframe')
             preview_frame.configure(style='Dark.TLabelframe')
+            filter_frame.configure(style='Dark.TFrame')
+            file_list.frame.configure(style='Dark.TFrame')
+            for label in (counts_label, filter_label, path_label):
+                label.configure(style='Dark.TLabel')
             
             for widget in reason_frame.winfo_children():
                 if isinstance(widget, tk.Radiobutton):
@@ -1457,143 +1509,91 @@ def perform_reconcile_submit(local_path):
         
         # Wait for user input
         reason_window.wait_window()
-        if not hasattr(reason_window, 'result'):
-            add_to_log("❌ Reconcile cancelled by user", "red")
+        if not hasattr(reason_window, 'result') and not scan_done.is_set():
+            add_to_log(f"❌ Reconcile cancelled by user, files found stay open in changelist {changelist_number}", "red")
             return
-            
-        reconcile_reason = reason_window.result
-        sf_case = sf_case_var.get().strip()
-        
-        # Create changelist description
-        description = f"{reconcile_reason} {sf_case} Reconciled offline work"
-        
-        # Create new changelist
-        create_cl_cmd = ['p4', 'change', '-o']
-        cl_process = subprocess.run(create_cl_cmd,
-                                  capture_output=True,
-                                  text=True,
-                                  check=True,
-                                  startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
-        
-        cl_spec = cl_process.stdout
-        
-        # Find and replace the Description section
-        spec_lines = cl_spec.splitlines()
-        new_spec_lines = []
-        in_description = False
-        description_added = False
-        
-        for line in spec_lines:
-            if line.startswith('Description:'):
-                in_description = True
-                new_spec_lines.append(line)
-                new_spec_lines.append(f'\t{description}')
-                description_added = True
-            elif in_description and (line.strip() == "<enter description here>" or line.startswith('\t')):
-                continue
-            elif line.startswith('Files:') or line.startswith('Status:'):
-                in_description = False
-                new_spec_lines.append(line)
-            else:
-                new_spec_lines.append(line)
-                
-        modified_spec = '\n'.join(new_spec_lines)
-        
-        # Create the changelist with the new specification
-        create_cl_process = subprocess.run(['p4', 'change', '-i'],
-                                         input=modified_spec,
-                                         capture_output=True,
-                                         text=True,
-                                         startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
-        
-        if create_cl_process.returncode != 0:
-            add_to_log(f"❌ Error creating changelist: {create_cl_process.stderr}", "red")
+
+        # Reason picked before the scan finished
+        if not scan_done.is_set():
+            progress_window = ProgressWindow.open("Reconcile Progress", determinate=False)
+            progress_window.update_status("Finishing reconcile...")
+            scan_done.wait()
+            progress_window.close()
+            progress_window = None
+
+        changes = scan['changes']
+        if changes is None:
+            core.discard_changelist(changelist_number, add_to_log)
             return
+        update_workspace_cache(workspace_var.get(), local_path)
+        
+        # If no files to reconcile
+        if not any(changes.values()):
+            core.delete_changelist(changelist_number)
+            add_to_log(f"⚠️ No files to reconcile in {local_path}", "yellow")
             
-        try:
-            changelist_number = create_cl_process.stdout.split()[1]
-            add_to_log(f"✓ Created changelist {changelist_number}", "green")
-        except (IndexError, AttributeError):
-            add_to_log("❌ Error: Could not create new changelist", "red")
-            add_to_log(f"Output was: {create_cl_process.stdout}", "red")
+            # Create custom messagebox
+            no_files_window = tk.Toplevel(root)
+            no_files_window.title("No Files to Reconcile")
+            no_files_window.geometry("400x150")
+            no_files_window.transient(root)
+            no_files_window.grab_set()
+            
+            # Center the window relative to main window
+            no_files_window.geometry(f"+{root.winfo_x() + 100}+{root.winfo_y() + 100}")
+            
+            # Add message
+            message_label = tk.Label(no_files_window, 
+                                   text=f"No files to reconcile in:\n{local_path}", 
+                                   wraplength=350,
+                                   justify='center')
+            message_label.pack(pady=20)
+            
+            # Add OK button
+            ok_button = tk.Button(no_files_window, 
+                                text="OK", 
+                                command=no_files_window.destroy,
+                                width=10)
+            ok_button.pack(pady=10)
+            
+            # Apply theme to match main window
+            if dark_mode:
+                no_files_window.configure(bg="#2E2E2E")
+                message_label.configure(bg="#2E2E2E", fg="white")
+                ok_button.configure(bg="#444444", fg="white")
+            
+            return
+
+        if not hasattr(reason_window, 'result'):
+            add_to_log(f"❌ Reconcile cancelled by user, files stay open in changelist {changelist_number}", "red")
             return
+            
+        reconcile_reason = reason_window.result
+        if reconcile_reason != default_reason:
+            description = core.reconcile_description(reconcile_reason, sf_case)
+            if not core.set_changelist_description(changelist_number, description, add_to_log):
+                return
 
         # Get total number of files to be processed
         total_files = len(changes['add']) + len(changes['edit']) + len(changes['delete'])
         
         # Create progress window for submit
-        progress_window = ProgressWindow(root, "Submit Progress", determinate=True)
+        progress_window = ProgressWindow.open("Submit Progress", determinate=True)
         progress_window.update_progress(0, f"Preparing to submit {total_files} files...")
         
         # Submit changelist
-        submit_cmd = ['p4', 'submit', '-c', changelist_number]
-        process = subprocess.Popen(submit_cmd,
-                                 stdout=subprocess.PIPE,
-                                 stderr=subprocess.PIPE,
-                                 text=True,
-                                 bufsize=1,
-                                 universal_newlines=True,
-                                 startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
-        
-        # Initialize counters
-        processed_files = []
-        start_time = time.time()
-        
-        # Process output in real-time
-        while True:
-            line = process.stdout.readline()
-            if not line and process.poll() is not None:
-                break
-            if line:
-                processed_files.append(line.strip())
-                # Calculate progress
-                progress = (len(processed_files) / total_files * 100)
-                
-                # Format time elapsed
-                elapsed_time = time.time() - start_time
-                elapsed_minutes = int(elapsed_time // 60)
-                elapsed_seconds = int(elapsed_time % 60)
-                
-                # Update progress window
-                status_text = (
-                    f"Processing file {len(processed_files)} of {total_files}\n"
-                    f"Current file: {line.strip()}\n"
-                    f"Time elapsed: {elapsed_minutes}m {elapsed_seconds}s"
-                )
-                progress_window.update_progress(progress, status_text)
-        
-        # Process remaining errors
-        error_output = process.stderr.read().strip()
-        if error_output:
-            add_to_log(f"⚠️ Submit encountered errors:\n{error_output}", "red")
-            return
-            
-        if process.returncode == 0:
-            progress_window.update_progress(100, "Submit completed successfully")
-            add_to_log(f"✅ Successfully submitted changelist {changelist_number}", "green")
-            add_to_log(f"Total files processed: {len(processed_files)}", "white")
-            elapsed_time = time.time() - start_time
-            add_to_log(f"Total time: {elapsed_time / 60:.1f} minutes", "white")
-            
+        result = core.submit_changelist(changelist_number, total_files,
+                                        add_to_log, progress_window.update_progress,
+                                        sizes=core.upload_sizes(changes))
+        if result['ok']:
             # Log summary of changes
-            summary_parts = []
-            if changes['add']:
-                summary_parts.append(f"{len(changes['add'])} added")
-            if changes['edit']:
-                summary_parts.append(f"{len(changes['edit'])} edited")
-            if changes['delete']:
-                summary_parts.append(f"{len(changes['delete'])} deleted")
-                
-            if summary_parts:
-                summary = f"Summary: {', '.join(summary_parts)}"
-                add_to_log(summary, "white")
-        else:
-            add_to_log("❌ Submit failed", "red")
+            core.log_change_summary(changes, add_to_log, result)
+            core.reconcile_index.record_folder(local_path, add_to_log)
             
     except Exception as e:
         add_to_log(f"❌ Error: {str(e)}", "red")
     finally:
-        if progress_window and progress_window.window.winfo_exists():
+        if progress_window:
             progress_window.close()
             
         # Re-enable the button
@@ -1619,7 +1619,7 @@ def reconcile_submit():
         add_to_log("❌ Error: All fields must be filled (Workspace, UE Version, Distribution Method, App Name).", "red")
         return
         
-    if not re.match(r'^\d+\.\d+$', ue_version):
+    if not core.is_valid_ue_version(ue_version):
         add_to_log("❌ Error: UE Version must be in the format 'X.Y' (e.g., 4.27 or 5.3).", "red")
         return
         
@@ -1627,11 +1627,8 @@ def reconcile_submit():
         add_to_log("❌ Error: SF Case number is required for reconcile and submit.", "red")
         return
     
-    # Determine UE content type based on version
-    ue_content = "UE5-UserContent" if float(ue_version) >= 5.0 else "UE4-UserContent"
-    
     # Construct local path
-    local_path = os.path.join(workspace, ue_content, ue_version, distribution_method, app_name)
+    local_path = core.local_app_path(workspace, ue_version, distribution_method, app_name)
     
     if not os.path.exists(local_path):
         add_to_log(f"❌ Error: Local path does not exist: {local_path}", "red")
@@ -1655,35 +1652,28 @@ def perform_depot_search():
             if widget.cget('text') == "Find in Depot":
                 widget.config(state='disabled')
         
-        command = ['p4', 'dirs', '-C', f'//depot/*/*/*/*{app_name}']
+        command = core.depot_search_command(app_name)
         add_to_log(f"Executing command: {' '.join(command)}", "white")
         
         # Start loading animation after showing command
         start_loading_animation("Searching in depot")
         
-        result = subprocess.run(command, 
-                              capture_output=True, 
-                              text=True, 
-                              check=False,
-                              encoding='utf-8',
-                              startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
+        locations, search_error = core.find_depot_folders(app_name)
         
         # Stop loading animation before showing results
         stop_loading_animation()
-        time.sleep(0.2)  # Small delay to ensure animation thread completes
         
         # Process results
-        if result.stdout:
-            locations = [loc for loc in result.stdout.strip().split('\n') if loc]
+        if locations:
             add_to_log(f"✅ Found {len(locations)} location(s):", "green")
             for loc in locations:
                 add_to_log(f"📁 {loc}", "white")
         else:
             add_to_log("❌ No matching folders found in depot", "red")
             
-        if result.stderr:
+        if search_error:
             add_to_log(f"⚠️ Error occurred during search:", "red")
-            add_to_log(result.stderr.strip(), "red")
+            add_to_log(search_error.strip(), "red")
                 
     except Exception as e:
         stop_loading_animation()
@@ -1719,117 +1709,21 @@ def perform_rename_move(source_path, new_name, new_location, progress_window):
     try:
         # Construct the new path
         new_path = os.path.join(new_location, new_name)
-        if new_path == source_path:
-            add_to_log("❌ Error: New path is same as current path", "red")
-            return
 
         # Create changelist description
         sf_case = sf_case_var.get().strip()
         description = f"{sf_case} Rename/move file(s)"
 
-        # 1. Create new changelist (20% progress)
-        progress_window.update_progress(0, "Creating changelist...")
-        create_cl_cmd = ['p4', 'change', '-o']
-        cl_process = subprocess.run(create_cl_cmd,
-                                  capture_output=True,
-                                  text=True,
-                                  check=True,
-                                  startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
-
-        # Modify changelist spec
-        cl_spec = cl_process.stdout
-        spec_lines = cl_spec.splitlines()
-        new_spec_lines = []
-        in_description = False
-
-        for line in spec_lines:
-            if line.startswith('Description:'):
-                in_description = True
-                new_spec_lines.append(line)
-                new_spec_lines.append(f'\t{description}')
-            elif in_description and (line.strip() == "<enter description here>" or line.startswith('\t')):
-                continue
-            else:
-                new_spec_lines.append(line)
-                
-        modified_spec = '\n'.join(new_spec_lines)
+        core.rename_move(source_path, new_path, description,
+                         add_to_log, progress_window.update_progress)
 
-        # Create the changelist
-        create_cl_process = subprocess.run(['p4', 'change', '-i'],
-                                         input=modified_spec,
-                                         capture_output=True,
-                                         text=True,
-                                         startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
-
-        if create_cl_process.returncode != 0:
-            add_to_log(f"❌ Error creating changelist: {create_cl_process.stderr}", "red")
-            return
-
-        # Get changelist number
-        changelist_number = create_cl_process.stdout.split()[1]
-        add_to_log(f"✓ Created changelist {changelist_number}", "green")
-        progress_window.update_progress(20, "Changelist created successfully")
-
-        # 2. Open files for edit (40% progress)
-        progress_window.update_progress(20, "Opening files for edit...")
-        edit_cmd = ['p4', 'edit', f"{source_path}/..."]
-        edit_result = subprocess.run(edit_cmd, 
-                                   capture_output=True, 
-                                   text=True,
-                                   startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
-        
-        if edit_result.returncode != 0:
-            add_to_log(f"❌ Error opening files for edit: {edit_result.stderr}", "red")
-            return
-
-        progress_window.update_progress(40, "Files opened for edit")
-
-        # 3. Perform move operation (70% progress)
-        progress_window.update_progress(40, "Performing move operation...")
-        move_cmd = ['p4', 'move', '-c', changelist_number, 
-                   f"{source_path}/...", f"{new_path}/..."]
-        
-        move_result = subprocess.run(move_cmd, 
-                                   capture_output=True, 
-                                   text=True,
-                                   startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
-        
-        if move_result.returncode != 0:
-            add_to_log(f"❌ Error during move: {move_result.stderr}", "red")
-            return
-
-        progress_window.update_progress(70, "Move operation completed")
-
-        # 4. Submit the changelist (100% progress)
-        progress_window.update_progress(70, "Submitting changes...")
-        submit_cmd = ['p4', 'submit', '-c', changelist_number]
-        submit_result = subprocess.run(submit_cmd, 
-                                     capture_output=True, 
-                                     text=True,
-                                     startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
-
-        if submit_result.returncode == 0:
-            # Count moved files
-            moved_files = [line for line in move_result.stdout.splitlines() if line.strip()]
-            file_count = len(moved_files)
-            
-            progress_window.update_progress(100, "Operation completed successfully")
-            
-            # Log success with summary
-            add_to_log(f"✅ Move operation completed successfully", "green")
-            add_to_log(f"From: {source_path}", "white")
-            add_to_log(f"To: {new_path}", "white")
-            add_to_log(f"Total files moved: {file_count}", "white")
-        else:
-            add_to_log(f"❌ Error submitting changes: {submit_result.stderr}", "red")
-
-    except subprocess.CalledProcessError as e:
-        add_to_log(f"❌ Error executing P4 command: {e.stderr}", "red")
+    except p4python.P4Exception as e:
+        add_to_log(f"❌ Error executing P4 command: {format_p4_error(e)}", "red")
     except Exception as e:
         add_to_log(f"❌ Error: {str(e)}", "red")
     finally:
         # Ensure progress window is closed
-        if progress_window and progress_window.window.winfo_exists():
+        if progress_window:
             progress_window.close()
 
 def show_rename_move_dialog(selected_path):
@@ -1850,15 +1744,12 @@ def show_rename_move_dialog(selected_path):
         add_to_log("❌ Error: All fields must be filled (Workspace, UE Version, Distribution Method, App Name, SF Case).", "red")
         return
         
-    if not re.match(r'^\d+\.\d+$', ue_version):
+    if not core.is_valid_ue_version(ue_version):
         add_to_log("❌ Error: UE Version must be in the format 'X.Y' (e.g., 4.27 or 5.3).", "red")
         return
     
-    # Determine UE content type based on version
-    ue_content = "UE5-UserContent" if float(ue_version) >= 5.0 else "UE4-UserContent"
-    
     # Construct source path using workspace
-    source_path = os.path.join(workspace, ue_content, ue_version, distribution_method, app_name)
+    source_path = core.local_app_path(workspace, ue_version, distribution_method, app_name)
     
     if not os.path.exists(source_path):
         add_to_log(f"❌ Error: Path does not exist: {source_path}", "red")
@@ -1944,6 +1835,116 @@ def show_rename_move_dialog(selected_path):
         name_label.configure(style='Dark.TLabel')
         location_label.configure(style='Dark.TLabel')
 
+def show_sync_settings_dialog():
+    """Show dialog for the Get Revision transfer settings"""
+    settings = core.load_sync_settings()
+
+    dialog = tk.Toplevel(root)
+    dialog.title("Sync Settings")
+    dialog.geometry("380x540")
+    dialog.transient(root)
+    dialog.grab_set()
+
+    # Center the window relative to main window
+    dialog.geometry(f"+{root.winfo_x() + 100}+{root.winfo_y() + 100}")
+
+    input_frame = ttk.LabelFrame(dialog, text="Parallel Transfer")
+    input_frame.pack(pady=10, padx=10, fill=tk.X)
+
+    submit_frame = ttk.LabelFrame(dialog, text="Parallel Submit")
+    submit_frame.pack(pady=(0, 10), padx=10, fill=tk.X)
+
+    clear_frame = ttk.LabelFrame(dialog, text="Clear Workspace")
+    clear_frame.pack(pady=(0, 10), padx=10, fill=tk.X)
+
+    cache_frame = ttk.LabelFrame(dialog, text="Local Storage")
+    cache_frame.pack(pady=(0, 10), padx=10, fill=tk.X)
+
+    button_frame = ttk.Frame(dialog)
+    button_frame.pack(pady=10, fill=tk.X)
+
+    # Trash is instant; the server removes files one by one but knows exactly what it removed
+    server_clear_var = tk.BooleanVar(value=settings['clear_mode'] == 'server')
+    ttk.Checkbutton(clear_frame, text="Remove files through the server (p4 sync #none)",
+                    variable=server_clear_var).pack(anchor=tk.W, padx=5, pady=2)
+
+    # Least recently used apps are evicted once the app folders outgrow the budget
+    budget_label = ttk.Label(cache_frame, text="Disk budget (GB, 0 = no limit):")
+    budget_label.grid(row=0, column=0, sticky=tk.W, padx=5, pady=2)
+
+    # Binary files already synced under another version folder are copied locally, not downloaded
+    content_store_var = tk.BooleanVar(value=settings['content_store'])
+    ttk.Checkbutton(cache_frame, text="Copy identical files from other versions instead of downloading",
+                    variable=content_store_var).grid(row=1, column=0, columnspan=2, sticky=tk.W, padx=5, pady=2)
+
+    parallel_var = tk.BooleanVar(value=settings['parallel'])
+    parallel_check = ttk.Checkbutton(input_frame, text="Sync files in parallel", variable=parallel_var)
+    parallel_check.grid(row=0, column=0, columnspan=2, sticky=tk.W, padx=5, pady=2)
+
+    # Needs net.parallel.max on the server, like parallel sync
+    submit_parallel_var = tk.BooleanVar(value=settings['submit_parallel'])
+    ttk.Checkbutton(submit_frame, text="Upload files in parallel",
+                    variable=submit_parallel_var).grid(row=0, column=0, columnspan=2, sticky=tk.W, padx=5, pady=2)
+
+    # Threads, files per batch and kilobytes per batch
+    fields = [(input_frame, "threads", "Threads:"), (input_frame, "batch", "Files per batch:"),
+              (input_frame, "batchsize", "Batch size (KB):"),
+              (submit_frame, "submit_threads", "Threads:"), (submit_frame, "submit_batch", "Files per batch:")]
+    entries = {}
+    labels = []
+    validate_numeric = dialog.register(validate_numeric_input)
+    validate_decimal = dialog.register(validate_decimal_input)
+    rows = {}
+    for frame, key, text in fields:
+        row = rows[frame] = rows.get(frame, 0) + 1
+        label = ttk.Label(frame, text=text)
+        label.grid(row=row, column=0, sticky=tk.W, padx=5, pady=2)
+        labels.append(label)
+        entry = ttk.Entry(frame, width=10, validate="key", validatecommand=(validate_numeric, '%P'))
+        entry.insert(0, str(settings[key]))
+        entry.grid(row=row, column=1, sticky=tk.W, padx=5, pady=2)
+        entries[key] = entry
+
+    budget_entry = ttk.Entry(cache_frame, width=10, validate="key", validatecommand=(validate_decimal, '%P'))
+    budget_entry.insert(0, f"{settings['cache_budget_gb']:g}")
+    budget_entry.grid(row=0, column=1, sticky=tk.W, padx=5, pady=2)
+
+    def on_save():
+        values = {'parallel': parallel_var.get(),
+                  'clear_mode': 'server' if server_clear_var.get() else 'trash',
+                  'content_store': content_store_var.get(),
+                  'submit_parallel': submit_parallel_var.get()}
+        for key, entry in entries.items():
+            value = entry.get().strip()
+            if not value or int(value) < 1:
+                messagebox.showerror("Error", "Threads and batch values must be at least 1")
+                return
+            values[key] = int(value)
+        budget = budget_entry.get().strip()
+        if budget == ".":
+            messagebox.showerror("Error", "Disk budget must be a number of GB")
+            return
+        values['cache_budget_gb'] = float(budget or 0)
+        try:
+            core.save_sync_settings(**values)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not save sync settings: {str(e)}")
+            return
+        mode = f"parallel, {values['threads']} threads" if values['parallel'] else "serial"
+        add_to_log(f"Sync settings saved ({mode})", "green")
+        dialog.destroy()
+
+    ttk.Button(button_frame, text="Save", command=on_save).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Cancel", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+
+    # Apply dark mode if enabled
+    if dark_mode:
+        dialog.configure(bg="#2E2E2E")
+        for frame in [input_frame, submit_frame, clear_frame, cache_frame, button_frame]:
+            frame.configure(style='Dark.TFrame')
+        for label in labels + [budget_label]:
+            label.configure(style='Dark.TLabel')
+
 # Add this to your main UI creation code for the new button row
 def create_rename_move_button():
     rename_move_frame = ttk.Frame(root)
@@ -2023,17 +2024,16 @@ def create_folder():
     # Save the workspace path and dark mode preference for future sessions
     save_workspace(workspace)
 
-    # Determine UE content variable
-    ue5orue4 = "UE5-UserContent" if float(ue_version) >= 5.0 else "UE4-UserContent"
-
     # Create folder structure
-    folder_path = os.path.join(workspace, ue5orue4, ue_version, distribution_method, app_name)
+    folder_path = core.local_app_path(workspace, ue_version, distribution_method, app_name)
     try:
         os.makedirs(folder_path, exist_ok=True)
         os.startfile(folder_path)  # Open folder in Windows Explorer
         add_to_log(f"✅ Folder created and opened: {folder_path}", "green")
     except Exception as e:
         add_to_log(f"❌ Error: {str(e)}", "red")
+        return
+    threading.Thread(target=update_workspace_cache, args=(workspace, folder_path), daemon=True).start()
 
 
 
@@ -2049,10 +2049,19 @@ def browse_workspace():
     if folder_selected:
         workspace_var.set(folder_selected)
         save_workspace(folder_selected)  # Save the selected workspace and dark mode preference
+        p4_cache.invalidate()  # A different workspace may map to a different client
 
 def perform_clear_workspace():
-    """Actual workspace clearing operation running in separate thread"""
+    """Actual workspace clearing operation running in separate thread.
+
+    By default the app folders are moved to the trash at once and purged in
+    the background; with the 'server' clear mode the server removes them.
+    Either way the have list is updated so Get Revision stays incremental.
+    Files deleted here show a progress window with a Cancel button.
+    """
     workspace = workspace_var.get()
+    progress_window = None
+    deleter = None
     
     try:
         # Disable the Clear Workspace button during operation
@@ -2060,60 +2069,80 @@ def perform_clear_workspace():
             if widget.cget('text') == "Clear Workspace":
                 widget.config(state='disabled')
 
-        # Define paths for UE4 and UE5 UserContent
-        source1 = os.path.join(workspace, "UE4-UserContent")
-        source2 = os.path.join(workspace, "UE5-UserContent")
-
         add_to_log("Starting workspace cleanup...", "white")
-        start_loading_animation("Clearing workspace")
-
-        def clear_second_level_directories(path):
-            if os.path.exists(path):
-                for first_level_dir in os.listdir(path):
-                    first_level_path = os.path.join(path, first_level_dir)
-                    if os.path.isdir(first_level_path):
-                        for second_level_dir in os.listdir(first_level_path):
-                            second_level_path = os.path.join(first_level_path, second_level_dir)
-                            if os.path.isdir(second_level_path):
-                                for root, dirs, files in os.walk(second_level_path, topdown=False):
-                                    for name in files:
-                                        file_path = os.path.join(root, name)
-                                        try:
-                                            os.chmod(file_path, 0o777)
-                                            os.remove(file_path)
-                                        except Exception as e:
-                                            add_to_log(f"❌ Error deleting file {file_path}: {str(e)}", "red")
-                                    for name in dirs:
-                                        dir_path = os.path.join(root, name)
-                                        try:
-                                            shutil.rmtree(dir_path)
-                                        except Exception as e:
-                                            add_to_log(f"❌ Error deleting directory {dir_path}: {str(e)}", "red")
-
-        # Clear contents in both directories
-        clear_second_level_directories(source1)
-        clear_second_level_directories(source2)
 
-        # Stop loading animation before showing results
-        stop_loading_animation()
-        time.sleep(0.2)  # Small delay to ensure animation thread completes
-
-        add_to_log(f"✅ Workspace cleared successfully", "green")
+        def cancel():
+            if deleter:
+                deleter.cancel()
+
+        def deleter_ready(new_deleter):
+            nonlocal deleter, progress_window
+            deleter = new_deleter
+            if deleter.roots:
+                progress_window = ProgressWindow.open("Clearing Workspace", determinate=False, on_cancel=cancel)
+                progress_window.update_status("Deleting files...")
+
+        def show_progress(files, size):
+            if progress_window:
+                progress_window.update_status(f"Deleted {files} files ({core.format_megabytes(size)})")
+
+        # Clear contents in both UE4 and UE5 UserContent
+        clear_mode = core.load_sync_settings()['clear_mode']
+        result = core.clear_workspace(workspace, clear_mode, add_to_log, show_progress, deleter_ready)
+        if result['moved']:
+            add_to_log(f"🗑 Moved {result['moved']} folders to trash, purging in the background", "white")
+            purge_trash_in_background(workspace)
+
+        summary = (f"{result['files']} files deleted, "
+                   f"{core.format_megabytes(result['bytes'])}, {result['elapsed']:.1f}s")
+        if result['cancelled']:
+            add_to_log(f"⚠️ Workspace cleanup cancelled ({summary})", "yellow")
+        elif result['failures']:
+            add_to_log(f"⚠️ Workspace cleared with {result['failures']} errors ({summary})", "yellow")
+        else:
+            add_to_log(f"✅ Workspace cleared successfully in {result['elapsed']:.2f}s", "green")
+        if result['skipped']:
+            add_to_log(f"⚠️ {result['skipped']} app folders with opened files were kept", "yellow")
 
     except Exception as e:
-        stop_loading_animation()
         add_to_log(f"❌ Error clearing workspace: {str(e)}", "red")
     finally:
+        if progress_window:
+            progress_window.close()
+
         # Re-enable the Clear Workspace button
         for widget in button_frame.winfo_children():
             if widget.cget('text') == "Clear Workspace":
                 widget.config(state='normal')
         add_to_log("════════════════════════", "white")
 
+def purge_trash_in_background(workspace):
+    """Delete the workspace trash on a low-priority thread, logging the result"""
+    def on_done(summary):
+        if summary['files']:
+            add_to_log(f"🗑 Trash purged: {summary['files']} files, "
+                       f"{core.format_megabytes(summary['bytes'])} in {summary['elapsed']:.1f}s", "white")
+        if summary['failures']:
+            add_to_log(f"⚠️ {summary['failures']} items left in trash, retrying on next launch", "yellow")
+
+    if workspace:
+        core.purge_trash_in_background(workspace, add_to_log, on_done)
+
+def update_workspace_cache(workspace, app_folder):
+    """Mark app_folder as just used and evict old apps past the disk budget.
+
+    Measures folders on disk, so call it from a worker thread.
+    """
+    try:
+        core.workspace_cache.touch(app_folder)
+        budget = core.cache_budget_bytes(core.load_sync_settings())
+        if core.workspace_cache.enforce_budget(workspace, budget, add_to_log, keep=[app_folder]):
+            purge_trash_in_background(workspace)
+    except Exception as e:
+        add_to_log(f"⚠️ Could not update the workspace cache: {str(e)}", "yellow")
+
 def clear_workspace():
-    """Clear workspace with loading animation in separate thread"""
-    global loading_thread, stop_loading
-    
+    """Clear workspace in a separate thread"""
     workspace = workspace_var.get()
     if not workspace:
         add_to_log("❌ Error: No P4 workspace selected.", "red")
@@ -2129,14 +2158,6 @@ def clear_workspace():
     if not response:
         return
     
-    # Reset loading flag
-    stop_loading = False
-    
-    # Start loading animation in separate thread
-    loading_thread = threading.Thread(target=loading_animation)
-    loading_thread.daemon = True
-    loading_thread.start()
-    
     # Start workspace clearing in separate thread
     clear_thread = threading.Thread(target=perform_clear_workspace)
     clear_thread.daemon = True
@@ -2294,45 +2315,6 @@ def apply_theme():
 
 
 
-#Starting the application / checking P4 connection splash screen
-def create_loading_screen(parent):
-    """Create loading message widgets in the main window"""
-    loading_frame = tk.Frame(parent, bg="#2E2E2E")
-    loading_frame.place(relx=0.5, rely=0.5, anchor="center")
-    
-    loading_text = tk.Label(
-        loading_frame,
-        text="Please wait, verifying P4 connection...",
-        font=("Arial", 10),
-        bg="#2E2E2E",
-        fg="white"
-    )
-    loading_text.pack(pady=10)
-    
-    spinner_label = tk.Label(
-        loading_frame,
-        text="⣾",
-        font=("Arial", 12),
-        bg="#2E2E2E",
-        fg="white"
-    )
-    spinner_label.pack()
-    
-    return loading_frame, spinner_label
-
-def animate_spinner(spinner_label, index=0):
-    """Animate the spinner"""
-    spinner_chars = ["⣾", "⣽", "⣻", "⢿", "⡿", "⣟", "⣯", "⣷"]
-    spinner_label.config(text=spinner_chars[index])
-    next_index = (index + 1) % len(spinner_chars)
-    return next_index
-
-
-
-
-
-
-
 def set_window_icon():
     """Set up the window icon for both window and taskbar"""
     if getattr(sys, 'frozen', False):
@@ -2350,7 +2332,7 @@ def set_window_icon():
                 ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(app_id)
                 
                 # Get the window handle
-                hwnd = windll.user32.GetParent(root.winfo_id())
+                hwnd = ctypes.windll.user32.GetParent(root.winfo_id())
                 
                 # Load the icon for different sizes
                 hinst = win32api.GetModuleHandle(None)
@@ -2420,7 +2402,9 @@ def set_window_icon():
   
 if __name__ == "__main__":
     try:
+        startup_started_at = time.perf_counter()
         root = tk.Tk()
+        animation_clock.attach(root)
         root.title("P4Vhelper Pro v0.5.0")
         root.geometry("500x800")
         root.resizable(True, True)
@@ -2532,6 +2516,22 @@ if __name__ == "__main__":
                 fg="white",
                 width=15).grid(row=0, column=0, padx=5)
 
+        # Add Repair Sync button (verify local files, re-fetch missing or damaged ones)
+        tk.Button(p4_additional_actions_frame,
+                text="Repair Sync",
+                command=lambda: get_revision(force=True),
+                bg="#4B0082",
+                fg="white",
+                width=15).grid(row=0, column=1, padx=5)
+
+        # Add Sync Settings button
+        tk.Button(p4_additional_actions_frame,
+                text="Sync Settings",
+                command=show_sync_settings_dialog,
+                bg="#4B0082",
+                fg="white",
+                width=15).grid(row=0, column=2, padx=5)
+
         #Second tab Change History
 
         def create_changes_tab(notebook):
@@ -2608,45 +2608,27 @@ if __name__ == "__main__":
                 
                 try:
                     # Get changelist details using p4 describe
-                    result = subprocess.run(['p4', 'describe', str(changelist)],
-                                        capture_output=True,
-                                        text=True,
-                                        check=True,
-                                        startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
+                    details = "\n".join(p4_pool.run('describe', str(changelist), tagged=False))
                     
                     # Clear loading message
                     text_widget.delete('1.0', tk.END)
                     
-                    if result.returncode == 0:
-                        details = result.stdout
-                        text_widget.insert(tk.END, details)
-                        text_widget.configure(state='disabled')
-                        
-                        if dark_mode:
-                            details_window.configure(bg="#2E2E2E")
-                            text_widget.configure(bg="#1E1E1E", fg="white")
-                    else:
-                        text_widget.insert(tk.END, f"Error getting changelist details: {result.stderr}")
+                    text_widget.insert(tk.END, details)
+                    text_widget.configure(state='disabled')
+                    
+                    if dark_mode:
+                        details_window.configure(bg="#2E2E2E")
+                        text_widget.configure(bg="#1E1E1E", fg="white")
                         
-                except subprocess.CalledProcessError as e:
+                except p4python.P4Exception as e:
                     text_widget.delete('1.0', tk.END)
-                    text_widget.insert(tk.END, f"Error: {str(e)}")
+                    text_widget.insert(tk.END, f"Error getting changelist details: {format_p4_error(e)}")
             
             def get_p4_username():
                 """Get the current P4 username with enhanced error handling"""
                 try:
-                    result = subprocess.run(['p4', 'info'],
-                                        capture_output=True,
-                                        text=True,
-                                        check=True,
-                                        startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW))
-                    
-                    if result.returncode == 0:
-                        # Parse the output looking for "User name: "
-                        for line in result.stdout.splitlines():
-                            if line.startswith('User name:'):
-                                return line.split('User name:')[1].strip()
-                except subprocess.CalledProcessError as e:
+                    return fetch_p4_info().user or None
+                except p4python.P4Exception as e:
                     # Create error window
                     error_window = tk.Toplevel(root)
                     error_window.title("P4 Connection Error")
@@ -2664,7 +2646,7 @@ if __name__ == "__main__":
                     # Error message
                     error_msg = ttk.Label(message_frame, 
                                         text="Unable to connect to P4 server.\n\n"
-                                            f"Error: {e.stderr.strip()}\n\n"
+                                            f"Error: {format_p4_error(e).strip()}\n\n"
                                             "Hint: Check that your VPN is on.",
                                         wraplength=350,
                                         justify='center')
@@ -2706,78 +2688,22 @@ if __name__ == "__main__":
                     if not p4_username:
                         raise Exception("Could not determine P4 username")
                     
-                    # Create startupinfo to hide windows
-                    startupinfo = None
-                    if sys.platform == "win32":
-                        startupinfo = subprocess.STARTUPINFO()
-                        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                        startupinfo.wShowWindow = subprocess.SW_HIDE
-
-                    # Define the command
-                    cmd = ['p4', 'changes', '-s', 'submitted', '-l', '-m', '100', '-u', p4_username, '//depot/...']
-                    add_to_log(f"Executing command: {' '.join(cmd)}", "white")
-                    
-                    result = subprocess.run(cmd,
-                                        capture_output=True,
-                                        text=True,
-                                        check=True,
-                                        startupinfo=startupinfo)
+                    changes = core.recent_changes(p4_username, 100, add_to_log)
                         
                     tree.delete(loading_item)
                     
-                    if result.returncode == 0 and result.stdout.strip():
-                        lines = result.stdout.splitlines()
-                        changes = []  # Store changes temporarily
-                        i = 0
-                        
-                        while i < len(lines):
-                            current_line = lines[i].strip()
-                            
-                            if current_line.startswith('Change '):
-                                try:
-                                    parts = current_line.split()
-                                    
-                                    if len(parts) >= 6:
-                                        changelist = parts[1]
-                                        date = parts[3]
-                                        user = parts[5].split('@')[0]
-                                        
-                                        # Get description from next non-empty line
-                                        description = ""
-                                        next_line_index = i + 1
-                                        while next_line_index < len(lines):
-                                            next_line = lines[next_line_index].strip()
-                                            if next_line and not next_line.startswith('Change '):
-                                                description = next_line
-                                                break
-                                            next_line_index += 1
-                                        
-                                        # Add to our temporary list instead of inserting directly
-                                        changes.append((changelist, date, user, description))
-                                        i = next_line_index + 1
-                                    else:
-                                        i += 1
-                                except Exception as parse_error:
-                                    add_to_log(f"Error parsing change entry: {str(parse_error)}", "red")
-                                    i += 1
-                            else:
-                                i += 1
-                        
-                        # Sort changes by changelist number (newest first)
-                        changes.sort(key=lambda x: int(x[0]), reverse=True)
-                        
-                        # Insert all changes into the tree
-                        for change in changes:
-                            tree.insert('', 'end', values=change)
-                        
-                        if not tree.get_children():
-                            tree.insert('', 'end', values=('No changes found', '', '', ''))
+                    # Insert all changes into the tree
+                    for change in changes:
+                        tree.insert('', 'end', values=tuple(change))
+                    
+                    if not tree.get_children():
+                        tree.insert('', 'end', values=('No changes found', '', '', ''))
                             
-                except subprocess.CalledProcessError as e:
+                except p4python.P4Exception as e:
                     tree.delete(loading_item)
                     error_msg = f"Error loading changes: {str(e)}"
-                    add_to_log(f"CalledProcessError: {str(e)}", "red")
-                    add_to_log(f"Error output: {e.stderr}", "red")
+                    add_to_log(f"P4Exception: {str(e)}", "red")
+                    add_to_log(f"Error output: {format_p4_error(e)}", "red")
                     tree.insert('', 'end', values=('Error', '', '', error_msg))
                 except Exception as e:
                     tree.delete(loading_item)
@@ -2848,6 +2774,7 @@ if __name__ == "__main__":
         output_text.tag_config('color_blue', foreground='blue')
         output_text.tag_config('color_white', foreground='white')
         output_text.tag_config('color_yellow', foreground='yellow')
+        log_sink.attach(output_text)
 
         # Add right-click menu for copying
         def copy_selected_text():
@@ -2880,24 +2807,24 @@ if __name__ == "__main__":
         credits_label = tk.Label(root, text=credits_text, font=("Arial", 8), fg="gray", wraplength=350, justify="center")
         credits_label.grid(row=13, column=0, columnspan=3, pady=10)
         
-        # Check for P4 installation before proceeding
-        if not check_p4_installed():
-            root.withdraw()  # Hide main window
-            show_p4_installation_dialog()
-        else:
-            # Load saved workspace
-            load_workspace()
-            
-            # Initialize with threaded P4 check
-            initialize_with_details()
-            
-            # Set the window icon
-            set_window_icon()
-            
-            # Bind window close event
-            root.protocol("WM_DELETE_WINDOW", lambda: [save_window_position(), root.destroy()])
+        # Load saved workspace
+        load_workspace()
+        
+        # Set the window icon (also shows the window)
+        set_window_icon()
+        
+        # Bind window close event
+        root.protocol("WM_DELETE_WINDOW", lambda: [save_window_position(), root.destroy()])
+        
+        # Check P4 installation, connection and workspace concurrently in the background
+        initialize_with_details()
+
+        # Finish purging a trash that the last session did not get through
+        purge_trash_in_background(workspace_var.get())
             
         # Run the main loop (still inside the if __name__ == "__main__": block)
         root.mainloop()
     finally:
+        log_sink.close()
+        p4_pool.close_all()
         cleanup_temp_files()
\ No newline at end of file
@@ -0,0 +1,281 @@
+"""Command-line entry point for the P4Vhelper workflows.
+
+Runs the same engine as P4Vhelper Pro without the Tkinter window and
+writes every event to stdout as one JSON object per line:
+
+    {"event": "log", "level": "info", "message": "Found 120 files to sync"}
+    {"event": "progress", "percent": 42.5, "status": "Syncing: ..."}
+    {"event": "result", "command": "sync", "ok": true, ...}
+
+Examples:
+    python p4vhelper_cli.py sync --ue-version 5.3 --distribution AssetPacks --app MyPack
+    python p4vhelper_cli.py reconcile-submit --ue-version 5.3 --app MyPack --sf-case 123456
+    python p4vhelper_cli.py history --max 20
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import p4vhelper_core as core
+
+
+DISTRIBUTION_METHODS = ["AssetPacks", "CompleteProjects", "Plugins"]
+RECONCILE_REASONS = ["New Submission", "Update", "Add"]
+
+
+def emit(event, **fields):
+    """Write one JSON line to stdout"""
+    sys.stdout.write(json.dumps({'event': event, **fields}, default=str) + "\n")
+    sys.stdout.flush()
+
+
+def log(message, color="white"):
+    emit('log', level=core.COLOR_LEVELS.get(color, 'info'), message=message)
+
+
+def progress(percentage, status_text=None):
+    emit('progress', percent=round(percentage, 1), status=status_text)
+
+
+def resolve_workspace(args):
+    """Workspace from --workspace, or the client root of the current P4 workspace"""
+    return args.workspace or core.fetch_p4_info().client_root
+
+
+def require_app_fields(args):
+    """Raise ValueError unless --ue-version, --distribution and --app are usable"""
+    if not core.is_valid_ue_version(args.ue_version):
+        raise ValueError("UE Version must be in the format 'X.Y' (e.g., 4.27 or 5.3).")
+    if not args.app:
+        raise ValueError("App Name is required.")
+
+
+def purge_now(workspace):
+    """Purge the workspace trash before returning; returns the purge summary.
+
+    A CLI run can't leave a purge running behind it, unlike the GUI.
+    """
+    return core.purge_trash(workspace, log, low_priority=False)
+
+
+def update_workspace_cache(workspace, app_folder):
+    """Mark app_folder as just used and evict old apps past the disk budget"""
+    core.workspace_cache.touch(app_folder)
+    budget = core.cache_budget_bytes(core.load_sync_settings())
+    evicted = core.workspace_cache.enforce_budget(workspace, budget, log, keep=[app_folder])
+    if evicted:
+        purge_now(workspace)
+    return evicted
+
+
+def cmd_sync(args):
+    require_app_fields(args)
+    depot_path = core.depot_app_path(args.ue_version, args.distribution, args.app)
+    log(f"Syncing from depot path: {depot_path}")
+
+    total_files, total_bytes = core.plan_sync(depot_path, args.repair, log, progress)
+    if total_files is None:
+        emit('result', command='sync', ok=False, depot_path=depot_path, files=0)
+        return 1
+
+    workspace = resolve_workspace(args)
+    local_path = core.local_app_path(workspace, args.ue_version, args.distribution, args.app)
+    if total_files == 0:
+        evicted = update_workspace_cache(workspace, local_path) if os.path.exists(local_path) else []
+        emit('result', command='sync', ok=True, depot_path=depot_path, files=0, evicted=evicted)
+        return 0
+
+    settings = core.load_sync_settings()
+    if args.threads is not None:
+        settings.update(parallel=args.threads > 1, threads=max(args.threads, 1))
+    result = core.sync_depot_path(depot_path, total_files, workspace, log, progress,
+                                  settings=settings, total_bytes=total_bytes)
+    result['evicted'] = update_workspace_cache(workspace, local_path) if result['ok'] else []
+    emit('result', command='sync', depot_path=depot_path, **result)
+    return 0 if result['ok'] else 1
+
+
+def cmd_reconcile_submit(args):
+    require_app_fields(args)
+    if not args.sf_case:
+        raise ValueError("SF Case number is required for reconcile and submit.")
+
+    workspace = resolve_workspace(args)
+    local_path = core.local_app_path(workspace, args.ue_version, args.distribution, args.app)
+    if not os.path.exists(local_path):
+        raise ValueError(f"Local path does not exist: {local_path}")
+
+    # Reconcile straight into a new changelist
+    description = core.reconcile_description(args.reason, args.sf_case)
+    changelist_number = core.create_changelist(description, log)
+    if changelist_number is None:
+        emit('result', command='reconcile-submit', ok=False, local_path=local_path)
+        return 1
+
+    changes = core.reconcile_files(local_path, log, changelist=changelist_number)
+    if changes is None:
+        core.discard_changelist(changelist_number, log)
+        emit('result', command='reconcile-submit', ok=False, local_path=local_path)
+        return 1
+    update_workspace_cache(workspace, local_path)
+
+    counts = {action: len(records) for action, records in changes.items()}
+    for action, records in changes.items():
+        for record in records:
+            emit('file', action=action, depot_file=record.depot_file, client_file=record.client_file)
+
+    total_files = sum(counts.values())
+    if not total_files:
+        core.delete_changelist(changelist_number)
+        log(f"⚠️ No files to reconcile in {local_path}", "yellow")
+        emit('result', command='reconcile-submit', ok=True, local_path=local_path, **counts)
+        return 0
+
+    settings = core.load_sync_settings()
+    if args.threads is not None:
+        settings.update(submit_parallel=args.threads > 1, submit_threads=max(args.threads, 1))
+    result = core.submit_changelist(changelist_number, total_files, log, progress,
+                                    settings=settings, sizes=core.upload_sizes(changes))
+    if result['ok']:
+        core.log_change_summary(changes, log, result)
+        core.reconcile_index.record_folder(local_path, log)
+    emit('result', command='reconcile-submit', changelist=changelist_number,
+         local_path=local_path, **counts, **result)
+    return 0 if result['ok'] else 1
+
+
+def cmd_find(args):
+    command = core.depot_search_command(args.app)
+    log(f"Executing command: {' '.join(command)}")
+    locations, search_error = core.find_depot_folders(args.app)
+    if search_error:
+        log(search_error.strip(), "red")
+    emit('result', command='find', ok=search_error is None, locations=locations)
+    return 0 if search_error is None else 1
+
+
+def cmd_move(args):
+    require_app_fields(args)
+    if not args.sf_case:
+        raise ValueError("SF Case number is required for rename/move.")
+
+    source_path = core.local_app_path(resolve_workspace(args), args.ue_version, args.distribution, args.app)
+    if not os.path.exists(source_path):
+        raise ValueError(f"Path does not exist: {source_path}")
+
+    new_location = args.new_location or os.path.dirname(source_path)
+    new_path = os.path.join(new_location, args.new_name or os.path.basename(source_path))
+    description = f"{args.sf_case} Rename/move file(s)"
+
+    file_count = core.rename_move(source_path, new_path, description, log, progress)
+    emit('result', command='move', ok=file_count is not None,
+         source_path=source_path, new_path=new_path, files=file_count or 0)
+    return 0 if file_count is not None else 1
+
+
+def cmd_clear(args):
+    if not args.yes:
+        raise ValueError("Clearing the workspace deletes local files; pass --yes to confirm.")
+    workspace = resolve_workspace(args)
+    log("Starting workspace cleanup...")
+    def clear_progress(files, size):
+        emit('progress', files=files, bytes=size)
+
+    mode = args.mode or core.load_sync_settings()['clear_mode']
+    if mode == 'in-place':
+        result = core.clear_user_content(workspace, log, clear_progress)
+    else:
+        result = core.clear_workspace(workspace, mode, log, clear_progress)
+        purged = purge_now(workspace)
+        result['purged_files'] = purged['files']
+        result['failures'] += purged['failures']
+    emit('result', command='clear', ok=result['failures'] == 0, workspace=workspace, **result)
+    return 0 if result['failures'] == 0 else 1
+
+
+def cmd_history(args):
+    p4_username = args.user or core.fetch_p4_info().user
+    if not p4_username:
+        raise ValueError("Could not determine P4 username")
+    changes = core.recent_changes(p4_username, args.max, log)
+    for change in changes:
+        emit('change', **change._asdict())
+    emit('result', command='history', ok=True, user=p4_username, count=len(changes))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='p4vhelper',
+                                     description="Run P4Vhelper workflows without the GUI (JSON lines output).")
+    parser.add_argument('--workspace', help="Local workspace root (default: client root from p4 info)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_app_arguments(subparser):
+        subparser.add_argument('--ue-version', required=True, help="UE version, e.g. 4.27 or 5.3")
+        subparser.add_argument('--distribution', choices=DISTRIBUTION_METHODS, default="AssetPacks")
+        subparser.add_argument('--app', required=True, help="App name")
+
+    sync_parser = subparsers.add_parser('sync', help="Get Revision: sync an app folder to #head")
+    add_app_arguments(sync_parser)
+    sync_parser.add_argument('--repair', action='store_true',
+                             help="Verify local files against the server and re-transfer missing or "
+                                  "mismatched ones, not only out-of-date ones")
+    sync_parser.add_argument('--threads', type=int,
+                             help="Parallel transfer threads, 1 for a serial sync (default: sync settings)")
+    sync_parser.set_defaults(handler=cmd_sync)
+
+    reconcile_parser = subparsers.add_parser('reconcile-submit', help="Reconcile offline work and submit it")
+    add_app_arguments(reconcile_parser)
+    reconcile_parser.add_argument('--sf-case', required=True)
+    reconcile_parser.add_argument('--reason', choices=RECONCILE_REASONS, default="New Submission")
+    reconcile_parser.add_argument('--threads', type=int,
+                                  help="Parallel upload threads, 1 for a serial submit (default: sync settings)")
+    reconcile_parser.set_defaults(handler=cmd_reconcile_submit)
+
+    find_parser = subparsers.add_parser('find', help="Find app folders in the depot")
+    find_parser.add_argument('app', help="App name to search for")
+    find_parser.set_defaults(handler=cmd_find)
+
+    move_parser = subparsers.add_parser('move', help="Rename/move an app folder and submit")
+    add_app_arguments(move_parser)
+    move_parser.add_argument('--sf-case', required=True)
+    move_parser.add_argument('--new-name', help="New folder name (default: keep the name)")
+    move_parser.add_argument('--new-location', help="New parent folder (default: keep the location)")
+    move_parser.set_defaults(handler=cmd_move)
+
+    clear_parser = subparsers.add_parser('clear', help="Clear UE4/UE5-UserContent app folders")
+    clear_parser.add_argument('--yes', action='store_true', help="Confirm deleting local files")
+    clear_parser.add_argument('--mode', choices=core.CLEAR_MODES + ['in-place'],
+                              help="trash: move to trash and update the have list; server: p4 sync #none; "
+                                   "in-place: delete without telling the server (default: sync settings)")
+    clear_parser.set_defaults(handler=cmd_clear)
+
+    history_parser = subparsers.add_parser('history', help="List recently submitted changelists")
+    history_parser.add_argument('--user', help="P4 user (default: current user)")
+    history_parser.add_argument('--max', type=int, default=100)
+    history_parser.set_defaults(handler=cmd_history)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except ValueError as e:
+        log(f"❌ Error: {str(e)}", "red")
+        emit('result', command=args.command, ok=False, error=str(e))
+        return 2
+    except Exception as e:
+        error_text = core.format_p4_error(e)
+        log(f"❌ Error: {error_text}", "red")
+        emit('result', command=args.command, ok=False, error=error_text)
+        return 1
+    finally:
+        core.p4_pool.close_all()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2637 @@
+"""P4 engine behind P4Vhelper Pro.
+
+Connection pool, structured output, metadata cache and the Get Revision,
+Reconcile & Submit, Find in Depot, Rename/Move, Clear Workspace and Change
+History workflows, without any Tkinter. P4VhelperPro.py and
+p4vhelper_cli.py are both thin clients over this module, and P4Vhelper.py
+uses its workspace clearing.
+"""
+
+# System and standard library imports
+import os, sys, re, shutil, contextlib, importlib
+import time, subprocess, marshal, io, threading
+from collections import namedtuple, deque
+
+
+class LazyModule:
+    """Stand-in for a module that is only imported on first attribute access.
+
+    Keeps Windows-only and rarely used modules off the startup path. A module
+    that does not exist on this platform raises ImportError when something
+    actually uses it rather than when this script is loaded.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+# Only needed to read and write p4config.ini
+configparser = LazyModule('configparser')
+
+# Pulls in logging; only needed once background work starts
+futures = LazyModule('concurrent.futures')
+
+# Windows-only: hidden trash folder, low-priority purge threads
+ctypes = LazyModule('ctypes')
+
+# Only needed to read and write the workspace cache index
+json = LazyModule('json')
+
+# Only needed to verify files against server digests
+hashlib = LazyModule('hashlib')
+
+# Only needed for the local reconcile index
+sqlite3 = LazyModule('sqlite3')
+
+# Third-party imports
+p4python = LazyModule('P4')
+
+
+def check_p4_installed():
+    """Check if P4 command-line client is installed"""
+    try:
+        # First try PATH
+        result = subprocess.run(['p4', '-V'], 
+                              capture_output=True, 
+                              text=True,
+                              startupinfo=hidden_startupinfo())
+        return result.returncode == 0
+    except FileNotFoundError:
+        try:
+            # Try common installation paths
+            p4_paths = [
+                r"C:\Program Files\Perforce\p4.exe",
+                r"C:\Program Files (x86)\Perforce\p4.exe"
+            ]
+            for path in p4_paths:
+                if os.path.exists(path):
+                    # Add to PATH
+                    os.environ['PATH'] = os.path.dirname(path) + os.pathsep + os.environ['PATH']
+                    return True
+            return False
+        except:
+            return False
+
+
+# P4 settings saved by the login flow
+
+def init_p4():
+    """Initialize P4 connection and return P4 object"""
+    p4 = p4python.P4()
+    
+    # Try to get saved credentials from config
+    config = configparser.ConfigParser()
+    if os.path.exists('p4config.ini'):
+        config.read('p4config.ini')
+        if 'P4' in config:
+            p4.port = config['P4'].get('port', '')
+            p4.user = config['P4'].get('user', '')
+    
+    return p4
+
+
+def save_p4_config(port, user):
+    """Save P4 configuration to file"""
+    config = configparser.ConfigParser()
+    if os.path.exists('p4config.ini'):
+        config.read('p4config.ini')  # Keep the other sections ([Sync], ...)
+    config['P4'] = {
+        'port': port,
+        'user': user
+    }
+    with open('p4config.ini', 'w') as configfile:
+        config.write(configfile)
+    # Pooled connections and cached metadata still use the old settings
+    p4_pool.reset()
+    p4_cache.invalidate()
+
+
+# Get Revision transfer settings, saved in the [Sync] section of p4config.ini.
+# batchsize is in kilobytes, like the server's net.parallel.batchsize.
+# clear_mode is how Clear Workspace removes app folders: 'trash' (rename, then
+# purge in the background) or 'server' (p4 sync #none, then delete leftovers).
+# cache_budget_gb caps the size of the app folders; least recently used apps
+# are evicted past it (0 turns eviction off). content_store copies synced
+# binary files that are already in the local content store instead of
+# transferring them again. submit_parallel, submit_threads and submit_batch
+# are the same for the upload of Reconcile & Submit.
+SYNC_DEFAULTS = {'parallel': True, 'threads': 4, 'batch': 8, 'batchsize': 8192, 'clear_mode': 'trash',
+                 'cache_budget_gb': 0, 'content_store': False,
+                 'submit_parallel': False, 'submit_threads': 4, 'submit_batch': 8}
+CLEAR_MODES = ['trash', 'server']
+
+
+def load_sync_settings():
+    """Return the sync settings, with defaults for anything missing or invalid.
+
+    Also includes the last measured serial_rate / parallel_rate (MB/s) when
+    there is one, used to compare the two transfer modes in the log.
+    """
+    settings = dict(SYNC_DEFAULTS)
+    config = configparser.ConfigParser()
+    if os.path.exists('p4config.ini'):
+        config.read('p4config.ini')
+    if 'Sync' not in config:
+        return settings
+
+    section = config['Sync']
+    for key in ('parallel', 'content_store', 'submit_parallel'):
+        try:
+            settings[key] = section.getboolean(key, SYNC_DEFAULTS[key])
+        except ValueError:
+            pass
+    for key in ('threads', 'batch', 'batchsize', 'submit_threads', 'submit_batch'):
+        try:
+            settings[key] = max(1, section.getint(key, SYNC_DEFAULTS[key]))
+        except ValueError:
+            pass
+    if section.get('clear_mode') in CLEAR_MODES:
+        settings['clear_mode'] = section['clear_mode']
+    try:
+        settings['cache_budget_gb'] = max(0.0, section.getfloat('cache_budget_gb', SYNC_DEFAULTS['cache_budget_gb']))
+    except ValueError:
+        pass
+    for key in ('serial_rate', 'parallel_rate'):
+        try:
+            if key in section:
+                settings[key] = section.getfloat(key)
+        except ValueError:
+            pass
+    return settings
+
+
+def save_sync_settings(**values):
+    """Update keys of the [Sync] section of p4config.ini, keeping the rest of the file"""
+    config = configparser.ConfigParser()
+    if os.path.exists('p4config.ini'):
+        config.read('p4config.ini')
+    if 'Sync' not in config:
+        config['Sync'] = {}
+    for key, value in values.items():
+        config['Sync'][key] = str(value)
+    with open('p4config.ini', 'w') as configfile:
+        config.write(configfile)
+
+
+def parallel_sync_flag(settings):
+    """The --parallel option for `p4 sync` built from sync settings"""
+    return (f"--parallel=threads={settings['threads']},"
+            f"batch={settings['batch']},batchsize={settings['batchsize']}")
+
+
+def parallel_submit_flag(settings):
+    """The --parallel option for `p4 submit` built from sync settings"""
+    return f"--parallel=threads={settings['submit_threads']},batch={settings['submit_batch']}"
+
+
+# Persistent P4 connections shared by every P4 operation
+
+class P4ConnectionPool:
+    """Thread-safe pool of connected P4 instances.
+
+    Connections stay open between commands, so a metadata query costs one
+    server round trip instead of a p4 process launch plus a handshake.
+    A P4 instance is only ever used by one thread at a time.
+    """
+
+    def __init__(self, max_size=4, idle_timeout=300):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout  # Seconds before an idle connection is recycled
+        self._idle = []  # (p4, generation, last_used) ready to be handed out
+        self._in_use = {}  # id(p4) -> generation
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._generation = 0
+
+    def _connect(self):
+        p4 = init_p4()
+        p4.exception_level = 1  # Raise on errors only, warnings stay in p4.warnings
+        p4.connect()
+        return p4
+
+    @staticmethod
+    def _disconnect(p4):
+        try:
+            if p4.connected():
+                p4.disconnect()
+        except Exception:
+            pass
+
+    def _is_healthy(self, p4, generation, last_used):
+        return (generation == self._generation
+                and time.time() - last_used < self.idle_timeout
+                and p4.connected())
+
+    def acquire(self, timeout=None):
+        """Take a healthy connection from the pool, connecting a new one if needed"""
+        if not self._slots.acquire(timeout=timeout):
+            raise p4python.P4Exception("Timed out waiting for a free P4 connection")
+
+        p4 = None
+        stale = []
+        with self._lock:
+            generation = self._generation
+            while self._idle:
+                candidate, candidate_generation, last_used = self._idle.pop()
+                if self._is_healthy(candidate, candidate_generation, last_used):
+                    p4 = candidate
+                    break
+                stale.append(candidate)
+
+        for candidate in stale:
+            self._disconnect(candidate)
+
+        try:
+            if p4 is None:
+                p4 = self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_use[id(p4)] = generation
+        return p4
+
+    def release(self, p4, discard=False):
+        """Return a connection to the pool, dropping it if it is no longer usable"""
+        with self._lock:
+            generation = self._in_use.pop(id(p4), None)
+            keep = (not discard and generation == self._generation and p4.connected())
+            if keep:
+                self._idle.append((p4, generation, time.time()))
+        if not keep:
+            self._disconnect(p4)
+        self._slots.release()
+
+    @contextlib.contextmanager
+    def connection(self, timeout=None):
+        """Borrow a connection for the duration of a with-block"""
+        p4 = self.acquire(timeout)
+        try:
+            yield p4
+        finally:
+            self.release(p4)
+
+    def run(self, *args, retry=None, **options):
+        """Run a P4 command on a pooled connection.
+
+        Keyword options (handler, input, tagged, ...) are applied to the P4
+        instance for this command only. If the connection dropped mid-command
+        it is replaced and the command retried once, unless retry is False
+        (use that for commands that must not run twice, like submit).
+        Commands streaming into a handler are not retried by default: the
+        handler would see the records from before the drop a second time.
+        """
+        if retry is None:
+            retry = 'handler' not in options
+        for attempt in range(2):
+            with self.connection() as p4:
+                try:
+                    return p4.run(*args, **options)
+                except p4python.P4Exception:
+                    if not retry or attempt or p4.connected():
+                        raise
+            # Connection dropped (VPN hiccup, server restart): retry on a fresh one
+
+    def reset(self):
+        """Retire every connection, e.g. after login or a P4PORT/P4USER change"""
+        with self._lock:
+            self._generation += 1
+            idle, self._idle = self._idle, []
+        for p4, _, _ in idle:
+            self._disconnect(p4)
+
+    def close_all(self):
+        """Disconnect everything on application exit"""
+        self.reset()
+
+
+_stream_handler_class = None
+
+
+def P4StreamHandler(callback):
+    """Return a P4 output handler that hands each tagged record to callback as it arrives.
+
+    The handler class derives from P4.OutputHandler, so it is only defined
+    once P4Python has been imported.
+    """
+    global _stream_handler_class
+    if _stream_handler_class is None:
+        OutputHandler = p4python.OutputHandler
+
+        class StreamHandler(OutputHandler):
+            def __init__(self, callback):
+                OutputHandler.__init__(self)
+                self.callback = callback
+
+            def outputStat(self, stat):
+                self.callback(stat)
+                return OutputHandler.HANDLED
+
+        _stream_handler_class = StreamHandler
+    return _stream_handler_class(callback)
+
+
+def format_p4_error(error):
+    """Return the server's error text from a P4Exception"""
+    errors = getattr(error, 'errors', None)
+    if errors:
+        return "\n".join(errors)
+    return str(error)
+
+
+p4_pool = P4ConnectionPool()
+
+
+# Structured P4 output: tagged records instead of scraping text
+
+InfoRecord = namedtuple('InfoRecord', 'user client client_root server_address')
+ChangeRecord = namedtuple('ChangeRecord', 'change date user description')
+ReconcileRecord = namedtuple('ReconcileRecord', 'action depot_file client_file')
+
+
+def info_record(stat):
+    """Build an InfoRecord from a tagged `p4 info` record"""
+    return InfoRecord(stat.get('userName', ''),
+                      stat.get('clientName', ''),
+                      stat.get('clientRoot', ''),
+                      stat.get('serverAddress', ''))
+
+
+def change_record(stat):
+    """Build a ChangeRecord from a tagged `p4 changes -l` record"""
+    date = time.strftime('%Y/%m/%d', time.localtime(int(stat.get('time', 0))))
+    description = next((line.strip() for line in stat.get('desc', '').splitlines() if line.strip()), "")
+    return ChangeRecord(stat.get('change', ''), date, stat.get('user', ''), description)
+
+
+def reconcile_record(stat):
+    """Build a ReconcileRecord from a tagged `p4 reconcile` record.
+
+    move/add and move/delete are reported as plain add and delete.
+    """
+    action = stat.get('action', '').rsplit('/', 1)[-1]
+    return ReconcileRecord(action, stat.get('depotFile', ''), stat.get('clientFile', ''))
+
+
+def hidden_startupinfo():
+    """STARTUPINFO that keeps the p4 console window hidden on Windows"""
+    if sys.platform != "win32":
+        return None
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    startupinfo.wShowWindow = subprocess.SW_HIDE
+    return startupinfo
+
+
+def read_p4_marshal(stream):
+    """Yield the records of a `p4 -G` output stream one at a time"""
+    while True:
+        try:
+            record = marshal.load(stream)
+        except EOFError:
+            return
+        yield {
+            (key.decode('utf-8', 'replace') if isinstance(key, bytes) else key):
+            (value.decode('utf-8', 'replace') if isinstance(value, bytes) else value)
+            for key, value in record.items()
+        }
+
+
+def read_in_background(pipe):
+    """Read pipe to the end on a daemon thread, so a chatty stream can't fill up and block the process.
+
+    Returns a function that waits for the end of the stream and returns its bytes.
+    """
+    chunks = []
+    reader = threading.Thread(target=lambda: chunks.append(pipe.read()), daemon=True)
+    reader.start()
+
+    def result():
+        reader.join()
+        return b''.join(chunks)
+
+    return result
+
+
+def p4_connection_options():
+    """Global `-p`, `-u` and `-c` options for a p4 subprocess.
+
+    They come from init_p4(), so the subprocess talks to the same server,
+    as the same user and workspace, as the pooled connections rather than
+    to whatever the environment or registry says.
+    """
+    p4 = init_p4()
+    options = []
+    for flag, value in (('-p', p4.port), ('-u', p4.user), ('-c', p4.client)):
+        if value:
+            options += [flag, value]
+    return options
+
+
+def run_p4_marshal(args, timeout=None):
+    """Run `p4 -G <args>` in a separate process and return (records, errors).
+
+    Used where a hard timeout matters more than reusing a pooled connection,
+    e.g. probing whether the server is reachable at all.
+    """
+    result = subprocess.run(['p4', *p4_connection_options(), '-G', *args],
+                            capture_output=True,
+                            timeout=timeout,
+                            startupinfo=hidden_startupinfo())
+    records, errors = [], []
+    for record in read_p4_marshal(io.BytesIO(result.stdout)):
+        if record.get('code') == 'error':
+            errors.append(record.get('data', '').strip())
+        else:
+            records.append(record)
+    if result.returncode != 0 and not errors:
+        errors.append(result.stderr.decode('utf-8', 'replace').strip() or "Connection failed")
+    return records, errors
+
+
+# Short-lived cache for connection metadata (p4 info, p4 client -o, p4 login -s)
+
+class P4MetadataCache:
+    """TTL cache of P4 metadata keyed by the P4PORT/P4USER/P4CLIENT in use.
+
+    Only successful lookups are stored, so a failed connection check is
+    always retried. Call invalidate() after login or a workspace change.
+    """
+
+    def __init__(self, ttl=120):
+        self.ttl = ttl
+        self._entries = {}  # (port, user, client, name) -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _settings():
+        p4 = init_p4()
+        return (p4.port, p4.user, p4.client)
+
+    def get(self, name, loader, ttl=None, keep=None):
+        """Return the cached value for name, calling loader() when missing or expired.
+
+        keep(value) can veto storing a loaded value; a loader that raises
+        stores nothing either.
+        """
+        key = self._settings() + (name,)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+
+        value = loader()
+        if keep is None or keep(value):
+            with self._lock:
+                self._entries[key] = (time.time() + (ttl or self.ttl), value)
+        return value
+
+    def invalidate(self, name=None):
+        """Drop one cached lookup (by name) or everything"""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[-1] == name]:
+                    del self._entries[key]
+
+
+p4_cache = P4MetadataCache()
+
+
+def fetch_p4_info(timeout=None):
+    """Return the InfoRecord for the current connection, cached for a short while.
+
+    With a timeout the lookup runs as a separate p4 process that can be
+    abandoned, which is what the connection probes need. Raises
+    P4Exception if the server can't be reached.
+    """
+    def load():
+        if timeout is None:
+            return info_record(p4_pool.run('info')[0])
+        records, errors = run_p4_marshal(['info'], timeout=timeout)
+        if errors or not records:
+            raise p4python.P4Exception("\n".join(errors) or "Connection failed")
+        return info_record(records[0])
+
+    return p4_cache.get('info', load)
+
+
+def fetch_client_spec(client_name=None, timeout=None):
+    """Return the client spec (Root, View, ...) of the current or named workspace, cached"""
+    def load():
+        args = ['client', '-o'] + ([client_name] if client_name else [])
+        if timeout is None:
+            return p4_pool.run(*args)[0]
+        records, errors = run_p4_marshal(args, timeout=timeout)
+        if errors or not records:
+            raise p4python.P4Exception("\n".join(errors) or "Connection failed")
+        # -G flattens list fields into View0, View1, ...
+        spec = dict(records[0])
+        view_keys = sorted((key for key in spec if key.startswith('View') and key[4:].isdigit()),
+                           key=lambda key: int(key[4:]))
+        spec['View'] = [spec.pop(key) for key in view_keys]
+        return spec
+
+    return p4_cache.get(f'client:{client_name or ""}', load)
+
+
+def fetch_login_errors(timeout=None):
+    """Return the errors of `p4 login -s`; an empty list means the ticket is valid.
+
+    Raises subprocess.TimeoutExpired if the server doesn't answer within timeout.
+    """
+    def load():
+        _, errors = run_p4_marshal(['login', '-s'], timeout=timeout)
+        return errors
+
+    # Only a valid ticket is cached, so the next check after a failure asks again
+    return p4_cache.get('login', load, keep=lambda errors: not errors)
+
+
+def run_startup_probes(timeout=5):
+    """Run the installation, connection, login and client spec probes concurrently.
+
+    Each probe runs as its own p4 process with a timeout and fills the
+    metadata cache, so the connection details shown afterwards need no
+    further round trips. Returns (results, timings): results maps probe name
+    to its value or the exception it raised, timings maps it to seconds.
+    """
+    probes = {
+        'install': check_p4_installed,
+        'info': lambda: fetch_p4_info(timeout=timeout),
+        'login': lambda: fetch_login_errors(timeout=timeout),
+        'client': lambda: fetch_client_spec(timeout=timeout),
+    }
+    results, timings = {}, {}
+
+    def timed(name):
+        started = time.perf_counter()
+        try:
+            return probes[name]()
+        finally:
+            timings[name] = time.perf_counter() - started
+
+    def run(names):
+        with futures.ThreadPoolExecutor(max_workers=len(names)) as executor:
+            pending = {name: executor.submit(timed, name) for name in names}
+            for name, future in pending.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    results[name] = e
+
+    run(list(probes))
+
+    # check_p4_installed may have just put p4.exe on PATH; probes that raced it
+    # and could not find the executable get one more try
+    missing_p4 = [name for name, result in results.items() if isinstance(result, OSError)]
+    if results['install'] is True and missing_p4:
+        run(missing_p4)
+
+    return results, timings
+
+
+# Workflows shared by the GUI and the command line.
+# They report through log(message, color) and progress(percentage, status_text)
+# callbacks instead of touching any widgets.
+
+# Log colors mapped to log levels, for logs that are not shown in color
+COLOR_LEVELS = {'red': 'error', 'yellow': 'warning'}
+
+
+def _no_log(message, color="white"):
+    pass
+
+
+def _no_progress(percentage, status_text=None):
+    pass
+
+
+def is_valid_ue_version(ue_version):
+    """True for versions in the X.Y format (e.g. 4.27 or 5.3)"""
+    return bool(re.match(r'^\d+\.\d+$', ue_version))
+
+
+def user_content_folder(ue_version):
+    """Top-level content folder for a UE version"""
+    return "UE5-UserContent" if float(ue_version) >= 5.0 else "UE4-UserContent"
+
+
+def depot_app_path(ue_version, distribution_method, app_name):
+    """Depot path of an app, e.g. //depot/UE5-UserContent/5.3/AssetPacks/Foo"""
+    return f"//depot/{user_content_folder(ue_version)}/{ue_version}/{distribution_method}/{app_name}"
+
+
+def local_app_path(workspace, ue_version, distribution_method, app_name):
+    """Local workspace folder of an app"""
+    return os.path.join(workspace, user_content_folder(ue_version), ue_version, distribution_method, app_name)
+
+
+def get_depot_info(depot_path, log=_no_log):
+    """Get the number of files and bytes at #head under depot_path.
+
+    Uses `p4 sizes -s`, which the server sums up into a single record, so
+    this costs the same for ten files or fifty thousand.
+    Returns (total_files, total_bytes), or (None, None) if there is nothing
+    to sync.
+    """
+    try:
+        # One summary record for the whole path
+        records = p4_pool.run('sizes', '-s', f'{depot_path}...#head')
+        total_files = int(records[0].get('fileCount') or 0) if records else 0
+        total_bytes = int(records[0].get('fileSize') or 0) if records else 0
+        
+        if total_files > 0:
+            log(f"Found {total_files} files to sync ({format_megabytes(total_bytes)})", "white")
+            return total_files, total_bytes
+        else:
+            log("No files found in depot path", "red")
+            return None, None
+            
+    except p4python.P4Exception as e:
+        error_text = format_p4_error(e)
+        if "no such file" in error_text.lower():
+            log("❌ Path not found in depot", "red")
+        else:
+            log(f"❌ Error getting depot info: {error_text}", "red")
+        return None, None
+    except Exception as e:
+        log(f"❌ Error: {str(e)}", "red")
+        return None, None
+
+
+def plan_sync(depot_path, repair=False, log=_no_log, progress=None):
+    """Work out how many files and bytes a sync of depot_path to #head will move.
+
+    The sync is previewed with `p4 sync -n`, which compares the have list
+    with #head and only reports files that are out of date; the preview is
+    tallied as it streams rather than kept in memory. A repair first
+    verifies the local files against the server (adopt_local_files), so
+    the preview then covers exactly the files that are missing or wrong;
+    progress(percentage, status) follows the verification.
+    Returns (total_files, total_bytes) like get_depot_info: total_files is
+    0 when the workspace is already up to date and None when the path
+    can't be synced.
+    """
+    if repair and adopt_local_files(depot_path, log, progress) is None:
+        return None, None
+
+    tally = {'files': 0, 'bytes': 0, 'deleted': 0}
+
+    def on_preview(record):
+        tally['files'] += 1
+        if record.get('action') == 'deleted':
+            tally['deleted'] += 1
+        else:
+            tally['bytes'] += int(record.get('fileSize') or 0)
+
+    try:
+        p4_pool.run('sync', '-n', f'{depot_path}...#head', handler=P4StreamHandler(on_preview))
+    except p4python.P4Exception as e:
+        log(f"❌ Error previewing sync: {format_p4_error(e)}", "red")
+        return None, None
+
+    if not tally['files']:
+        # Nothing to do, or nothing there at all
+        depot_files, _ = get_depot_info(depot_path)
+        if depot_files is None:
+            log("❌ Path not found in depot", "red")
+            return None, None
+        log(f"✅ Workspace already has #head of all {depot_files} files", "green")
+        return 0, 0
+
+    message = f"Found {tally['files']} files out of date ({format_megabytes(tally['bytes'])} to transfer"
+    message += f", {tally['deleted']} to remove)" if tally['deleted'] else ")"
+    log(message, "white")
+    return tally['files'], tally['bytes']
+
+
+def format_megabytes(size):
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def format_duration(seconds):
+    """Short human readable duration, e.g. 45s or 3m 20s"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
+
+
+class TransferMeter:
+    """Byte-weighted progress of a transfer, with throughput and ETA.
+
+    Falls back to counting files when the total size is unknown. Safe to
+    update from several threads.
+    """
+
+    def __init__(self, total_files, total_bytes=None):
+        self.total_files = max(total_files, 1)
+        self.total_bytes = total_bytes or 0
+        self.files = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, size, files=1):
+        with self._lock:
+            self.files += files
+            self.bytes += size
+
+    def percentage(self):
+        if self.total_bytes:
+            return min(self.bytes / self.total_bytes * 100, 100)
+        return min(self.files / self.total_files * 100, 100)
+
+    def rate(self):
+        """Bytes per second so far"""
+        elapsed = time.perf_counter() - self.started
+        return self.bytes / elapsed if elapsed > 0 else 0
+
+    def status(self):
+        """e.g. '120/900 files, 340.2/2048.0 MB, 41.3 MB/s, ETA 41s'"""
+        text = f"{self.files}/{self.total_files} files"
+        if not self.total_bytes:
+            return text
+        rate = self.rate()
+        text += f", {self.bytes / (1024 * 1024):.1f}/{format_megabytes(self.total_bytes)}"
+        text += f", {rate / (1024 * 1024):.1f} MB/s"
+        if rate > 0:
+            text += f", ETA {format_duration((self.total_bytes - self.bytes) / rate)}"
+        return text
+
+
+def has_free_space(path, required_bytes, log=_no_log):
+    """Check that the disk holding path (or its nearest existing parent) has room for required_bytes"""
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return True
+        path = parent
+    try:
+        free = shutil.disk_usage(path).free
+    except OSError:
+        return True  # Can't tell, let the sync itself report a full disk
+    if required_bytes > free:
+        log(f"❌ Not enough disk space: {format_megabytes(required_bytes)} needed, "
+            f"{format_megabytes(free)} free on {path}", "red")
+        return False
+    return True
+
+
+def sync_depot_path(depot_path, total_files, workspace, log=_no_log, progress=_no_progress,
+                    settings=None, total_bytes=None):
+    """Sync depot_path to #head, reporting byte-weighted progress, MB/s and ETA.
+
+    Only files the have list shows as out of date are transferred; for a
+    repair, plan_sync() has already marked the damaged local files as out of
+    date. total_files and total_bytes come from plan_sync(); the sync does
+    not start if the workspace disk can't hold total_bytes. Uses the
+    server's parallel file transfer when the sync settings enable it
+    (settings default to load_sync_settings()), and logs the transfer rate
+    next to the last one measured for the other mode.
+    With the content_store setting, binary files whose digest is already in
+    the local content store are copied from it instead (see
+    sync_from_content_store) and newly transferred ones are added to it.
+    Returns a summary dict with ok, files (synced), copied (from the
+    store) and local_path.
+    """
+    settings = settings or load_sync_settings()
+    parallel = settings['parallel'] and settings['threads'] > 1
+    local_path = os.path.join(workspace, depot_path.split('//depot/')[-1])
+
+    use_store = settings['content_store']
+    copied, store_pending = sync_from_content_store(depot_path, workspace, log) if use_store else ([], [])
+    if copied:
+        total_files -= len(copied)
+        if total_bytes:
+            total_bytes = max(total_bytes - sum(int(record['fileSize']) for record in copied), 0)
+
+    if total_bytes:
+        if not has_free_space(local_path, total_bytes, log):
+            return {'ok': False, 'files': 0, 'local_path': local_path}
+
+    # Sync command with #head
+    command = ['p4', 'sync', f'{depot_path}...#head']
+    if parallel:
+        command.insert(2, parallel_sync_flag(settings))
+    log(f"Executing command: {' '.join(command)}", "white")
+
+    meter = TransferMeter(total_files, total_bytes)
+    written = [record['clientFile'] for record in copied]  # Files this sync put on disk
+    if parallel:
+        sync_errors = _run_parallel_sync(command, meter, settings['threads'], progress, written)
+    else:
+        sync_errors = _run_serial_sync(command, meter, progress, written)
+
+    if sync_errors:
+        log(f"⚠️ Sync encountered errors:\n{sync_errors}", "red")
+        progress(100, "Sync failed")
+        log("❌ Sync failed with errors", "red")
+        return {'ok': False, 'files': meter.files, 'copied': len(copied), 'local_path': local_path}
+
+    # Ensure we show 100% at completion
+    progress(100, "Sync completed")
+    log_sync_rate(parallel, settings, meter.files, meter.bytes,
+                  time.perf_counter() - meter.started, log)
+    if use_store:
+        add_to_store(store_pending, content_store_path(workspace), log)
+    reconcile_index.record_folder(local_path, log, written)
+    actual_files = sum([len(files) for _, _, files in os.walk(local_path)])
+    log(f"✅ Sync completed - {actual_files} files in workspace", "green")
+    return {'ok': True, 'files': meter.files, 'copied': len(copied), 'local_path': local_path}
+
+
+def _run_serial_sync(command, meter, progress, written):
+    """Sync over a pooled connection, one record per transferred file.
+
+    A file's record arrives just before its content, so a file's bytes are
+    counted as done when the next record (or the end of the sync) arrives.
+    The local path of every file synced is appended to written. Returns the
+    error text, or None on success.
+    """
+    previous_size = None
+
+    def on_file_synced(record):
+        nonlocal previous_size
+        if previous_size is not None:
+            meter.add(previous_size)
+        previous_size = int(record.get('fileSize') or 0)
+        synced_file = record.get('clientFile') or record.get('depotFile', '')
+        if record.get('clientFile') and record.get('action') != 'deleted':
+            written.append(record['clientFile'])
+        progress(meter.percentage(), f"Syncing: {synced_file}\n{meter.status()}")
+
+    # Stream one record per file from the pooled connection
+    try:
+        p4_pool.run(*command[1:], handler=P4StreamHandler(on_file_synced))
+    except p4python.P4Exception as e:
+        return format_p4_error(e)
+    finally:
+        if previous_size is not None:
+            meter.add(previous_size)
+    return None
+
+
+LANDED_CHECKS_PER_POLL = 500  # Files stat'ed per progress poll of a parallel sync
+
+
+def _run_parallel_sync(command, meter, threads, progress, written):
+    """Sync with the p4 client's parallel transfer threads.
+
+    The file records arrive before the transfer threads write the files, so
+    progress is aggregated across threads by watching the files land in the
+    workspace and adding up their sizes. Each poll only checks the oldest
+    LANDED_CHECKS_PER_POLL waiting files; the threads write roughly in record
+    order, so those are the ones most likely to have landed. The local
+    path of every file synced is appended to written. Returns the error
+    text, or None on success.
+    """
+    planned = {}  # clientFile -> fileSize, filled as records arrive
+    landed = set()
+    waiting = deque()  # Planned files not seen on disk yet, oldest first
+    errors = []
+    lock = threading.Lock()
+    finished = threading.Event()
+    started = time.time()
+
+    def report():
+        progress(meter.percentage(), f"Syncing with {threads} threads\n{meter.status()}")
+
+    def land(path):
+        if path not in landed:
+            landed.add(path)
+            meter.add(planned[path])
+
+    def has_landed(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        # Only count files written since the sync started
+        return max(st.st_mtime, st.st_ctime) >= started - 1
+
+    def watch_landed_files():
+        while not finished.wait(0.25):
+            with lock:
+                batch = [waiting.popleft() for _ in range(min(len(waiting), LANDED_CHECKS_PER_POLL))]
+            checked = [(path, has_landed(path)) for path in batch]
+            with lock:
+                for path, is_landed in checked:
+                    if is_landed:
+                        land(path)
+                    else:
+                        waiting.append(path)  # Check again once the rest had their turn
+            report()
+
+    watcher = threading.Thread(target=watch_landed_files, daemon=True)
+    watcher.start()
+    try:
+        process = subprocess.Popen(['p4', *p4_connection_options(), '-G', *command[1:]],
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
+                                   startupinfo=hidden_startupinfo())
+        stderr_output = read_in_background(process.stderr)
+        for record in read_p4_marshal(process.stdout):
+            if record.get('code') == 'error':
+                # Warnings such as "file(s) up-to-date" come through as severity 2
+                if int(record.get('severity') or 3) >= 3:
+                    errors.append(record.get('data', '').strip())
+            elif record.get('action') == 'deleted':
+                # Removed from the workspace, nothing to transfer
+                with lock:
+                    path = record.get('clientFile', record.get('depotFile'))
+                    planned[path] = 0
+                    land(path)
+            elif record.get('clientFile'):
+                with lock:
+                    planned[record['clientFile']] = int(record.get('fileSize') or 0)
+                    waiting.append(record['clientFile'])
+                    written.append(record['clientFile'])
+        stderr = stderr_output().decode('utf-8', 'replace').strip()
+        if process.wait() != 0 and not errors:
+            errors.append(stderr or "p4 sync failed")
+    except OSError as e:
+        errors.append(str(e))
+    finally:
+        finished.set()
+        watcher.join()
+
+    # Whatever the watcher missed (e.g. clients with the modtime option) is done now
+    for path in planned:
+        if path not in landed:
+            land(path)
+    if not errors:
+        report()
+    return "\n".join(errors) or None
+
+
+def log_sync_rate(parallel, settings, files, total_bytes, elapsed, log=_no_log):
+    """Log how fast a sync transferred and compare it with the other mode.
+
+    The rate is remembered in the sync settings so the serial and parallel
+    modes can be compared across runs on the same network.
+    """
+    mode = 'parallel' if parallel else 'serial'
+    other = 'serial' if parallel else 'parallel'
+    megabytes = total_bytes / (1024 * 1024)
+    rate = megabytes / elapsed if elapsed > 0 else 0
+    label = f"Parallel sync ({settings['threads']} threads)" if parallel else "Serial sync"
+    log(f"⏱ {label}: {files} files, {format_megabytes(total_bytes)} in {elapsed:.1f}s ({rate:.1f} MB/s)", "white")
+
+    # Tiny syncs are dominated by latency and would skew the comparison
+    if megabytes < 1:
+        return
+    other_rate = settings.get(f'{other}_rate')
+    if other_rate:
+        log(f"⏱ Last {other} sync ran at {other_rate:.1f} MB/s; {mode} is "
+            f"{rate / other_rate:.1f}x that", "white")
+    try:
+        save_sync_settings(**{f'{mode}_rate': round(rate, 2)})
+    except OSError:
+        pass
+
+
+# Content-addressed local store: binary files the workspace already holds
+# under another version folder are copied locally instead of transferred again
+
+STORE_SYNC_BATCH = 500  # Files per `p4 sync -k` command
+
+
+def content_store_path(workspace):
+    return workspace_side_folder(workspace, "store")
+
+
+def store_object_path(store, digest):
+    """<store>/<first two digest characters>/<digest>"""
+    digest = digest.upper()
+    return os.path.join(store, digest[:2], digest)
+
+
+def file_digest(path):
+    """MD5 of a file as upper-case hex, the form of the server's `fstat -Ol` digest"""
+    md5 = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            md5.update(chunk)
+    return md5.hexdigest().upper()
+
+
+def _digest_or_none(path):
+    try:
+        return file_digest(path)
+    except OSError:
+        return None
+
+
+def is_storable_type(file_type):
+    """True for binary file types, whose server digest is the digest of the bytes on disk.
+
+    Text files are digested with normalized line endings and +k files with
+    collapsed keywords, so their local copies can differ from the digest.
+    """
+    base, _, modifiers = file_type.partition('+')
+    return 'binary' in base and 'k' not in modifiers
+
+
+def out_of_date_binaries(depot_path):
+    """fstat records of the binary files under depot_path the workspace doesn't have at #head.
+
+    Each record has depotFile, clientFile, headRev, digest and fileSize.
+    Files opened in the workspace are left out. Raises P4Exception.
+    """
+    records = p4_pool.run('fstat', '-Ol', '-T',
+                          'depotFile,clientFile,headRev,haveRev,headAction,headType,action,digest,fileSize',
+                          f'{depot_path}...#head')
+    return [record for record in records
+            if record.get('digest') and record.get('clientFile') and not record.get('action')
+            and record.get('haveRev') != record.get('headRev')
+            and record.get('headAction') not in ('delete', 'move/delete', 'purge', 'archive')
+            and is_storable_type(record.get('headType', ''))]
+
+
+def mark_as_synced(records, log=_no_log):
+    """Tell the server the workspace has these revisions without transferring them (`p4 sync -k`).
+
+    records need depotFile and headRev. Returns the records whose have list
+    entry was updated.
+    """
+    done = []
+    for start in range(0, len(records), STORE_SYNC_BATCH):
+        batch = records[start:start + STORE_SYNC_BATCH]
+        try:
+            p4_pool.run('sync', '-k', *[f"{record['depotFile']}#{record['headRev']}" for record in batch])
+            done += batch
+        except p4python.P4Exception as e:
+            log(f"⚠️ Could not update the have list, those files will be transferred: "
+                f"{format_p4_error(e)}", "yellow")
+    return done
+
+
+def copy_from_store(records, store, log=_no_log):
+    """Copy each file in records from its digest's copy in the store.
+
+    Every workspace file is an independent read-only copy, as p4 would
+    write it, so an edit in one version folder never shows up in another.
+    Store copies are hashed in parallel first; a copy that no longer
+    matches its digest (edited in place through the workspace file it was
+    added from) is dropped. Existing workspace files that are writable are
+    left for the sync to report, like p4 does with noclobber.
+    Returns (copied records, records that still need a transfer).
+    """
+    candidates, missing = [], []
+    for record in records:
+        source = store_object_path(store, record['digest'])
+        try:
+            same_size = os.path.getsize(source) == int(record.get('fileSize') or -1)
+        except OSError:
+            same_size = False
+        writable = os.path.exists(record['clientFile']) and os.access(record['clientFile'], os.W_OK)
+        (candidates if same_size and not writable else missing).append(record)
+
+    with futures.ThreadPoolExecutor(max_workers=8) as pool:
+        digests = list(pool.map(_digest_or_none,
+                                [store_object_path(store, record['digest']) for record in candidates]))
+
+    copied = []
+    for index, (record, digest) in enumerate(zip(candidates, digests)):
+        source = store_object_path(store, record['digest'])
+        if digest != record['digest'].upper():
+            with contextlib.suppress(OSError):
+                TreeDeleter.with_write_permission(os.remove, source)
+            missing.append(record)
+            continue
+        target = record['clientFile']
+        try:
+            if os.path.lexists(target):
+                TreeDeleter.with_write_permission(os.remove, target)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+            os.chmod(target, 0o444)
+            copied.append(record)
+        except OSError as e:
+            # Usually a full disk; the rest can't be copied either
+            log(f"⚠️ Could not copy from the content store, transferring instead: {str(e)}", "yellow")
+            missing += candidates[index:]
+            break
+    return copied, missing
+
+
+def sync_from_content_store(depot_path, workspace, log=_no_log):
+    """Bring out-of-date binary files under depot_path in from the local content store.
+
+    Files whose #head digest is in the store are copied into the workspace
+    and marked as synced with `p4 sync -k`, so the following sync skips
+    them. The store is shared by every version folder of the workspace, so
+    a pack synced for 4.27 costs no transfer for 5.3.
+    Returns (copied records, records to add to the store once synced).
+    """
+    try:
+        records = out_of_date_binaries(depot_path)
+    except p4python.P4Exception as e:
+        log(f"⚠️ Could not read file digests, not using the content store: {format_p4_error(e)}", "yellow")
+        return [], []
+
+    store = content_store_path(workspace)
+    if os.path.isdir(store):
+        copied, missing = copy_from_store(records, store, log)
+    else:
+        copied, missing = [], records
+    copied = mark_as_synced(copied, log)
+    if copied:
+        copied_bytes = sum(int(record['fileSize']) for record in copied)
+        log(f"📋 Copied {len(copied)} files ({format_megabytes(copied_bytes)}) "
+            f"from the local content store instead of transferring them", "green")
+    return copied, missing
+
+
+def add_to_store(records, store, log=_no_log):
+    """Hardlink freshly synced files into the store under their digest.
+
+    Only the store shares the transferred file; workspaces get copies of
+    it (copy_from_store), which re-verify it against its digest first.
+    Returns the number of files added.
+    """
+    added = 0
+    for record in records:
+        target = store_object_path(store, record['digest'])
+        if os.path.exists(target):
+            continue
+        try:
+            if not os.path.isdir(store):
+                os.makedirs(store)
+                hide_folder(store)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.link(record['clientFile'], target)
+            added += 1
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            log(f"⚠️ Could not add files to the content store: {str(e)}", "yellow")
+            break
+    return added
+
+
+def prune_content_store(workspace):
+    """Delete store copies whose workspace file (the one they were added from) is gone.
+
+    Returns (files, bytes) freed.
+    """
+    store = content_store_path(workspace)
+    files = size = 0
+    if not os.path.isdir(store):
+        return files, size
+    for bucket in os.scandir(store):
+        if not bucket.is_dir(follow_symlinks=False):
+            continue
+        for entry in os.scandir(bucket.path):
+            try:
+                st = os.stat(entry.path)
+                if st.st_nlink <= 1:
+                    TreeDeleter.with_write_permission(os.remove, entry.path)
+                    files += 1
+                    size += st.st_size
+            except OSError:
+                pass
+    return files, size
+
+
+# Verify and adopt: local files that already match #head are kept
+
+ADOPT_WORKERS = 8  # Files hashed at once
+
+
+def local_digest(path, file_type):
+    """Digest of a local file comparable with the server digest of a file_type revision.
+
+    Text files are digested with CRLF line endings folded to LF, as the
+    server stores them. Returns None for types whose local form can't be
+    compared (unicode, utf16, symlink, +k keyword expansion).
+    """
+    base, _, modifiers = file_type.partition('+')
+    if 'k' in modifiers:
+        return None
+    if 'binary' in base:
+        return file_digest(path)
+    if 'text' in base:
+        with open(path, 'rb') as f:
+            return hashlib.md5(f.read().replace(b'\r\n', b'\n')).hexdigest().upper()
+    return None
+
+
+def adopt_local_files(depot_path, log=_no_log, progress=None):
+    """Keep the local files under depot_path that already match #head instead of re-downloading them.
+
+    Hashes the local files in parallel and compares them with the server
+    digests (`fstat -Ol`). Matching files are marked as synced at #head
+    with `p4 sync -k`; the rest are removed from the have list, and
+    differing local copies from disk, so an incremental sync then transfers
+    exactly the missing and mismatched files. Files opened in the workspace
+    are left alone. Returns the number of files adopted, or None on error.
+    """
+    try:
+        records = p4_pool.run('fstat', '-Ol', '-T',
+                              'depotFile,clientFile,headRev,headAction,headType,action,digest,fileSize',
+                              f'{depot_path}...#head')
+    except p4python.P4Exception as e:
+        log(f"❌ Error reading file digests: {format_p4_error(e)}", "red")
+        return None
+    records = [record for record in records
+               if record.get('clientFile') and not record.get('action')
+               and record.get('headAction') not in ('delete', 'move/delete', 'purge', 'archive')]
+    present = [record for record in records if os.path.isfile(record['clientFile'])]
+
+    lock = threading.Lock()
+    verified = 0
+
+    def verify(record):
+        nonlocal verified
+        try:
+            file_type = record.get('headType', '')
+            if 'binary' in file_type and os.path.getsize(record['clientFile']) != int(record.get('fileSize') or -1):
+                matches = False  # No need to hash it
+            else:
+                matches = local_digest(record['clientFile'], file_type) == record.get('digest', '').upper()
+        except OSError:
+            matches = False
+        with lock:
+            verified += 1
+            if progress and (verified % 50 == 0 or verified == len(present)):
+                progress(verified / len(present) * 100, f"Verifying local files: {verified}/{len(present)}")
+        return matches
+
+    started = time.perf_counter()
+    with futures.ThreadPoolExecutor(max_workers=ADOPT_WORKERS) as pool:
+        matches = list(pool.map(verify, present))
+    matching = [record for record, match in zip(present, matches) if match]
+    adopted = mark_as_synced(matching, log)
+    adopted_files = {record['depotFile'] for record in adopted}
+    fetch = [record for record in records if record['depotFile'] not in adopted_files]
+
+    # Forget the rest so the incremental sync fetches them even if the have list says otherwise
+    for start in range(0, len(fetch), STORE_SYNC_BATCH):
+        batch = fetch[start:start + STORE_SYNC_BATCH]
+        try:
+            p4_pool.run('sync', '-k', *[f"{record['depotFile']}#none" for record in batch])
+        except p4python.P4Exception as e:
+            log(f"❌ Error updating the have list: {format_p4_error(e)}", "red")
+            return None
+    for record, match in zip(present, matches):
+        if not match:
+            with contextlib.suppress(OSError):
+                TreeDeleter.with_write_permission(os.remove, record['clientFile'])
+
+    adopted_bytes = sum(int(record.get('fileSize') or 0) for record in adopted)
+    log(f"🔍 Verified {len(present)} local files in {time.perf_counter() - started:.1f}s: "
+        f"{len(adopted)} match #head and were kept ({format_megabytes(adopted_bytes)}), "
+        f"{len(fetch)} to transfer", "white")
+    return len(adopted)
+
+
+# Local reconcile index: size, mtime and digest of every synced file
+
+RECONCILE_INDEX = 'reconcile_index.db'
+RECONCILE_BATCH_SIZE = 500  # Files per `p4 reconcile` command
+
+
+class ReconcileIndex:
+    """SQLite record of the files the workspace has, as they were on disk when synced.
+
+    Sync and submit record an app folder with record_folder(); reconcile
+    then asks changed_files() for the files that were added, changed or
+    removed since, which takes a directory walk instead of a server round
+    trip per file. A file whose mtime changed but whose content still
+    matches the recorded digest (touched, or copied back) is not reported.
+    Thread-safe; each call uses its own connection.
+    """
+
+    def __init__(self, path=RECONCILE_INDEX):
+        self.path = path
+        self.lock = threading.Lock()
+        self.ready = False
+
+    @contextlib.contextmanager
+    def _connect(self):
+        with self.lock, contextlib.closing(sqlite3.connect(self.path)) as connection:
+            if not self.ready:
+                connection.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, "
+                                   "mtime_ns INTEGER, digest TEXT, file_type TEXT)")
+                self.ready = True
+            with connection:
+                yield connection
+
+    @staticmethod
+    def key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    @classmethod
+    def _folder_range(cls, folder):
+        """(low, high) bounds of the keys of every file under folder"""
+        prefix = cls.key(folder) + os.sep
+        return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+    def record_folder(self, folder, log=_no_log, written=()):
+        """Replace what is recorded under folder with the files the workspace has there now.
+
+        Digests come from `fstat -Ol` at #have. Only the files in written
+        (just put on disk by a sync) are recorded as they are now without
+        looking at them. Any other file keeps its recorded size and mtime
+        while its digest is unchanged, so an edit made before the sync is
+        still reported; otherwise it is hashed and left out, for reconcile
+        to look at, unless it matches the digest. Errors only cost a full
+        reconcile later, so they are logged as warnings.
+        """
+        try:
+            records = p4_pool.run('fstat', '-Ol', '-T', 'clientFile,digest,headType',
+                                  f"{os.path.join(folder, '...')}#have")
+            with self._connect() as connection:
+                recorded = {row[0]: row[1:] for row in connection.execute(
+                    "SELECT path, size, mtime_ns, digest FROM files WHERE path >= ? AND path < ?",
+                    self._folder_range(folder))}
+        except p4python.P4Exception as e:
+            log(f"⚠️ Could not update the reconcile index: {format_p4_error(e)}", "yellow")
+            return
+        except sqlite3.Error as e:
+            log(f"⚠️ Could not update the reconcile index: {str(e)}", "yellow")
+            return
+
+        written = {self.key(path) for path in written}
+        rows, unverified = [], []
+        for record in records:
+            if not record.get('clientFile'):
+                continue
+            key = self.key(record['clientFile'])
+            digest = record.get('digest', '').upper() or None
+            file_type = record.get('headType', '')
+            previous = recorded.get(key)
+            if key in written:
+                with contextlib.suppress(OSError):
+                    st = os.stat(record['clientFile'])
+                    rows.append((key, st.st_size, st.st_mtime_ns, digest, file_type))
+            elif previous and previous[2] == digest:
+                rows.append((key, previous[0], previous[1], digest, file_type))
+            elif digest:
+                unverified.append((record['clientFile'], key, digest, file_type))
+
+        def verify(entry):
+            path, key, digest, file_type = entry
+            try:
+                st = os.stat(path)  # Before hashing, so a later edit still shows as changed
+                if local_digest(path, file_type) == digest:
+                    return (key, st.st_size, st.st_mtime_ns, digest, file_type)
+            except OSError:
+                pass
+            return None
+
+        if unverified:
+            with futures.ThreadPoolExecutor(max_workers=ADOPT_WORKERS) as pool:
+                rows += [row for row in pool.map(verify, unverified) if row]
+
+        try:
+            with self._connect() as connection:
+                connection.execute("DELETE FROM files WHERE path >= ? AND path < ?", self._folder_range(folder))
+                connection.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", rows)
+        except sqlite3.Error as e:
+            log(f"⚠️ Could not update the reconcile index: {str(e)}", "yellow")
+
+    def forget_folders(self, folders):
+        """Drop what is recorded under folders, e.g. once they are off the have list"""
+        with self._connect() as connection:
+            for folder in folders:
+                connection.execute("DELETE FROM files WHERE path >= ? AND path < ?", self._folder_range(folder))
+
+    def changed_files(self, folder):
+        """Return the paths under folder that may need reconciling, or None if folder was never recorded.
+
+        New files, files whose size or mtime changed (unless their content
+        still matches the digest) and recorded files that are gone.
+        """
+        with self._connect() as connection:
+            recorded = {row[0]: row[1:] for row in connection.execute(
+                "SELECT path, size, mtime_ns, digest, file_type FROM files WHERE path >= ? AND path < ?",
+                self._folder_range(folder))}
+        if not recorded:
+            return None
+
+        changed, touched = [], []
+        pending = [folder]
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                            continue
+                        row = recorded.pop(self.key(entry.path), None)
+                        if row is None:
+                            changed.append(entry.path)
+                            continue
+                        size, mtime_ns, digest, file_type = row
+                        st = entry.stat(follow_symlinks=False)
+                        if st.st_size == size and st.st_mtime_ns == mtime_ns:
+                            continue
+                        try:
+                            same = digest is not None and local_digest(entry.path, file_type) == digest
+                        except OSError:
+                            same = False
+                        if same:
+                            touched.append((st.st_size, st.st_mtime_ns, self.key(entry.path)))
+                        else:
+                            changed.append(entry.path)
+            except OSError:
+                pass  # Unreadable folder, reconcile will report it
+        changed += recorded  # Recorded but no longer on disk
+
+        if touched:
+            with self._connect() as connection:
+                connection.executemany("UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?", touched)
+        return changed
+
+
+reconcile_index = ReconcileIndex()
+
+
+def has_p4_special_characters(name):
+    """True if name has characters p4 reads as wildcards or revision specifiers"""
+    return bool(re.search(r'[@#%*]', name))
+
+
+def has_local_changes(folder, log=_no_log):
+    """True if folder may hold work that is not on the server.
+
+    Any file the reconcile index reports as added, changed or removed
+    counts, including files reconcile would ignore. A folder the index
+    doesn't know is previewed with `p4 reconcile -n`. Errors count as
+    changes, so nothing is lost to a guess.
+    """
+    try:
+        changed = reconcile_index.changed_files(folder)
+    except sqlite3.Error:
+        changed = None
+    if changed is not None:
+        return bool(changed)
+    try:
+        return bool(p4_pool.run('reconcile', '-n', '-m', os.path.join(folder, '...')))
+    except p4python.P4Exception as e:
+        log(f"⚠️ Could not check {folder} for local changes: {format_p4_error(e)}", "yellow")
+        return True
+
+
+def reconcile_file_specs(paths):
+    """File arguments for `p4 reconcile` covering paths.
+
+    Names with characters p4 reads as wildcards or revision specifiers are
+    covered by their folder's `*` instead. Returns None if a folder name
+    has such characters too.
+    """
+    specs = set()
+    for path in paths:
+        folder, name = os.path.split(path)
+        if has_p4_special_characters(folder):
+            return None
+        specs.add(os.path.join(folder, '*') if has_p4_special_characters(name) else path)
+    return sorted(specs)
+
+
+RECONCILE_SHARD_DEPTH = 3  # Folder levels split into shards at most
+
+
+def reconcile_shards(local_path, target):
+    """Split local_path into about target file specs that together cover it.
+
+    Folders are expanded breadth first, up to RECONCILE_SHARD_DEPTH levels,
+    until there are enough subtrees: an expanded folder contributes
+    `folder/*` for its own files, the rest `folder/...`. A folder with a
+    subfolder whose name p4 would read as a wildcard or revision is kept
+    whole. Subtrees that were removed locally are not covered; see
+    removed_subtrees.
+    """
+    shards, frontier = [], [local_path]
+    for _ in range(RECONCILE_SHARD_DEPTH):
+        if len(shards) + len(frontier) >= target:
+            break
+        expanded = []
+        for folder in frontier:
+            try:
+                with os.scandir(folder) as entries:
+                    entries = list(entries)
+            except OSError:
+                expanded.append(folder)
+                continue
+            subfolders = [entry.path for entry in entries if entry.is_dir(follow_symlinks=False)]
+            if not subfolders or any(has_p4_special_characters(os.path.basename(path))
+                                     for path in subfolders):
+                expanded.append(folder)  # Nothing to split, or no valid spec for a part: keep it whole
+                continue
+            if len(subfolders) < len(entries):
+                shards.append(os.path.join(folder, '*'))
+            expanded += subfolders
+        if expanded == frontier:
+            break
+        frontier = expanded
+    return shards + [os.path.join(folder, '...') for folder in frontier]
+
+
+def removed_subtrees(local_path, shards):
+    """File specs for the subfolders under local_path that the shards miss because they are gone locally.
+
+    Only folders reconcile_shards expanded can have such gaps (a `folder/...`
+    shard covers its own deletes), so each of those is asked for the
+    subfolders the workspace has on the server (`p4 dirs -H`). Returns
+    `<folder>/...` specs for the ones missing on disk. Raises P4Exception.
+    """
+    inside = os.path.join(local_path, '')
+    expanded = set()
+    for shard in shards:
+        folder = os.path.dirname(shard)
+        if shard.endswith('...'):
+            folder = os.path.dirname(folder)  # Its parent was expanded
+        while (folder == local_path or folder.startswith(inside)) and folder not in expanded:
+            expanded.add(folder)
+            folder = os.path.dirname(folder)
+
+    removed = []
+    for folder in sorted(expanded):
+        for record in p4_pool.run('dirs', '-H', os.path.join(folder, '*')):
+            # Depot syntax, so the name comes with @, #, * and % escaped
+            name = record.get('dir', '').rsplit('/', 1)[-1]
+            local_name = (name.replace('%40', '@').replace('%23', '#')
+                          .replace('%2A', '*').replace('%25', '%'))
+            if name and not os.path.isdir(os.path.join(folder, local_name)):
+                removed.append(os.path.join(folder, name, '...'))
+    return removed
+
+
+def reconcile_files(local_path, log=_no_log, changelist=None, on_record=None):
+    """Open offline work under local_path for add/edit/delete.
+
+    When local_path is in the reconcile index only the files it reports
+    as changed are sent to the server; otherwise the folder is split into
+    subtrees (reconcile_shards). Either way the pieces are reconciled
+    concurrently on the connection pool, into changelist if given (the
+    default changelist otherwise), and the slowest pieces are logged.
+    Subtrees removed locally get a delete pass of their own
+    (removed_subtrees); a file reported twice is only counted once.
+    One pooled connection is left free for the rest of the application.
+    Moves across pieces are opened as a delete and an add. on_record(record)
+    is called from the reconcile threads as each file is opened.
+    Returns {'add': [...], 'edit': [...], 'delete': [...]} of ReconcileRecords,
+    or None if the reconcile failed.
+    """
+    # Check for files to reconcile
+    command = ['p4', 'reconcile', '-f', '-m', os.path.join(local_path, '...')]
+    if changelist:
+        command[2:2] = ['-c', str(changelist)]
+    base = command[1:-1]
+    log(f"Checking for files to reconcile in: {local_path}", "white")
+    try:
+        changed = reconcile_index.changed_files(local_path)
+        specs = reconcile_file_specs(changed) if changed is not None else None
+    except sqlite3.Error as e:
+        log(f"⚠️ Reconcile index not available, checking every file: {str(e)}", "yellow")
+        specs = None
+    if specs is not None:
+        log(f"Reconcile index: {len(changed)} changed files", "white")
+        shards = [specs[start:start + RECONCILE_BATCH_SIZE] for start in range(0, len(specs), RECONCILE_BATCH_SIZE)]
+    else:
+        shards = [[spec] for spec in reconcile_shards(local_path, p4_pool.max_size * 4)]
+    # Shards only cover folders that still exist, so removed ones get a delete pass
+    delete_pass = specs is None and len(shards) > 1
+    workers = max(p4_pool.max_size - 1, 1)
+    
+    # Categorize changes by the action the server reports for each file
+    changes = {
+        'add': [],
+        'edit': [],
+        'delete': []
+    }
+    seen = set()  # Depot files already counted
+    lock = threading.Lock()
+
+    def reconcile_shard(shard, *flags):
+        started = time.perf_counter()
+        files = 0
+
+        def on_file_reconciled(stat):
+            nonlocal files
+            record = reconcile_record(stat)
+            with lock:
+                files += 1
+                if record.action not in changes or record.depot_file in seen:
+                    return
+                seen.add(record.depot_file)
+                changes[record.action].append(record)
+            if on_record:
+                on_record(record)
+
+        p4_pool.run(*base, *flags, *shard, handler=P4StreamHandler(on_file_reconciled))
+        return time.perf_counter() - started, files
+
+    started = time.perf_counter()
+    try:
+        with futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            timings = list(pool.map(reconcile_shard, shards))
+        if delete_pass:
+            removed = removed_subtrees(local_path, [shard[0] for shard in shards])
+            for start in range(0, len(removed), RECONCILE_BATCH_SIZE):
+                reconcile_shard(removed[start:start + RECONCILE_BATCH_SIZE], '-d')
+    except p4python.P4Exception as e:
+        log(f"❌ Error during reconcile: {format_p4_error(e)}", "red")
+        return None
+
+    if len(shards) > 1:
+        scanning = sum(seconds for seconds, _ in timings)
+        log(f"⏱ Reconciled {len(shards)} shards in {time.perf_counter() - started:.1f}s "
+            f"({scanning:.1f}s of scanning over {workers} connections)", "white")
+        slowest = sorted(zip(timings, shards), key=lambda item: item[0][0], reverse=True)
+        for (seconds, files), shard in slowest[:5]:
+            label = os.path.relpath(shard[0], local_path) if len(shard) == 1 else f"{len(shard)} files"
+            log(f"   {label}: {files} files in {seconds:.1f}s", "white")
+    return changes
+
+
+def reconcile_description(reconcile_reason, sf_case):
+    """Changelist description used for Reconcile & Submit"""
+    return f"{reconcile_reason} {sf_case} Reconciled offline work"
+
+
+def changelist_spec(description):
+    """Spec for a new changelist, for `p4 change -i`.
+
+    Built from the cached `p4 info` instead of a `p4 change -o` round trip.
+    It lists no files, so nothing is taken over from the default changelist.
+    """
+    info = fetch_p4_info()
+    description = "\n".join(f"\t{line}" for line in description.splitlines() or [""])
+    return (f"Change:\tnew\n\nClient:\t{info.client}\n\nUser:\t{info.user}\n\n"
+            f"Status:\tnew\n\nDescription:\n{description}\n")
+
+
+def create_changelist(description, log=_no_log):
+    """Create an empty numbered changelist with the given description.
+
+    Open files straight into it (`reconcile -c`, `edit -c`, ...).
+    Returns the changelist number, or None on failure.
+    """
+    # Create the changelist with the new specification
+    try:
+        create_cl_output = "\n".join(p4_pool.run('change', '-i', input=changelist_spec(description),
+                                                  tagged=False, retry=False))
+    except p4python.P4Exception as e:
+        log(f"❌ Error creating changelist: {format_p4_error(e)}", "red")
+        return None
+        
+    try:
+        changelist_number = create_cl_output.split()[1]
+        log(f"✓ Created changelist {changelist_number}", "green")
+        return changelist_number
+    except (IndexError, AttributeError):
+        log("❌ Error: Could not create new changelist", "red")
+        log(f"Output was: {create_cl_output}", "red")
+        return None
+
+
+def set_changelist_description(changelist_number, description, log=_no_log):
+    """Replace the description of a pending changelist, keeping its files. Returns True on success."""
+    try:
+        spec = p4_pool.run('change', '-o', changelist_number)[0]
+        spec['Description'] = description
+        p4_pool.run('change', '-i', input=spec, retry=False)
+        return True
+    except p4python.P4Exception as e:
+        log(f"❌ Error updating changelist {changelist_number}: {format_p4_error(e)}", "red")
+        return False
+
+
+def delete_changelist(changelist_number):
+    """Delete a pending changelist if it is empty (`p4 change -d`); errors are ignored"""
+    with contextlib.suppress(p4python.P4Exception):
+        p4_pool.run('change', '-d', changelist_number, tagged=False, retry=False)
+
+
+def discard_changelist(changelist_number, log=_no_log):
+    """Drop a failed reconcile's changelist: revert what it opened, then delete it.
+
+    The files are reverted with -k, so the offline work on disk is kept
+    exactly as it is. If that fails, what is still open is logged so the
+    changelist is not left behind unnoticed. Returns True if it is gone.
+    """
+    try:
+        p4_pool.run('revert', '-k', '-c', changelist_number, '//...', tagged=False)
+        p4_pool.run('change', '-d', changelist_number, tagged=False, retry=False)
+        return True
+    except p4python.P4Exception as e:
+        error_text = format_p4_error(e)
+    try:
+        still_open = f"{len(p4_pool.run('opened', '-c', changelist_number))} files are still open in it"
+    except p4python.P4Exception:
+        still_open = "it may still have files open"
+    log(f"⚠️ Could not remove changelist {changelist_number}, {still_open}: {error_text}", "yellow")
+    return False
+
+
+SUBMIT_RETRIES = 3
+SUBMIT_BACKOFF = 5  # Seconds before the first retry, doubled for each one after
+
+# Errors from a dropped connection rather than from the changelist itself
+TRANSIENT_SUBMIT_ERROR = re.compile(r"TCP|connect|Partner exited|timed out|timeout|reset by peer|"
+                                    r"broken pipe|RpcTransport|network", re.IGNORECASE)
+
+
+def changelist_state(changelist_number):
+    """Return ('submitted' or 'pending', files still open in it) for a changelist.
+
+    A pending changelist renumbered by a successful submit no longer
+    exists under its old number ("Change <n> unknown."), which counts as
+    submitted. Raises P4Exception on any other error, e.g. if the server
+    can't be reached.
+    """
+    try:
+        spec = p4_pool.run('change', '-o', changelist_number)[0]
+    except p4python.P4Exception as e:
+        if re.search(rf'\bChange {re.escape(str(changelist_number))} unknown\b', format_p4_error(e)):
+            return 'submitted', 0
+        raise
+    if spec.get('Status') == 'submitted':
+        return 'submitted', 0
+    return 'pending', len(p4_pool.run('opened', '-c', changelist_number))
+
+
+def upload_sizes(changes):
+    """Map the depot path of every added or edited file to its local size, for submit progress"""
+    sizes = {}
+    for record in changes['add'] + changes['edit']:
+        try:
+            sizes[record.depot_file] = os.path.getsize(record.client_file)
+        except OSError:
+            sizes[record.depot_file] = 0
+    return sizes
+
+
+def submit_changelist(changelist_number, total_files, log=_no_log, progress=_no_progress,
+                      settings=None, sizes=None):
+    """Submit a numbered changelist, reporting byte-weighted progress, MB/s and ETA.
+
+    sizes maps depot paths to their upload size (see upload_sizes); without
+    it progress counts files. Uploads with the p4 client's parallel threads
+    when the submit_parallel setting is on (settings default to
+    load_sync_settings()).
+    When a submit fails, the changelist is inspected: if it was submitted
+    after all the failure is ignored; if it is still pending and the error
+    was a dropped connection, the submit is retried up to SUBMIT_RETRIES
+    times with growing delays, using `--noretransfer 1` so the server only
+    receives the files it doesn't have yet.
+    Returns a summary dict with ok, files (submitted), bytes, elapsed
+    (seconds) and mode.
+    """
+    settings = settings or load_sync_settings()
+    sizes = sizes or {}
+    parallel = settings['submit_parallel'] and settings['submit_threads'] > 1
+    mode = f"Parallel submit ({settings['submit_threads']} threads)" if parallel else "Submit"
+    started = time.perf_counter()
+    
+    def on_file_submitted(record):
+        # Only per-file records carry a depotFile; the rest are change summaries
+        if 'depotFile' not in record:
+            return
+        meter.add(sizes.get(record['depotFile'], 0))
+        status_text = (
+            f"{mode}: file {meter.files} of {total_files}\n"
+            f"Current file: {record['depotFile']}\n"
+            f"{meter.status()}"
+        )
+        progress(meter.percentage(), status_text)
+    
+    for attempt in range(SUBMIT_RETRIES + 1):
+        # Each attempt lists every file again, already transferred or not
+        meter = TransferMeter(total_files, sum(sizes.values()))
+        options = ['--noretransfer', '1'] if attempt else []
+
+        # Process output in real-time
+        if parallel:
+            submit_errors = _run_parallel_submit(changelist_number, settings, on_file_submitted, options)
+        else:
+            try:
+                p4_pool.run('submit', *options, '-c', changelist_number,
+                            handler=P4StreamHandler(on_file_submitted), retry=False)
+                submit_errors = None
+            except p4python.P4Exception as e:
+                submit_errors = format_p4_error(e)
+        if not submit_errors:
+            break
+
+        try:
+            state, remaining = changelist_state(changelist_number)
+        except p4python.P4Exception:
+            state, remaining = None, None  # Still offline
+        if state == 'submitted':
+            log(f"⚠️ Submit reported errors, but changelist {changelist_number} was submitted:\n"
+                f"{submit_errors}", "yellow")
+            submit_errors = None
+            break
+        if attempt == SUBMIT_RETRIES or (state == 'pending' and not TRANSIENT_SUBMIT_ERROR.search(submit_errors)):
+            break
+
+        delay = SUBMIT_BACKOFF * 2 ** attempt
+        left = f"{remaining} files still open" if remaining is not None else "server not reachable"
+        log(f"⚠️ Submit interrupted ({left}), retrying in {delay}s without re-sending "
+            f"transferred files:\n{submit_errors}", "yellow")
+        progress(meter.percentage(), f"Submit interrupted, retry {attempt + 1} of {SUBMIT_RETRIES} in {delay}s...")
+        time.sleep(delay)
+
+    elapsed_time = time.perf_counter() - started
+    summary = {'ok': submit_errors is None, 'files': meter.files, 'bytes': meter.bytes,
+               'elapsed': elapsed_time, 'mode': mode}
+    if submit_errors:
+        log(f"⚠️ Submit encountered errors:\n{submit_errors}", "red")
+        log(f"❌ Submit failed, changelist {changelist_number} is left pending with its files open", "red")
+        return summary
+        
+    progress(100, "Submit completed successfully")
+    log(f"✅ Successfully submitted changelist {changelist_number}", "green")
+    log(f"Total files processed: {meter.files}", "white")
+    log(f"Total time: {elapsed_time / 60:.1f} minutes", "white")
+    return summary
+
+
+def _run_parallel_submit(changelist_number, settings, on_record, options=()):
+    """Submit with the p4 client's parallel upload threads, calling on_record per output record.
+
+    Runs the p4 executable like _run_parallel_sync, since the transfer
+    threads live in the p4 client. Returns the error text, or None on
+    success.
+    """
+    errors = []
+    try:
+        process = subprocess.Popen(['p4', *p4_connection_options(), '-G', 'submit',
+                                    parallel_submit_flag(settings), *options, '-c', changelist_number],
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
+                                   startupinfo=hidden_startupinfo())
+        stderr_output = read_in_background(process.stderr)
+        for record in read_p4_marshal(process.stdout):
+            if record.get('code') == 'error':
+                if int(record.get('severity') or 3) >= 3:
+                    errors.append(record.get('data', '').strip())
+            else:
+                on_record(record)
+        stderr = stderr_output().decode('utf-8', 'replace').strip()
+        if process.wait() != 0 and not errors:
+            errors.append(stderr or "p4 submit failed")
+    except OSError as e:
+        errors.append(str(e))
+    return "\n".join(errors) or None
+
+
+def log_change_summary(changes, log=_no_log, submit_result=None):
+    """Log how many files were added, edited and deleted, and how fast they were submitted"""
+    summary_parts = []
+    if changes['add']:
+        summary_parts.append(f"{len(changes['add'])} added")
+    if changes['edit']:
+        summary_parts.append(f"{len(changes['edit'])} edited")
+    if changes['delete']:
+        summary_parts.append(f"{len(changes['delete'])} deleted")
+        
+    if summary_parts:
+        log(f"Summary: {', '.join(summary_parts)}", "white")
+    if submit_result:
+        elapsed = submit_result['elapsed']
+        rate = submit_result['bytes'] / (1024 * 1024) / elapsed if elapsed > 0 else 0
+        log(f"⏱ {submit_result['mode']}: {submit_result['files']} files, "
+            f"{format_megabytes(submit_result['bytes'])} in {elapsed:.1f}s ({rate:.1f} MB/s)", "white")
+
+
+def depot_search_command(app_name):
+    """p4 dirs command matching folders named *app_name four levels below //depot"""
+    return ['p4', 'dirs', '-C', f'//depot/*/*/*/*{app_name}']
+
+
+def find_depot_folders(app_name):
+    """Run depot_search_command(app_name).
+
+    Returns (locations, error_text); error_text is None on success.
+    """
+    command = depot_search_command(app_name)
+    try:
+        locations = [record['dir'] for record in p4_pool.run(*command[1:]) if record.get('dir')]
+        return locations, None
+    except p4python.P4Exception as e:
+        return [], format_p4_error(e)
+
+
+def rename_move(source_path, new_path, description, log=_no_log, progress=_no_progress):
+    """Move source_path/... to new_path/... in a new changelist and submit it.
+
+    Returns the number of files moved, or None on failure.
+    """
+    if new_path == source_path:
+        log("❌ Error: New path is same as current path", "red")
+        return None
+
+    # 1. Create new changelist (20% progress)
+    progress(0, "Creating changelist...")
+    changelist_number = create_changelist(description, log)
+    if changelist_number is None:
+        return None
+    progress(20, "Changelist created successfully")
+
+    # 2. Open files for edit (40% progress)
+    progress(20, "Opening files for edit...")
+    try:
+        p4_pool.run('edit', '-c', changelist_number, f"{source_path}/...", tagged=False)
+    except p4python.P4Exception as e:
+        log(f"❌ Error opening files for edit: {format_p4_error(e)}", "red")
+        return None
+
+    progress(40, "Files opened for edit")
+
+    # 3. Perform move operation (70% progress)
+    progress(40, "Performing move operation...")
+    try:
+        move_output = p4_pool.run('move', '-c', changelist_number, f"{source_path}/...", f"{new_path}/...",
+                                  tagged=False, retry=False)
+    except p4python.P4Exception as e:
+        log(f"❌ Error during move: {format_p4_error(e)}", "red")
+        return None
+
+    progress(70, "Move operation completed")
+
+    # 4. Submit the changelist (100% progress)
+    progress(70, "Submitting changes...")
+    try:
+        p4_pool.run('submit', '-c', changelist_number, tagged=False, retry=False)
+    except p4python.P4Exception as e:
+        log(f"❌ Error submitting changes: {format_p4_error(e)}", "red")
+        return None
+
+    # Count moved files
+    file_count = len([line for line in move_output if str(line).strip()])
+    
+    progress(100, "Operation completed successfully")
+    
+    # Log success with summary
+    log("✅ Move operation completed successfully", "green")
+    log(f"From: {source_path}", "white")
+    log(f"To: {new_path}", "white")
+    log(f"Total files moved: {file_count}", "white")
+    return file_count
+
+
+# Workspace clearing, shared by P4Vhelper and P4Vhelper Pro
+
+USER_CONTENT_FOLDERS = ["UE4-UserContent", "UE5-UserContent"]
+
+
+def user_content_roots(workspace):
+    """The second-level folders (<UEx-UserContent>/<version>/<distribution>) whose contents get cleared"""
+    roots = []
+    for content_folder in USER_CONTENT_FOLDERS:
+        path = os.path.join(workspace, content_folder)
+        if not os.path.isdir(path):
+            continue
+        for first_level in os.scandir(path):
+            if first_level.is_dir(follow_symlinks=False):
+                roots += [second_level.path for second_level in os.scandir(first_level.path)
+                          if second_level.is_dir(follow_symlinks=False)]
+    return roots
+
+
+class TreeDeleter:
+    """Delete the contents of directory trees on a pool of worker threads.
+
+    Every directory is one task: it is listed with os.scandir, its files are
+    removed right away and its subdirectories become new tasks. A directory
+    is removed as soon as its last subdirectory is gone, so the work stays
+    spread over all workers however deep or wide the tree is. Read-only
+    files are only made writable when a delete fails on them.
+    The roots themselves are kept. Call cancel() from any thread to stop
+    after the files being deleted right now.
+    """
+
+    PROGRESS_INTERVAL = 0.1  # Seconds between progress callbacks
+    MAX_LOGGED_FAILURES = 20
+
+    def __init__(self, roots, log=_no_log, progress=None, workers=16, low_priority=False):
+        self.roots = list(roots)
+        self.log = log
+        self.progress = progress  # progress(files, bytes) with the totals deleted so far
+        self.workers = workers
+        self.low_priority = low_priority  # Background work that should not compete with the user
+        self.files = 0
+        self.bytes = 0
+        self.failures = 0
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.remaining_roots = len(self.roots)
+        self.last_report = 0
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        """Delete everything below the roots and return a summary dict
+        with files, bytes, failures and cancelled."""
+        if self.roots:
+            initializer = lower_thread_priority if self.low_priority else None
+            with futures.ThreadPoolExecutor(max_workers=self.workers, initializer=initializer) as executor:
+                self.executor = executor
+                for root in self.roots:
+                    executor.submit(self.clear_directory, [root, None, 1, True])
+                self.done.wait()
+            self.report(force=True)
+        return {'files': self.files, 'bytes': self.bytes, 'failures': self.failures,
+                'cancelled': self.cancelled.is_set()}
+
+    # A directory node is [path, parent node, pending tasks, keep]; pending
+    # counts its own listing plus every subdirectory not yet removed.
+
+    def clear_directory(self, node):
+        subdirectories = []
+        try:
+            if not self.cancelled.is_set():
+                with os.scandir(node[0]) as entries:
+                    for entry in entries:
+                        if self.cancelled.is_set():
+                            break
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirectories.append(entry.path)
+                        else:
+                            self.delete_file(entry)
+        except OSError as e:
+            self.fail(f"❌ Error reading directory {node[0]}: {str(e)}")
+        finally:
+            with self.lock:
+                node[2] += len(subdirectories)
+            for path in subdirectories:
+                self.executor.submit(self.clear_directory, [path, node, 1, False])
+            self.finish(node)
+
+    def finish(self, node):
+        """One task of node is done; remove it once nothing is left in it"""
+        while node is not None:
+            with self.lock:
+                node[2] -= 1
+                if node[2]:
+                    return
+            if not node[3]:
+                self.remove_directory(node[0])
+            elif node[1] is None:
+                with self.lock:
+                    self.remaining_roots -= 1
+                    if not self.remaining_roots:
+                        self.done.set()
+            node = node[1]
+
+    def delete_file(self, entry):
+        try:
+            size = entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            size = 0
+        try:
+            self.with_write_permission(os.remove, entry.path)
+        except OSError as e:
+            self.fail(f"❌ Error deleting file {entry.path}: {str(e)}")
+            return
+        with self.lock:
+            self.files += 1
+            self.bytes += size
+        self.report()
+
+    def remove_directory(self, path):
+        try:
+            self.with_write_permission(os.rmdir, path)
+        except OSError as e:
+            if not self.cancelled.is_set():  # Left non-empty on purpose when cancelled
+                self.fail(f"❌ Error deleting directory {path}: {str(e)}")
+
+    @staticmethod
+    def with_write_permission(remove, path):
+        try:
+            remove(path)
+        except PermissionError:
+            # Perforce leaves synced files read-only, which Windows refuses to delete
+            os.chmod(path, 0o777)
+            remove(path)
+
+    def fail(self, message):
+        with self.lock:
+            self.failures += 1
+            failures = self.failures
+        if failures <= self.MAX_LOGGED_FAILURES:
+            self.log(message, "red")
+        elif failures == self.MAX_LOGGED_FAILURES + 1:
+            self.log("⚠️ More delete errors, not logging each one", "yellow")
+
+    def report(self, force=False):
+        if self.progress is None:
+            return
+        now = time.perf_counter()
+        if force or now - self.last_report >= self.PROGRESS_INTERVAL:
+            self.last_report = now
+            self.progress(self.files, self.bytes)
+
+
+def clear_user_content(workspace, log=_no_log, progress=None, deleter_ready=None):
+    """Delete every app folder under the second-level UE4-UserContent and UE5-UserContent folders.
+
+    progress(files, bytes) is called as files go. deleter_ready(deleter)
+    receives the TreeDeleter before it starts, for a cancel button.
+    Returns a summary dict with files, bytes, failures and cancelled.
+    """
+    deleter = TreeDeleter(user_content_roots(workspace), log, progress)
+    if deleter_ready:
+        deleter_ready(deleter)
+    started = time.perf_counter()
+    result = deleter.run()
+    result['elapsed'] = time.perf_counter() - started
+    return result
+
+
+def lower_thread_priority():
+    """Run the calling thread below normal priority (Windows only, a no-op elsewhere)"""
+    if sys.platform == "win32":
+        THREAD_PRIORITY_LOWEST = -2
+        ctypes.windll.kernel32.SetThreadPriority(ctypes.windll.kernel32.GetCurrentThread(),
+                                                 THREAD_PRIORITY_LOWEST)
+
+
+def workspace_side_folder(workspace, kind):
+    """Hidden helper folder (trash, store) on the same volume as the workspace.
+
+    It sits next to the workspace so a reconcile of the whole workspace
+    never sees it, unless that would put it on another volume (e.g. the
+    workspace is a drive root), in which case it goes inside. Being on the
+    same volume is what lets files be renamed or hardlinked into it.
+    """
+    workspace = os.path.abspath(workspace)
+    parent = os.path.dirname(workspace)
+    name = f".p4vhelper-{kind}-{os.path.basename(workspace)}"
+    try:
+        if parent != workspace and os.stat(parent).st_dev == os.stat(workspace).st_dev:
+            return os.path.join(parent, name)
+    except OSError:
+        pass
+    return os.path.join(workspace, f".p4vhelper-{kind}")
+
+
+def trash_path(workspace):
+    return workspace_side_folder(workspace, "trash")
+
+
+def hide_folder(path):
+    if sys.platform == "win32":
+        FILE_ATTRIBUTE_HIDDEN = 0x02
+        ctypes.windll.kernel32.SetFileAttributesW(path, FILE_ATTRIBUTE_HIDDEN)
+
+
+def user_content_apps(workspace):
+    """The app folders (<UEx-UserContent>/<version>/<distribution>/<app>) in the workspace"""
+    apps = []
+    for root in user_content_roots(workspace):
+        apps += [entry.path for entry in os.scandir(root) if entry.is_dir(follow_symlinks=False)]
+    return apps
+
+
+def delete_in_place(folders, log=_no_log, progress=None, deleter_ready=None):
+    """Delete folders with a TreeDeleter, then the emptied folders themselves"""
+    deleter = TreeDeleter(folders, log, progress)
+    if deleter_ready:
+        deleter_ready(deleter)
+    result = deleter.run()
+    for folder in folders:
+        try:
+            os.rmdir(folder)
+        except OSError:
+            pass  # Cancelled or failed part way, the errors are already logged
+    return result
+
+
+def trash_folders(workspace, folders, log=_no_log, progress=None, deleter_ready=None):
+    """Remove folders at once by renaming them into the workspace's trash folder.
+
+    Each folder is renamed (one metadata operation however many files it
+    holds); purge_trash_in_background deletes the trash afterwards. Folders
+    that can't be renamed, e.g. because the editor has a file open in them,
+    are deleted in place with progress and deleter_ready.
+    Returns the clear_user_content summary plus moved (folders renamed)
+    and cleared (every folder that was moved or deleted).
+    """
+    started = time.perf_counter()
+    trash = trash_path(workspace)
+    stamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 1_000_000_000:09d}"
+    moved, stuck = [], []
+
+    for index, folder in enumerate(folders):
+        target = os.path.join(trash, f"{stamp}-{index}")
+        try:
+            try:
+                os.rename(folder, target)
+            except FileNotFoundError:
+                # No trash folder yet, or a purge just finished and removed it
+                os.makedirs(trash, exist_ok=True)
+                hide_folder(trash)
+                os.rename(folder, target)
+            moved.append(folder)
+        except OSError as e:
+            log(f"⚠️ Could not move {folder} to trash, deleting in place: {str(e)}", "yellow")
+            stuck.append(folder)
+
+    if stuck:
+        result = delete_in_place(stuck, log, progress, deleter_ready)
+    else:
+        result = {'files': 0, 'bytes': 0, 'failures': 0, 'cancelled': False}
+    result['moved'] = len(moved)
+    result['cleared'] = moved + stuck
+    result['elapsed'] = time.perf_counter() - started
+    return result
+
+
+def trash_user_content(workspace, log=_no_log, progress=None, deleter_ready=None, skip=()):
+    """Clear the app folders at once by moving them to trash (see trash_folders).
+
+    Folders in skip are left alone.
+    """
+    apps = [app for app in user_content_apps(workspace) if app not in skip]
+    return trash_folders(workspace, apps, log, progress, deleter_ready)
+
+
+# Keeping the server's have list in step with a cleared workspace
+
+CLEAR_BATCH_SIZE = 16  # App folders per p4 command
+
+
+def folder_file_specs(folders, revision=""):
+    """`<folder>/...<revision>` file arguments for p4"""
+    return [os.path.join(folder, "...") + revision for folder in folders]
+
+
+def folders_with_opened_files(folders):
+    """Return the folders that hold files opened in a pending changelist.
+
+    Raises P4Exception if the server can't be reached.
+    """
+    busy = set()
+    for start in range(0, len(folders), CLEAR_BATCH_SIZE):
+        batch = folders[start:start + CLEAR_BATCH_SIZE]
+        records = p4_pool.run('fstat', '-Ro', '-T', 'clientFile', *folder_file_specs(batch))
+        for record in records:
+            client_file = os.path.normcase(record.get('clientFile', ''))
+            busy.update(folder for folder in batch
+                        if client_file.startswith(os.path.normcase(folder) + os.sep))
+    return busy
+
+
+def forget_have_list(folders, log=_no_log):
+    """Tell the server the workspace no longer has any file in folders (`p4 sync -k ...#none`).
+
+    Only the have list changes, no file is touched; use it after the files
+    were removed locally so the next incremental sync fetches them again.
+    """
+    for start in range(0, len(folders), CLEAR_BATCH_SIZE):
+        batch = folders[start:start + CLEAR_BATCH_SIZE]
+        try:
+            p4_pool.run('sync', '-k', *folder_file_specs(batch, "#none"))
+        except p4python.P4Exception as e:
+            log(f"⚠️ Could not update the have list: {format_p4_error(e)}", "yellow")
+    with contextlib.suppress(sqlite3.Error):
+        reconcile_index.forget_folders(folders)
+
+
+def clear_via_server(folders, log=_no_log, progress=None, deleter_ready=None):
+    """Remove folders through the server: `p4 sync ...#none` in batches, then delete leftovers.
+
+    The server deletes the files it knows about and drops them from the have
+    list; files it does not know about (never submitted, generated) are then
+    deleted in place. The have list of every folder is cleared afterwards
+    too (forget_have_list), so files deleted in place after a failed batch
+    are fetched again by the next sync. Returns the clear_user_content
+    summary; files counts both kinds.
+    """
+    removed = 0
+
+    def on_removed(record):
+        nonlocal removed
+        removed += 1
+        if progress and removed % 100 == 0:
+            progress(removed, 0)
+
+    failures = 0
+    for start in range(0, len(folders), CLEAR_BATCH_SIZE):
+        batch = folders[start:start + CLEAR_BATCH_SIZE]
+        try:
+            p4_pool.run('sync', *folder_file_specs(batch, "#none"), handler=P4StreamHandler(on_removed))
+        except p4python.P4Exception as e:
+            failures += 1
+            log(f"❌ Error removing files through the server: {format_p4_error(e)}", "red")
+
+    def leftover_progress(files, size):
+        if progress:
+            progress(removed + files, size)
+
+    result = delete_in_place(folders, log, leftover_progress, deleter_ready)
+    forget_have_list(folders, log)
+    result['files'] += removed
+    result['failures'] += failures
+    return result
+
+
+def clear_workspace(workspace, mode='trash', log=_no_log, progress=None, deleter_ready=None):
+    """Clear Workspace, keeping the server's have list consistent with the disk.
+
+    App folders with files opened in a pending changelist are skipped. In
+    'trash' mode the folders are moved to trash and the have list is
+    cleared with `sync -k #none`; in 'server' mode the server removes the
+    files with `sync #none`. Either way the next Get Revision can sync
+    incrementally. When the server can't be reached the folders are
+    trashed without updating the have list, and Repair Sync is needed.
+    Returns the clear_user_content summary plus skipped and connected.
+    """
+    started = time.perf_counter()
+    apps = user_content_apps(workspace)
+    try:
+        busy = folders_with_opened_files(apps)
+        connected = True
+    except p4python.P4Exception as e:
+        log(f"⚠️ P4 server not reachable, the have list will not be updated "
+            f"(use Repair Sync for cleared apps): {format_p4_error(e)}", "yellow")
+        busy, connected = set(), False
+    for folder in sorted(busy):
+        log(f"⚠️ Skipping {folder}: it has files opened in a pending changelist", "yellow")
+
+    if mode == 'server' and connected:
+        result = clear_via_server([app for app in apps if app not in busy], log, progress, deleter_ready)
+        result['moved'] = 0
+    else:
+        result = trash_user_content(workspace, log, progress, deleter_ready, skip=busy)
+        if connected:
+            forget_have_list(result['cleared'], log)
+    result.pop('cleared', None)
+    result.update(skipped=len(busy), connected=connected, elapsed=time.perf_counter() - started)
+    return result
+
+
+_purge_threads = {}  # trash path -> thread purging it
+_purge_lock = threading.Lock()
+
+
+def purge_trash(workspace, log=_no_log, low_priority=True):
+    """Delete everything in the workspace's trash folder, then the folder itself.
+
+    Picks up folders trashed while it runs, and prunes content store copies
+    nothing links to any more. Returns a summary dict with
+    files, bytes, failures and elapsed.
+    """
+    trash = trash_path(workspace)
+    started = time.perf_counter()
+    total = {'files': 0, 'bytes': 0, 'failures': 0}
+    while os.path.isdir(trash) and os.listdir(trash):
+        result = TreeDeleter([trash], log, workers=2, low_priority=low_priority).run()
+        for key in total:
+            total[key] += result[key]
+        if result['failures']:
+            break  # Retried on the next launch
+    try:
+        os.rmdir(trash)
+    except OSError:
+        pass
+    # Content store copies of the files just purged are no longer shared
+    pruned_files, pruned_bytes = prune_content_store(workspace)
+    total['files'] += pruned_files
+    total['bytes'] += pruned_bytes
+    total['elapsed'] = time.perf_counter() - started
+    return total
+
+
+def purge_trash_in_background(workspace, log=_no_log, on_done=None):
+    """Purge the workspace's trash on a low-priority daemon thread.
+
+    Does nothing if the trash is empty or already being purged, so it can
+    be called after every trash_user_content and once at startup to finish
+    a purge that an earlier run did not complete. on_done(summary) is
+    called from the purge thread.
+    """
+    trash = trash_path(workspace)
+    if not os.path.isdir(trash) and not os.path.isdir(content_store_path(workspace)):
+        return None
+
+    def purge():
+        try:
+            summary = purge_trash(workspace, log)
+            if on_done:
+                on_done(summary)
+        finally:
+            with _purge_lock:
+                _purge_threads.pop(trash, None)
+
+    with _purge_lock:
+        if trash in _purge_threads:
+            return _purge_threads[trash]
+        thread = threading.Thread(target=purge, daemon=True)
+        _purge_threads[trash] = thread
+    thread.start()
+    return thread
+
+
+# Size-budgeted workspace cache: the least recently used app folders are evicted
+
+WORKSPACE_CACHE_INDEX = 'workspace_cache.json'
+
+
+def folder_size(path):
+    """Total size in bytes of the files under path, without following symlinks"""
+    total, pending = 0, [path]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        else:
+                            total += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        pass
+        except OSError:
+            pass  # Removed or unreadable, counts as empty
+    return total
+
+
+def cache_budget_bytes(settings):
+    return int(settings['cache_budget_gb'] * 1024 ** 3)
+
+
+class WorkspaceCache:
+    """Size and last use of every app folder, kept in workspace_cache.json.
+
+    Get Revision, Generate and Reconcile touch() the app they work on, then
+    enforce_budget() evicts the least recently used apps until the app
+    folders fit in the disk budget. Apps never touched count as last used
+    when they were last modified. Thread-safe.
+    """
+
+    def __init__(self, path=WORKSPACE_CACHE_INDEX):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = None  # Normalized app path -> {'size', 'last_used'}, loaded on first use
+
+    @staticmethod
+    def key(folder):
+        return os.path.normcase(os.path.abspath(folder))
+
+    def _load(self):
+        if self.entries is None:
+            try:
+                with open(self.path) as index:
+                    self.entries = json.load(index)
+            except (OSError, ValueError):
+                self.entries = {}
+        return self.entries
+
+    def _save(self):
+        temporary = self.path + '.tmp'
+        try:
+            with open(temporary, 'w') as index:
+                json.dump(self.entries, index, indent=1)
+            os.replace(temporary, self.path)
+        except OSError:
+            pass  # Only costs an extra measurement next time
+
+    def touch(self, app_folder, measure=True):
+        """Record that app_folder was just used and, if measure is set, its current size.
+
+        Without measure the size recorded earlier is kept, or the folder is
+        measured at the next enforce_budget if it has none.
+        """
+        size = folder_size(app_folder) if measure else None
+        with self.lock:
+            entry = self._load().setdefault(self.key(app_folder), {'size': None})
+            entry['last_used'] = time.time()
+            if size is not None:
+                entry['size'] = size
+            self._save()
+
+    def forget(self, folders):
+        with self.lock:
+            entries = self._load()
+            for folder in folders:
+                entries.pop(self.key(folder), None)
+            self._save()
+
+    def usage(self, workspace):
+        """Return (app folder, size, last used) for every app folder in the workspace.
+
+        Folders missing from the index or without a size are measured, and
+        index entries for folders no longer on disk are dropped.
+        """
+        with self.lock:
+            known = dict(self._load())
+        usage, measured = [], {}
+        for app in user_content_apps(workspace):
+            key = self.key(app)
+            entry = known.get(key) or {'size': None}
+            if entry['size'] is None or 'last_used' not in entry:
+                try:
+                    last_used = entry.get('last_used', os.stat(app).st_mtime)
+                except OSError:
+                    continue
+                entry = measured[key] = {'size': folder_size(app), 'last_used': last_used}
+            usage.append((app, entry['size'], entry['last_used']))
+
+        present = {self.key(app) for app, _, _ in usage}
+        with self.lock:
+            entries = self._load()
+            for key in [key for key in entries if key not in present]:
+                del entries[key]
+            entries.update(measured)
+            self._save()
+        return usage
+
+    def enforce_budget(self, workspace, budget_bytes, log=_no_log, keep=()):
+        """Evict least recently used apps until the app folders fit in budget_bytes.
+
+        Apps in keep, apps with files opened in a pending changelist and apps
+        with local changes that were never reconciled (has_local_changes)
+        are never evicted; each app skipped for that is logged. Evicted
+        folders go to the trash (see trash_folders)
+        and are dropped from the have list, so a later Get Revision syncs
+        them back. Nothing is evicted without a budget or when the server
+        can't be reached. Returns the evicted folders.
+        """
+        if budget_bytes <= 0:
+            return []
+        usage = self.usage(workspace)
+        total = sum(size for _, size, _ in usage)
+        if total <= budget_bytes:
+            return []
+
+        keep = {self.key(folder) for folder in keep}
+        candidates = sorted((item for item in usage if self.key(item[0]) not in keep), key=lambda item: item[2])
+        try:
+            busy = folders_with_opened_files([app for app, _, _ in candidates])
+        except p4python.P4Exception as e:
+            log(f"⚠️ Workspace is over its {format_megabytes(budget_bytes)} budget, but the P4 server "
+                f"is not reachable so nothing was evicted: {format_p4_error(e)}", "yellow")
+            return []
+
+        evict = []
+        for app, size, _ in candidates:
+            if total <= budget_bytes:
+                break
+            if app in busy:
+                continue
+            if has_local_changes(app, log):
+                log(f"⚠️ Not evicting {app}: it has local changes that were not submitted", "yellow")
+                continue
+            evict.append(app)
+            total -= size
+        if not evict:
+            log(f"⚠️ Workspace is over its {format_megabytes(budget_bytes)} budget, "
+                f"but every other app is in use", "yellow")
+            return []
+
+        result = trash_folders(workspace, evict, log)
+        forget_have_list(result['cleared'], log)
+        self.forget(result['cleared'])
+        log(f"🧹 Evicted {len(result['cleared'])} least recently used app(s) to stay within the "
+            f"{format_megabytes(budget_bytes)} workspace budget:", "white")
+        for folder in result['cleared']:
+            log(f"   {folder}", "white")
+        return result['cleared']
+
+
+workspace_cache = WorkspaceCache()
+
+
+def recent_changes(p4_username, max_changes=100, log=_no_log):
+    """Return the user's latest submitted changes as ChangeRecords, newest first"""
+    cmd = ['p4', 'changes', '-s', 'submitted', '-l', '-m', str(max_changes), '-u', p4_username, '//depot/...']
+    log(f"Executing command: {' '.join(cmd)}", "white")
+    
+    changes = []
+    for stat in p4_pool.run(*cmd[1:]):
+        try:
+            changes.append(change_record(stat))
+        except (TypeError, ValueError) as parse_error:
+            log(f"Error parsing change entry: {str(parse_error)}", "red")
+    
+    # Sort changes by changelist number (newest first)
+    changes.sort(key=lambda change: int(change.change), reverse=True)
+    return changes
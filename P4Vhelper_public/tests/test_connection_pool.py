@@ -0,0 +1,114 @@
+"""P4ConnectionPool: connection reuse, retry after a dropped connection and reset."""
+
+import os, sys
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import p4vhelper_core as core
+
+
+class FakeP4Exception(Exception):
+    pass
+
+
+class FakeP4:
+    """Stands in for P4.P4; run() plays back the outcomes queued in the test"""
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.is_connected = False
+        self.commands = []
+
+    def connect(self):
+        self.is_connected = True
+
+    def connected(self):
+        return self.is_connected
+
+    def disconnect(self):
+        self.is_connected = False
+
+    def run(self, *args, **options):
+        self.commands.append(args)
+        outcome = self.outcomes.pop(0)
+        if outcome == 'drop':
+            self.is_connected = False
+            raise FakeP4Exception("Connection dropped")
+        if outcome == 'error':
+            raise FakeP4Exception("No such file")
+        return outcome
+
+
+class ConnectionPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.outcomes = []
+        self.connections = []
+
+        def connect():
+            p4 = FakeP4(self.outcomes)
+            self.connections.append(p4)
+            return p4
+
+        for patcher in (mock.patch.object(core, 'p4python', SimpleNamespace(P4Exception=FakeP4Exception)),
+                        mock.patch.object(core, 'init_p4', connect)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.pool = core.P4ConnectionPool(max_size=2)
+
+    def test_connection_is_reused(self):
+        self.outcomes += [['first'], ['second']]
+        self.assertEqual(self.pool.run('info'), ['first'])
+        self.assertEqual(self.pool.run('info'), ['second'])
+        self.assertEqual(len(self.connections), 1)
+
+    def test_dropped_connection_is_replaced_and_retried(self):
+        self.outcomes += ['drop', ['ok']]
+        self.assertEqual(self.pool.run('info'), ['ok'])
+        self.assertEqual(len(self.connections), 2)
+        self.assertFalse(self.connections[0].connected())
+
+    def test_server_errors_are_not_retried(self):
+        self.outcomes += ['error', ['unused']]
+        with self.assertRaises(FakeP4Exception):
+            self.pool.run('fstat', '//depot/missing')
+        self.assertEqual(self.outcomes, [['unused']])
+
+    def test_no_retry_when_disabled_or_streaming(self):
+        self.outcomes += ['drop', 'drop', ['unused']]
+        with self.assertRaises(FakeP4Exception):
+            self.pool.run('submit', retry=False)
+        with self.assertRaises(FakeP4Exception):
+            self.pool.run('sync', handler=object())
+        self.assertEqual(self.outcomes, [['unused']])
+
+    def test_streaming_command_can_opt_into_retry(self):
+        self.outcomes += ['drop', ['ok']]
+        self.assertEqual(self.pool.run('sync', '-n', handler=object(), retry=True), ['ok'])
+
+    def test_reset_retires_idle_and_borrowed_connections(self):
+        self.outcomes += [['one'], ['two']]
+        self.pool.run('info')
+        idle = self.connections[0]
+        borrowed = self.pool.acquire()
+        self.assertIs(borrowed, idle)
+
+        self.pool.reset()
+        self.pool.release(borrowed)
+
+        self.assertFalse(borrowed.connected())
+        self.pool.run('info')
+        self.assertEqual(len(self.connections), 2)
+
+    def test_reset_disconnects_idle_connections(self):
+        self.outcomes += [['one']]
+        self.pool.run('info')
+        self.pool.reset()
+        self.assertFalse(self.connections[0].connected())
+
+
+if __name__ == '__main__':
+    unittest.main()
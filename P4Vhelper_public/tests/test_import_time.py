@@ -0,0 +1,67 @@
+"""Import-time budget for P4VhelperPro and p4vhelper_core.
+
+Each module is imported in a fresh interpreter with pywin32, P4Python and
+pyperclip blocked, as on a machine where they are missing, and must load
+within IMPORT_BUDGET seconds without pulling in any of the lazy modules.
+
+Run with: python -m unittest discover -s tests
+"""
+
+import os, sys, json, subprocess
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(HERE)
+
+# Seconds a cold import may take; the GUI script measures about 40 ms here
+IMPORT_BUDGET = 0.5
+
+# Windows-only and third-party modules the scripts must not need to import
+BLOCKED = ['P4', 'win32gui', 'win32con', 'win32api', 'win32com', 'pyperclip']
+
+# Modules that are wrapped in LazyModule and should stay unloaded
+LAZY = ['P4', 'win32gui', 'pyperclip', 'configparser', 'concurrent.futures',
+        'ctypes', 'sqlite3', 'urllib.request', 'webbrowser']
+
+PROBE = """
+import sys, time, json
+for name in {blocked!r}:
+    sys.modules[name] = None  # import raises ImportError, as if not installed
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'elapsed': elapsed,
+                  'loaded': [name for name in {lazy!r} if sys.modules.get(name) is not None]}}))
+"""
+
+
+def measure_import(module):
+    """Import module in a new interpreter; return (seconds, lazy modules loaded)"""
+    code = PROBE.format(blocked=BLOCKED, module=module, lazy=LAZY)
+    result = subprocess.run([sys.executable, '-c', code], cwd=PACKAGE_DIR,
+                            capture_output=True, text=True, timeout=60)
+    if result.returncode != 0:
+        raise AssertionError(f"import {module} failed:\n{result.stderr}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return report['elapsed'], report['loaded']
+
+
+class ImportTimeTest(unittest.TestCase):
+
+    def check(self, module):
+        # Best of three, so a busy machine doesn't fail the budget on one slow run
+        runs = [measure_import(module) for _ in range(3)]
+        elapsed = min(seconds for seconds, _ in runs)
+        self.assertLess(elapsed, IMPORT_BUDGET,
+                        f"import {module} took {elapsed * 1000:.0f} ms")
+        self.assertEqual(runs[0][1], [], f"import {module} loaded lazy modules eagerly")
+
+    def test_core_import_time(self):
+        self.check('p4vhelper_core')
+
+    def test_gui_import_time(self):
+        self.check('P4VhelperPro')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""P4MetadataCache: TTL cache of p4 info / client -o / login -s results."""
+
+import os, sys
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import p4vhelper_core as core
+
+
+class MetadataCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = SimpleNamespace(port='perforce:1666', user='alice', client='alice-ws')
+        patcher = mock.patch.object(core, 'init_p4', lambda: self.settings)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = core.P4MetadataCache(ttl=60)
+        self.calls = 0
+
+    def loader(self):
+        self.calls += 1
+        return f"value {self.calls}"
+
+    def test_cached_until_the_ttl_expires(self):
+        with mock.patch.object(core.time, 'time', return_value=1000):
+            self.assertEqual(self.cache.get('info', self.loader), "value 1")
+            self.assertEqual(self.cache.get('info', self.loader), "value 1")
+        with mock.patch.object(core.time, 'time', return_value=1061):
+            self.assertEqual(self.cache.get('info', self.loader), "value 2")
+
+    def test_per_lookup_ttl(self):
+        with mock.patch.object(core.time, 'time', return_value=1000):
+            self.cache.get('info', self.loader, ttl=5)
+        with mock.patch.object(core.time, 'time', return_value=1006):
+            self.assertEqual(self.cache.get('info', self.loader), "value 2")
+
+    def test_keyed_by_connection_settings(self):
+        self.cache.get('info', self.loader)
+        self.settings.user = 'bob'
+        self.assertEqual(self.cache.get('info', self.loader), "value 2")
+
+    def test_vetoed_and_failed_loads_are_not_stored(self):
+        self.cache.get('login', self.loader, keep=lambda value: False)
+        self.assertEqual(self.cache.get('login', self.loader), "value 2")
+
+        def failing():
+            raise RuntimeError("server down")
+        with self.assertRaises(RuntimeError):
+            self.cache.get('info', failing)
+        self.assertEqual(self.cache.get('info', self.loader), "value 3")
+
+    def test_invalidate_one_or_everything(self):
+        self.cache.get('info', self.loader)
+        self.cache.get('login', self.loader)
+
+        self.cache.invalidate('info')
+        self.assertEqual(self.cache.get('info', self.loader), "value 3")
+        self.assertEqual(self.cache.get('login', self.loader), "value 2")
+
+        self.cache.invalidate()
+        self.assertEqual(self.cache.get('login', self.loader), "value 4")
+
+
+if __name__ == '__main__':
+    unittest.main()
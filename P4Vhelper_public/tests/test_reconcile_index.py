@@ -0,0 +1,100 @@
+"""ReconcileIndex: which files under an app folder changed since they were recorded."""
+
+import os, sys, hashlib, tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import p4vhelper_core as core
+
+
+def md5(data):
+    return hashlib.md5(data).hexdigest().upper()
+
+
+class ReconcileIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.temp.name, 'app')
+        os.makedirs(os.path.join(self.folder, 'Content'))
+        self.index = core.ReconcileIndex(os.path.join(self.temp.name, 'index.db'))
+        self.server = {}  # clientFile -> digest at #have
+        self.a = self.write('a.uasset', b'first')
+        self.b = self.write(os.path.join('Content', 'b.uasset'), b'second')
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def write(self, name, data, synced=True):
+        path = os.path.join(self.folder, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        if synced:
+            self.server[path] = md5(data)
+        return path
+
+    def bump_mtime(self, path):
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+
+    def record(self, written=()):
+        def fstat(*args, **options):
+            return [{'clientFile': path, 'digest': digest, 'headType': 'binary'}
+                    for path, digest in self.server.items()]
+        with mock.patch.object(core.p4_pool, 'run', fstat):
+            self.index.record_folder(self.folder, written=written)
+
+    def test_unrecorded_folder(self):
+        self.assertIsNone(self.index.changed_files(self.folder))
+
+    def test_nothing_changed(self):
+        self.record(written=[self.a, self.b])
+        self.assertEqual(self.index.changed_files(self.folder), [])
+
+    def test_added_edited_and_deleted_files(self):
+        self.record(written=[self.a, self.b])
+        added = self.write('new.uasset', b'new', synced=False)
+        self.write('a.uasset', b'edited offline', synced=False)
+        self.bump_mtime(self.a)
+        os.remove(self.b)
+
+        changed = self.index.changed_files(self.folder)
+
+        self.assertEqual(sorted(changed), sorted([added, self.a, core.ReconcileIndex.key(self.b)]))
+
+    def test_touched_file_with_same_content(self):
+        self.record(written=[self.a, self.b])
+        self.bump_mtime(self.a)
+
+        self.assertEqual(self.index.changed_files(self.folder), [])
+        # The new mtime is remembered, so the file is not hashed again
+        with mock.patch.object(core, 'local_digest', side_effect=AssertionError("hashed again")):
+            self.assertEqual(self.index.changed_files(self.folder), [])
+
+    def test_offline_edit_survives_a_sync_of_other_files(self):
+        self.record(written=[self.a, self.b])
+        self.write('a.uasset', b'edited offline', synced=False)
+        self.bump_mtime(self.a)
+        self.write(os.path.join('Content', 'b.uasset'), b'second, newer revision')
+
+        self.record(written=[self.b])
+
+        self.assertEqual(self.index.changed_files(self.folder), [self.a])
+
+    def test_unwritten_files_are_recorded_only_when_they_match(self):
+        self.write('a.uasset', b'not what the server has', synced=False)
+
+        self.record()
+
+        self.assertEqual(self.index.changed_files(self.folder), [self.a])
+
+    def test_forget_folders(self):
+        self.record(written=[self.a, self.b])
+        self.index.forget_folders([self.folder])
+        self.assertIsNone(self.index.changed_files(self.folder))
+
+
+if __name__ == '__main__':
+    unittest.main()
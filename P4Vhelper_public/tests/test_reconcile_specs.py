@@ -0,0 +1,84 @@
+"""File specs sent to `p4 reconcile`: changed file lists and folder shards."""
+
+import os, sys, tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import p4vhelper_core as core
+from p4vhelper_core import reconcile_file_specs, reconcile_shards, removed_subtrees
+
+
+class ReconcileFileSpecsTest(unittest.TestCase):
+
+    def test_plain_paths(self):
+        paths = [os.path.join('app', 'b.uasset'), os.path.join('app', 'a.uasset')]
+        self.assertEqual(reconcile_file_specs(paths), sorted(paths))
+
+    def test_wildcard_names_use_their_folder(self):
+        paths = [os.path.join('app', 'a@2.uasset'), os.path.join('app', '100%.txt')]
+        self.assertEqual(reconcile_file_specs(paths), [os.path.join('app', '*')])
+
+    def test_wildcard_folder(self):
+        self.assertIsNone(reconcile_file_specs([os.path.join('app', 'v#1', 'a.uasset')]))
+
+
+class ReconcileShardsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.temp.name, 'app')
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def make(self, *names):
+        for name in names:
+            path = os.path.join(self.root, name)
+            if name.endswith('/'):
+                os.makedirs(path, exist_ok=True)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                open(path, 'w').close()
+
+    def spec(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def test_small_target_keeps_the_folder_whole(self):
+        self.make('a/x.txt', 'b/y.txt')
+        self.assertEqual(reconcile_shards(self.root, 1), [self.spec('...')])
+
+    def test_splits_into_subfolders(self):
+        self.make('top.txt', 'a/x/one.txt', 'b/two.txt')
+        shards = reconcile_shards(self.root, 16)
+        self.assertEqual(sorted(shards), sorted([self.spec('*'), self.spec('b', '...'),
+                                                 self.spec('a', 'x', '...')]))
+
+    def test_wildcard_subfolder_stays_in_its_parent(self):
+        self.make('a/x.txt', 'c/v@2/y.txt', 'c/z/w.txt')
+        shards = reconcile_shards(self.root, 16)
+        self.assertIn(self.spec('c', '...'), shards)
+        self.assertFalse([shard for shard in shards if '@' in shard])
+
+
+    def test_removed_subtrees_of_expanded_folders(self):
+        self.make('a/x/one.txt', 'b/two.txt')
+        shards = reconcile_shards(self.root, 16)
+        on_server = {self.spec('*'): ['a', 'b', 'gone'], self.spec('a', '*'): ['x', 'v%40old']}
+
+        def dirs(*args, **options):
+            return [{'dir': f"//depot/app/{name}"} for name in on_server.get(args[-1], [])]
+
+        with mock.patch.object(core.p4_pool, 'run', dirs):
+            removed = removed_subtrees(self.root, shards)
+
+        self.assertEqual(sorted(removed), sorted([self.spec('gone', '...'), self.spec('a', 'v%40old', '...')]))
+
+    def test_whole_folder_needs_no_delete_pass(self):
+        with mock.patch.object(core.p4_pool, 'run', side_effect=AssertionError("asked the server")):
+            self.assertEqual(removed_subtrees(self.root, [self.spec('...')]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+"""TransferMeter: byte-weighted progress, throughput and ETA."""
+
+import os, sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import p4vhelper_core as core
+from p4vhelper_core import TransferMeter
+
+MB = 1024 * 1024
+
+
+class TransferMeterTest(unittest.TestCase):
+
+    def test_weighted_by_bytes(self):
+        meter = TransferMeter(4, 100 * MB)
+        meter.add(75 * MB)
+        self.assertEqual(meter.files, 1)
+        self.assertAlmostEqual(meter.percentage(), 75)
+
+    def test_counts_files_without_a_total_size(self):
+        meter = TransferMeter(4)
+        meter.add(0, files=3)
+        self.assertAlmostEqual(meter.percentage(), 75)
+        self.assertEqual(meter.status(), "3/4 files")
+
+    def test_capped_at_100(self):
+        meter = TransferMeter(1, 10)
+        meter.add(25, files=3)
+        self.assertEqual(meter.percentage(), 100)
+
+    def test_empty_transfer(self):
+        meter = TransferMeter(0)
+        self.assertEqual(meter.percentage(), 0)
+
+    def test_status_with_rate_and_eta(self):
+        with mock.patch.object(core.time, 'perf_counter', return_value=100):
+            meter = TransferMeter(10, 100 * MB)
+        meter.add(40 * MB, files=4)
+        with mock.patch.object(core.time, 'perf_counter', return_value=110):
+            status = meter.status()
+        self.assertTrue(status.startswith("4/10 files, 40.0/"), status)
+        self.assertIn("4.0 MB/s", status)
+        self.assertIn(f"ETA {core.format_duration(15)}", status)
+
+
+if __name__ == '__main__':
+    unittest.main()
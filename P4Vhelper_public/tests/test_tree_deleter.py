@@ -0,0 +1,80 @@
+"""TreeDeleter: parallel scandir delete of directory trees."""
+
+import os, sys, stat, tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from p4vhelper_core import TreeDeleter
+
+
+def write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+
+
+class TreeDeleterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.root = self.temp.name
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_deletes_contents_and_keeps_roots(self):
+        first, second = os.path.join(self.root, 'a'), os.path.join(self.root, 'b')
+        write(os.path.join(first, 'one.bin'), 10)
+        write(os.path.join(first, 'deep', 'er', 'two.bin'), 20)
+        write(os.path.join(second, 'three.bin'), 30)
+        os.makedirs(os.path.join(second, 'empty'))
+
+        reports = []
+        result = TreeDeleter([first, second], progress=lambda files, size: reports.append((files, size))).run()
+
+        self.assertEqual(result, {'files': 3, 'bytes': 60, 'failures': 0, 'cancelled': False})
+        self.assertEqual(os.listdir(first), [])
+        self.assertEqual(os.listdir(second), [])
+        self.assertEqual(reports[-1], (3, 60))
+
+    def test_deletes_read_only_files(self):
+        path = os.path.join(self.root, 'app', 'synced.uasset')
+        write(path, 5)
+        os.chmod(path, stat.S_IREAD)
+
+        result = TreeDeleter([os.path.join(self.root, 'app')]).run()
+
+        self.assertEqual(result['files'], 1)
+        self.assertFalse(os.path.exists(path))
+
+    def test_cancel_before_run_deletes_nothing(self):
+        path = os.path.join(self.root, 'app', 'keep.bin')
+        write(path, 5)
+        deleter = TreeDeleter([os.path.join(self.root, 'app')])
+        deleter.cancel()
+
+        result = deleter.run()
+
+        self.assertTrue(result['cancelled'])
+        self.assertEqual(result['failures'], 0)
+        self.assertTrue(os.path.exists(path))
+
+    def test_missing_root_is_a_failure(self):
+        logged = []
+        result = TreeDeleter([os.path.join(self.root, 'gone')], log=lambda message, color: logged.append(color)).run()
+
+        self.assertEqual(result['failures'], 1)
+        self.assertEqual(logged, ['red'])
+
+    def test_no_roots_reports_nothing(self):
+        def progress(files, size):
+            raise AssertionError("progress called without roots")
+
+        result = TreeDeleter([], progress=progress).run()
+
+        self.assertEqual(result, {'files': 0, 'bytes': 0, 'failures': 0, 'cancelled': False})
+
+
+if __name__ == '__main__':
+    unittest.main()